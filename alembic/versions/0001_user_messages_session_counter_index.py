@@ -0,0 +1,40 @@
+"""user_messages (session_id, message_counter) index
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-16 21:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = "ix_user_messages_session_counter"
+
+
+def _has_index() -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return any(index["name"] == INDEX_NAME for index in inspector.get_indexes("user_messages"))
+
+
+def upgrade() -> None:
+    # 테이블이 없으면 앱이 시작할 때 create_all이 인덱스와 함께 만들고,
+    # 앱이 이미 시작된 DB에는 모델에 선언된 같은 인덱스가 create_all로 만들어져 있다
+    if not sa.inspect(op.get_bind()).has_table("user_messages") or _has_index():
+        return
+    op.create_index(
+        INDEX_NAME,
+        "user_messages",
+        ["session_id", "message_counter"],
+    )
+
+
+def downgrade() -> None:
+    if _has_index():
+        op.drop_index(INDEX_NAME, table_name="user_messages")
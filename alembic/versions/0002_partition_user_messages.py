@@ -0,0 +1,78 @@
+"""partition user_messages by created_at (optional, MySQL)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 21:30:00
+
+user_messages를 created_at 기준 일 단위 RANGE 파티션으로 바꿉니다.
+만료된 파티션은 보관 작업(app/retention.py)이 DROP PARTITION으로 지웁니다.
+
+테이블 전체를 다시 쓰는 작업이라 명시적으로 요청할 때만 실행됩니다:
+
+    alembic -x partition_user_messages=true upgrade head
+
+MySQL 파티션 테이블은 외래 키를 지원하지 않고 파티션 키가 기본 키에 포함되어야
+하므로 session_id 외래 키를 제거하고 기본 키를 (id, created_at)으로 바꿉니다.
+MySQL이 아니면 아무것도 하지 않습니다.
+"""
+from datetime import date, timedelta
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+AHEAD_DAYS = 3
+
+
+def _to_days(day: date) -> int:
+    return day.toordinal() + 365  # MySQL TO_DAYS()
+
+
+def _enabled() -> bool:
+    flag = context.get_x_argument(as_dictionary=True).get("partition_user_messages", "false")
+    return flag.lower() in ("1", "true", "yes") and op.get_bind().dialect.name == "mysql"
+
+
+def _foreign_keys(bind) -> list:
+    return [fk["name"] for fk in sa.inspect(bind).get_foreign_keys("user_messages") if fk.get("name")]
+
+
+def upgrade() -> None:
+    if not _enabled():
+        return
+    bind = op.get_bind()
+    for name in _foreign_keys(bind):
+        op.drop_constraint(name, "user_messages", type_="foreignkey")
+
+    op.execute("UPDATE user_messages SET created_at = NOW() WHERE created_at IS NULL")
+    op.execute(
+        "ALTER TABLE user_messages "
+        "MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)"
+    )
+
+    # 기존 행은 오늘 이전 파티션 하나에 두고, 오늘부터는 일 단위로 나눈다
+    today = date.today()
+    days = [today + timedelta(days=offset) for offset in range(0, AHEAD_DAYS + 2)]
+    definitions = ", ".join(
+        f"PARTITION p{day:%Y%m%d} VALUES LESS THAN ({_to_days(day)})" for day in days
+    )
+    op.execute(
+        "ALTER TABLE user_messages PARTITION BY RANGE (TO_DAYS(created_at)) "
+        f"({definitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+    )
+
+
+def downgrade() -> None:
+    if not _enabled():
+        return
+    op.execute("ALTER TABLE user_messages REMOVE PARTITIONING")
+    op.execute("ALTER TABLE user_messages DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+    op.create_foreign_key(
+        None, "user_messages", "user_sessions", ["session_id"], ["session_id"]
+    )
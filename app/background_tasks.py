@@ -4,6 +4,8 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from .database import AsyncSessionLocal
 from .session_manager import session_manager
+from .retention import message_retention
+from .loop_monitor import loop_monitor
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,7 @@ class BackgroundTaskManager:
         self.running = False
         self.ping_task = None
         self.cleanup_task = None
+        self.retention_task = None
 
     async def start_ping_checker(self):
         """ping 체크 백그라운드 태스크를 시작합니다."""
@@ -21,6 +24,10 @@ class BackgroundTaskManager:
         self.running = True
         self.ping_task = asyncio.create_task(self._ping_checker_loop())
         self.cleanup_task = asyncio.create_task(self._cleanup_checker_loop())
+        if message_retention.enabled:
+            self.retention_task = asyncio.create_task(self._retention_loop())
+        # 위 루프들이 이벤트 루프를 오래 잡는지 감시
+        loop_monitor.start()
         logger.info("Background ping checker started")
 
     async def stop_ping_checker(self):
@@ -41,6 +48,14 @@ class BackgroundTaskManager:
             except asyncio.CancelledError:
                 pass
         
+        if self.retention_task:
+            self.retention_task.cancel()
+            try:
+                await self.retention_task
+            except asyncio.CancelledError:
+                pass
+        
+        loop_monitor.stop()
         logger.info("Background ping checker stopped")
 
     async def _ping_checker_loop(self):
@@ -48,10 +63,12 @@ class BackgroundTaskManager:
         while self.running:
             try:
                 # ping이 필요한 세션들 확인
-                sessions_needing_ping = session_manager.get_sessions_needing_ping()
+                sessions_needing_ping = await session_manager.get_sessions_needing_ping()
                 
                 if sessions_needing_ping:
                     logger.info(f"Sending ping to {len(sessions_needing_ping)} sessions")
+                    # 세션마다 문자열을 만들지 않도록 레벨을 한 번만 확인
+                    debug = logger.isEnabledFor(logging.DEBUG)
                     
                     for session_info in sessions_needing_ping:
                         session_id = session_info["session_id"]
@@ -59,7 +76,8 @@ class BackgroundTaskManager:
                         
                         # ping 전송
                         await session_manager.send_ping(session_id)
-                        logger.debug(f"Ping sent to session {session_id[:8]}... (user: {username})")
+                        if debug:
+                            logger.debug(f"Ping sent to session {session_id[:8]}... (user: {username})")
                 
                 # 20초마다 체크 (ping_interval과 동일)
                 await asyncio.sleep(session_manager.ping_interval)
@@ -79,11 +97,12 @@ class BackgroundTaskManager:
                     if inactive_sessions:
                         logger.info(f"Cleaned up {len(inactive_sessions)} inactive sessions")
                         
-                        for session_info in inactive_sessions:
-                            session_id = session_info["session_id"]
-                            username = session_info["username"]
-                            reason = session_info["reason"]
-                            logger.info(f"Session {session_id[:8]}... (user: {username}) removed due to {reason}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            for session_info in inactive_sessions:
+                                session_id = session_info["session_id"]
+                                username = session_info["username"]
+                                reason = session_info["reason"]
+                                logger.debug(f"Session {session_id[:8]}... (user: {username}) removed due to {reason}")
                 
                 # 30초마다 정리 작업 수행
                 await asyncio.sleep(30)
@@ -92,12 +111,28 @@ class BackgroundTaskManager:
                 logger.error(f"Error in cleanup checker loop: {e}")
                 await asyncio.sleep(10)  # 에러 발생 시 10초 후 재시도
 
+    async def _retention_loop(self):
+        """주기적으로 보관 기간이 지난 메시지를 배치 단위로 삭제하는 루프입니다."""
+        while self.running:
+            try:
+                purged = await message_retention.run_once()
+                if purged:
+                    logger.info(f"Purged {purged} expired user messages")
+                
+                await asyncio.sleep(message_retention.interval)
+                
+            except Exception as e:
+                logger.error(f"Error in message retention loop: {e}")
+                await asyncio.sleep(30)  # 에러 발생 시 30초 후 재시도
+
     def get_status(self) -> dict:
         """백그라운드 태스크 상태를 반환합니다."""
         return {
             "running": self.running,
             "ping_task_active": self.ping_task and not self.ping_task.done(),
             "cleanup_task_active": self.cleanup_task and not self.cleanup_task.done(),
+            "retention_task_active": bool(self.retention_task and not self.retention_task.done()),
+            "loop_monitor_active": loop_monitor.running,
             "ping_interval": session_manager.ping_interval,
             "ping_timeout": session_manager.ping_timeout,
             "timestamp": datetime.now().isoformat()
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import List, Optional, Set
+
+from .sse import encode_event
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """스트림 구독자 하나의 수신 큐입니다."""
+
+    __slots__ = ("_items", "_waiter", "closed")
+
+    def __init__(self):
+        self._items = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        self.closed = False
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def push(self, item):
+        """항목을 큐에 넣고 대기 중인 소비자를 깨웁니다."""
+        if self.closed:
+            return
+        self._items.append(item)
+        self._wake()
+
+    def close(self):
+        """구독을 종료합니다. 대기 중인 소비자는 None을 받습니다."""
+        self.closed = True
+        self._wake()
+
+    async def get_many(self) -> Optional[List]:
+        """쌓여 있는 항목을 모두 꺼냅니다. 비어 있으면 도착할 때까지 대기합니다."""
+        while not self._items:
+            if self.closed:
+                return None
+            # asyncio.Event보다 가벼운 단일 future로 대기
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self.get_nowait()
+
+    def get_nowait(self) -> List:
+        """쌓여 있는 항목을 기다리지 않고 모두 꺼냅니다. 비어 있으면 빈 목록."""
+        items = list(self._items)
+        self._items.clear()
+        return items
+
+
+class BroadcastHub:
+    """전역 /stream 이벤트를 한 번만 만들어 모든 구독자에게 전달하는 허브입니다.
+
+    구독자가 있는 동안에만 producer 태스크 하나가 돌며, 프레임은 tick마다
+    한 번 직렬화/인코딩되어 같은 bytes 객체가 모든 구독자 큐에 들어갑니다.
+    """
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._subscribers: Set[Subscription] = set()
+        self._task = None
+        self._last_frame: Optional[bytes] = None
+        self.counter = 0
+        self.frames_published = 0
+
+    def subscribe(self) -> Subscription:
+        """새 구독을 등록합니다. O(1)"""
+        subscription = Subscription()
+        self._subscribers.add(subscription)
+        if self._last_frame is not None:
+            # 새 구독자는 다음 tick을 기다리지 않고 최신 프레임부터 받는다
+            subscription.push(self._last_frame)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._produce())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """구독을 해제합니다. O(1)"""
+        self._subscribers.discard(subscription)
+        subscription.close()
+
+    def get_subscriber_count(self) -> int:
+        """현재 구독자 수를 반환합니다."""
+        return len(self._subscribers)
+
+    def build_frame(self, counter: int) -> bytes:
+        """tick 하나의 SSE 프레임을 만듭니다."""
+        data = {
+            "timestamp": time.time(),
+            "counter": counter,
+            "message": f"Server message #{counter}"
+        }
+        return encode_event(data)
+
+    def publish(self, frame: bytes):
+        """이미 인코딩된 프레임을 모든 구독자에게 전달합니다."""
+        self._last_frame = frame
+        for subscription in self._subscribers:
+            subscription.push(frame)
+        self.frames_published += 1
+
+    async def _produce(self):
+        """구독자가 있는 동안 interval마다 프레임을 발행하는 루프입니다."""
+        try:
+            while self._subscribers:
+                self.publish(self.build_frame(self.counter))
+                self.counter += 1
+                await asyncio.sleep(self.interval)
+        except Exception as e:
+            logger.error(f"Error in broadcast producer: {e}")
+        finally:
+            self._last_frame = None
+
+
+# 전역 브로드캐스트 허브 인스턴스
+broadcast_hub = BroadcastHub()
@@ -0,0 +1,90 @@
+import heapq
+import itertools
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class DeadlineScheduler:
+    """monotonic 데드라인 기준의 min-heap 스케줄러입니다.
+
+    키마다 가장 최근 예약 하나만 유효합니다. 재예약되거나 취소된 항목은
+    heap에 남아 있다가 꺼내질 때 버려집니다 (lazy deletion).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._tokens: Dict[Hashable, int] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tokens
+
+    def schedule(self, key: Hashable, deadline: float):
+        """키의 데드라인을 (재)예약합니다. O(log N)"""
+        token = next(self._seq)
+        self._tokens[key] = token
+        heapq.heappush(self._heap, (deadline, token, key))
+        self._maybe_compact()
+
+    def cancel(self, key: Hashable):
+        """키의 예약을 취소합니다. O(1)"""
+        self._tokens.pop(key, None)
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """데드라인이 지난 항목들을 꺼내 (key, deadline) 목록으로 반환합니다. limit개까지만 꺼낼 수 있습니다."""
+        if now is None:
+            now = time.monotonic()
+        heap = self._heap
+        tokens = self._tokens
+        due = []
+        while heap and heap[0][0] <= now and (limit is None or len(due) < limit):
+            deadline, token, key = heapq.heappop(heap)
+            if tokens.get(key) == token:
+                del tokens[key]
+                due.append((key, deadline))
+        return due
+
+    def peek_due(self, now: Optional[float] = None) -> List[Hashable]:
+        """데드라인이 지난 키들을 꺼내지 않고 반환합니다. O(due)"""
+        if now is None:
+            now = time.monotonic()
+        heap = self._heap
+        tokens = self._tokens
+
+        # 맨 앞의 무효 항목들은 여기서 정리
+        while heap and tokens.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+
+        due = []
+        size = len(heap)
+        stack = [0] if size else []
+        while stack:
+            index = stack.pop()
+            deadline, token, key = heap[index]
+            if deadline > now:
+                continue  # heap 성질상 자식들도 모두 미래
+            if tokens.get(key) == token:
+                due.append(key)
+            left = 2 * index + 1
+            if left < size:
+                stack.append(left)
+            if left + 1 < size:
+                stack.append(left + 1)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        """가장 가까운 유효 데드라인을 반환합니다."""
+        heap = self._heap
+        while heap and self._tokens.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def _maybe_compact(self):
+        # 무효 항목이 유효 항목의 두 배를 넘으면 heap을 다시 만든다 (분할 상환 O(1))
+        if len(self._heap) > 2 * len(self._tokens) + 1024:
+            tokens = self._tokens
+            self._heap = [entry for entry in self._heap if tokens.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
@@ -1,9 +1,10 @@
-from fastapi import Depends, HTTPException, Path
+from fastapi import Depends, Header, HTTPException, Path
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
 
 from .database import get_database
 from .session_manager import session_manager
+from .sharding import SHARD_ADMIN_TOKEN, SHARD_ADMIN_HEADER, check_admin_token
 
 # 공통 의존성들
 DatabaseDep = Annotated[AsyncSession, Depends(get_database)]
@@ -20,4 +21,11 @@ async def validate_session_exists(session_id: Annotated[str, Path()]) -> str:
     session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    return session_id
\ No newline at end of file
+    return session_id
+
+async def require_shard_admin(token: Annotated[Optional[str], Header(alias=SHARD_ADMIN_HEADER)] = None):
+    """샤드 관리 API 호출자를 SHARD_ADMIN_TOKEN으로 확인합니다. 토큰이 설정되지 않았으면 항상 거부합니다."""
+    if not SHARD_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Shard admin API is disabled (SHARD_ADMIN_TOKEN is not set)")
+    if not check_admin_token(token):
+        raise HTTPException(status_code=403, detail="Invalid shard admin token")
@@ -0,0 +1,365 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 설정되어 있으면 워커 간 이벤트 릴레이 허브에 연결 (uvicorn --workers N 용)
+EVENT_RELAY_SOCKET = os.getenv("EVENT_RELAY_SOCKET", "")
+
+# 프로토콜: 한 줄에 JSON 배열 하나 = 메시지 배치
+#   ["sub", channel] / ["unsub", channel] / ["pub", channel, payload]
+#   ["msg", channel, payload]        허브 -> 워커
+#   ["stats", request_id]            워커 -> 허브, 응답은 ["stats", request_id, {...}]
+
+# 한 줄(배치)에 담는 최대 메시지 수와 줄 길이 한도
+BATCH_MAX_MESSAGES = 512
+STREAM_LIMIT = 1 << 22
+
+
+def channel_kind(channel: str) -> str:
+    """통계 집계용 채널 종류 ("session:abc" -> "session")"""
+    return channel.split(":", 1)[0]
+
+
+class ChannelStats:
+    """채널 종류별 처리량 통계 (초당 처리량은 1초 단위 EWMA)"""
+
+    __slots__ = ("messages_in", "messages_out", "rate_in", "rate_out",
+                 "_window_start", "_window_in", "_window_out")
+
+    def __init__(self):
+        self.messages_in = 0
+        self.messages_out = 0
+        self.rate_in = 0.0
+        self.rate_out = 0.0
+        self._window_start = time.monotonic()
+        self._window_in = 0
+        self._window_out = 0
+
+    def record(self, messages_in: int = 0, messages_out: int = 0):
+        self.messages_in += messages_in
+        self.messages_out += messages_out
+        self._window_in += messages_in
+        self._window_out += messages_out
+        self._roll()
+
+    def _roll(self):
+        elapsed = time.monotonic() - self._window_start
+        if elapsed >= 1.0:
+            self.rate_in = 0.7 * self.rate_in + 0.3 * (self._window_in / elapsed)
+            self.rate_out = 0.7 * self.rate_out + 0.3 * (self._window_out / elapsed)
+            self._window_start += elapsed
+            self._window_in = 0
+            self._window_out = 0
+
+    def as_dict(self) -> dict:
+        self._roll()
+        return {
+            "messages_in": self.messages_in,
+            "messages_out": self.messages_out,
+            "rate_in": round(self.rate_in, 2),
+            "rate_out": round(self.rate_out, 2),
+        }
+
+
+class _BatchWriter:
+    """이벤트 루프 한 바퀴 동안 쌓인 메시지를 한 줄로 묶어 쓰는 writer"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.queue: List[list] = []
+        self.batches = 0
+        self.messages = 0
+        self._scheduled = False
+
+    def send(self, message: list):
+        self.queue.append(message)
+        if not self._scheduled:
+            self._scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        self._scheduled = False
+        if not self.queue or self.writer.is_closing():
+            self.queue.clear()
+            return
+        queue, self.queue = self.queue, []
+        for start in range(0, len(queue), BATCH_MAX_MESSAGES):
+            batch = queue[start:start + BATCH_MAX_MESSAGES]
+            self.writer.write(json.dumps(batch, separators=(",", ":")).encode() + b"\n")
+            self.batches += 1
+            self.messages += len(batch)
+
+    @property
+    def depth(self) -> int:
+        """아직 소켓에 쓰지 않은 메시지 수"""
+        return len(self.queue)
+
+    @property
+    def buffered_bytes(self) -> int:
+        transport = self.writer.transport
+        return transport.get_write_buffer_size() if transport else 0
+
+
+class EventRelayClient:
+    """워커 프로세스 쪽 릴레이 클라이언트입니다.
+
+    publish/subscribe는 즉시 반환하고, 같은 루프 반복에서 쌓인 메시지는
+    한 번의 write로 허브에 전송됩니다. 연결이 끊기면 재연결 후 구독을 복구합니다.
+    """
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.on_message: Optional[Callable[[str, object], None]] = None
+        self._channels: Set[str] = set()
+        self._batch: Optional[_BatchWriter] = None
+        self._task = None
+        self._running = False
+        self._connected = asyncio.Event()
+        self._stats_requests: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count()
+        self.channel_stats: Dict[str, ChannelStats] = {}
+        self.dropped = 0
+        self.reconnects = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._batch is not None
+
+    async def start(self):
+        """허브 연결 태스크를 시작하고 첫 연결을 기다립니다."""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning(f"Event relay hub not reachable at {self.socket_path}, retrying in background")
+
+    async def stop(self):
+        """허브 연결을 종료합니다."""
+        self._running = False
+        if self._batch is not None:
+            self._batch.flush()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self, channel: str):
+        self._channels.add(channel)
+        if self._batch is not None:
+            self._batch.send(["sub", channel])
+
+    def unsubscribe(self, channel: str):
+        self._channels.discard(channel)
+        if self._batch is not None:
+            self._batch.send(["unsub", channel])
+
+    def publish(self, channel: str, payload) -> bool:
+        """다른 워커의 구독자에게 메시지를 보냅니다. 연결이 없으면 버립니다."""
+        if self._batch is None:
+            self.dropped += 1
+            return False
+        self._batch.send(["pub", channel, payload])
+        self._stats(channel).record(messages_out=1)
+        return True
+
+    async def hub_stats(self, timeout: float = 1.0) -> Optional[dict]:
+        """허브의 채널/피어 통계를 조회합니다."""
+        if self._batch is None:
+            return None
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._stats_requests[request_id] = future
+        self._batch.send(["stats", request_id])
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._stats_requests.pop(request_id, None)
+
+    def get_status(self) -> dict:
+        batch = self._batch
+        return {
+            "connected": self.connected,
+            "subscribed_channels": len(self._channels),
+            "queue_depth": batch.depth if batch else 0,
+            "buffered_bytes": batch.buffered_bytes if batch else 0,
+            "batches_sent": batch.batches if batch else 0,
+            "messages_sent": batch.messages if batch else 0,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+            "channels": {kind: stats.as_dict() for kind, stats in self.channel_stats.items()},
+        }
+
+    def _stats(self, channel: str) -> ChannelStats:
+        kind = channel_kind(channel)
+        stats = self.channel_stats.get(kind)
+        if stats is None:
+            stats = self.channel_stats[kind] = ChannelStats()
+        return stats
+
+    async def _run(self):
+        delay = 0.1
+        while self._running:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=STREAM_LIMIT)
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                continue
+
+            delay = 0.1
+            self._batch = _BatchWriter(writer)
+            for channel in self._channels:
+                self._batch.send(["sub", channel])
+            self._connected.set()
+            try:
+                await self._read_loop(reader)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event relay connection error: {e}")
+            finally:
+                self._batch = None
+                self._connected.clear()
+                writer.close()
+            if self._running:
+                self.reconnects += 1
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            for message in json.loads(line):
+                op = message[0]
+                if op == "msg":
+                    _, channel, payload = message
+                    self._stats(channel).record(messages_in=1)
+                    if self.on_message is not None:
+                        try:
+                            self.on_message(channel, payload)
+                        except Exception as e:
+                            logger.error(f"Event relay handler error: {e}")
+                elif op == "stats":
+                    future = self._stats_requests.get(message[1])
+                    if future is not None and not future.done():
+                        future.set_result(message[2])
+
+
+class EventRelayHub:
+    """워커들 사이에서 채널 메시지를 중계하는 허브 데몬입니다.
+
+    채널을 구독한 피어에게만 전달하며, 보낸 피어에게는 되돌려 보내지 않습니다.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[_BatchWriter]] = {}
+        self._peers: Dict[_BatchWriter, Set[str]] = {}
+        self.channel_stats: Dict[str, ChannelStats] = {}
+
+    async def handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = _BatchWriter(writer)
+        self._peers[peer] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for message in json.loads(line):
+                    self._dispatch(peer, message)
+                # 느린 피어 때문에 허브 메모리가 무한정 늘지 않도록
+                if peer.buffered_bytes > 1 << 20:
+                    await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Relay peer error: {e}")
+        finally:
+            for channel in self._peers.pop(peer, ()):
+                self._remove_subscriber(channel, peer)
+            writer.close()
+
+    def _dispatch(self, peer: _BatchWriter, message: list):
+        op = message[0]
+        if op == "pub":
+            _, channel, payload = message
+            targets = self._subscribers.get(channel, ())
+            forwarded = 0
+            for target in targets:
+                if target is not peer:
+                    target.send(["msg", channel, payload])
+                    forwarded += 1
+            self._stats(channel).record(messages_in=1, messages_out=forwarded)
+        elif op == "sub":
+            channel = message[1]
+            self._subscribers.setdefault(channel, set()).add(peer)
+            self._peers[peer].add(channel)
+        elif op == "unsub":
+            channel = message[1]
+            self._peers[peer].discard(channel)
+            self._remove_subscriber(channel, peer)
+        elif op == "stats":
+            peer.send(["stats", message[1], self.get_status()])
+
+    def _remove_subscriber(self, channel: str, peer: _BatchWriter):
+        subscribers = self._subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(peer)
+            if not subscribers:
+                del self._subscribers[channel]
+
+    def _stats(self, channel: str) -> ChannelStats:
+        kind = channel_kind(channel)
+        stats = self.channel_stats.get(kind)
+        if stats is None:
+            stats = self.channel_stats[kind] = ChannelStats()
+        return stats
+
+    def get_status(self) -> dict:
+        return {
+            "peers": len(self._peers),
+            "channels": len(self._subscribers),
+            "peer_queue_depths": [peer.depth for peer in self._peers],
+            "peer_buffered_bytes": [peer.buffered_bytes for peer in self._peers],
+            "throughput": {kind: stats.as_dict() for kind, stats in self.channel_stats.items()},
+        }
+
+
+async def serve_event_relay(socket_path: str):
+    """이벤트 릴레이 허브 데몬을 실행합니다."""
+    hub = EventRelayHub()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(hub.handle_peer, path=socket_path, limit=STREAM_LIMIT)
+    logger.info(f"Event relay hub listening on {socket_path}")
+    async with server:
+        await server.serve_forever()
+
+
+def create_event_relay() -> Optional[EventRelayClient]:
+    """환경 변수에 따라 릴레이 클라이언트를 만듭니다."""
+    if EVENT_RELAY_SOCKET:
+        return EventRelayClient(EVENT_RELAY_SOCKET)
+    return None
+
+
+if __name__ == "__main__":
+    # python -m app.event_relay --socket /tmp/subtree-events.sock
+    parser = argparse.ArgumentParser(description="Event relay hub shared by uvicorn workers")
+    parser.add_argument("--socket", default=EVENT_RELAY_SOCKET or "/tmp/subtree-events.sock")
+    options = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve_event_relay(options.socket))
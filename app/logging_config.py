@@ -0,0 +1,258 @@
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from collections import deque
+from typing import Dict, Optional
+
+# 로깅 설정 (모두 환경 변수)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# SQLAlchemy echo: 모든 SQL을 로깅하므로 개발용으로만 켠다
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+# 이 시간(ms) 이상 걸린 SQL만 느린 쿼리 로그에 남긴다 (0이면 끔)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# 카테고리(로거 이름 prefix)별 INFO 이하 레코드 샘플링 비율 "app.background_tasks=0.1,..."
+# 로거 이름에 맞는 prefix가 여러 개면 가장 긴 것을 쓴다 (app.routers.stream이 app.routers보다 우선)
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+# 카테고리별 INFO 이하 초당 최대 레코드 수 (기본 0 = 제한 없음). WARNING 이상은 제한하지 않는다
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "0"))
+# 로그 큐 크기. 가득 차면 이벤트 루프를 막지 않고 레코드를 버린다
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def _default_category(name: str) -> str:
+    """샘플링 prefix에 걸리지 않는 로거는 이름의 앞 두 단계를 카테고리로 쓴다 (app.background_tasks)"""
+    parts = name.split(".", 2)
+    return ".".join(parts[:2])
+
+
+class _Category:
+    __slots__ = ("rate", "tokens", "updated", "passed", "sampled_out", "rate_limited")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.passed = 0
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+
+class SamplingFilter(logging.Filter):
+    """카테고리별 샘플링과 초당 레코드 수 제한(token bucket)을 적용하는 필터입니다.
+
+    WARNING 이상 레코드는 항상 통과합니다. 호출한 스레드에서 실행되므로
+    버려지는 레코드는 포맷/큐 비용을 치르지 않습니다.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None, rate_limit: float = LOG_RATE_LIMIT):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.rate_limit = rate_limit
+        self.categories: Dict[str, _Category] = {}
+        self._by_logger: Dict[str, _Category] = {}  # 로거 이름 -> 카테고리 (prefix 비교는 로거당 한 번)
+
+    def _resolve(self, logger_name: str) -> str:
+        """로거 이름에 맞는 가장 긴 샘플링 prefix, 없으면 기본 카테고리를 반환합니다."""
+        best = None
+        for prefix in self.sample_rates:
+            if logger_name == prefix or logger_name.startswith(prefix + "."):
+                if best is None or len(prefix) > len(best):
+                    best = prefix
+        return best if best is not None else _default_category(logger_name)
+
+    def _get_category(self, logger_name: str) -> _Category:
+        category = self._by_logger.get(logger_name)
+        if category is None:
+            name = self._resolve(logger_name)
+            category = self.categories.get(name)
+            if category is None:
+                category = self.categories[name] = _Category(self.sample_rates.get(name, 1.0), self.rate_limit)
+            self._by_logger[logger_name] = category
+        return category
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        category = self._get_category(record.name)
+        if record.levelno >= logging.WARNING:
+            category.passed += 1
+            return True
+
+        if category.rate < 1.0 and random.random() >= category.rate:
+            category.sampled_out += 1
+            return False
+
+        if self.rate_limit > 0:
+            now = time.monotonic()
+            category.tokens = min(self.rate_limit, category.tokens + (now - category.updated) * self.rate_limit)
+            category.updated = now
+            if category.tokens < 1.0:
+                category.rate_limited += 1
+                return False
+            category.tokens -= 1.0
+
+        category.passed += 1
+        return True
+
+    def get_status(self) -> dict:
+        return {
+            name: {
+                "sample_rate": category.rate,
+                "passed": category.passed,
+                "sampled_out": category.sampled_out,
+                "rate_limited": category.rate_limited,
+            }
+            for name, category in self.categories.items()
+        }
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 기다리지 않고 레코드를 버리는 QueueHandler"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 인자 치환과 예외 문자열화만 여기서 하고 나머지 포맷은 리스너 스레드에서 한다
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # 큐가 가득 차 있어도 종료 신호는 반드시 넣는다 (리스너가 비우는 동안 대기)
+        self.queue.put(self._sentinel)
+
+
+class SlowQueryLog:
+    """임계값 이상 걸린 SQL만 기록하는 느린 쿼리 로그입니다."""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, keep: int = 50):
+        self.threshold_ms = threshold_ms
+        self.logger = logging.getLogger("app.slow_query")
+        self.recent = deque(maxlen=keep)
+        self.statements = 0
+        self.slow_statements = 0
+        self.max_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def install(self, engine):
+        """엔진(AsyncEngine이면 sync_engine)에 실행 시간 측정 이벤트를 등록합니다."""
+        if not self.enabled:
+            return
+        from sqlalchemy import event
+
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "before_cursor_execute", self._before)
+        event.listen(sync_engine, "after_cursor_execute", self._after)
+
+    # 시작 시각은 문장의 실행 컨텍스트에 둔다. 실패한 문장은 after_cursor_execute가 오지 않지만
+    # 컨텍스트가 문장과 함께 버려지므로 남는 상태가 없다 (연결 단위 스택은 실패 시 새어 나간다)
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_start", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.statements += 1
+        if elapsed_ms < self.threshold_ms:
+            return
+        self.slow_statements += 1
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        statement = " ".join(statement.split())
+        self.recent.append({"statement": statement[:500], "duration_ms": round(elapsed_ms, 2),
+                            "executemany": executemany, "timestamp": time.time()})
+        self.logger.warning(f"Slow query {elapsed_ms:.1f}ms: {statement[:500]}")
+
+    def get_status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "statements": self.statements,
+            "slow_statements": self.slow_statements,
+            "max_ms": round(self.max_ms, 2),
+            "recent": list(self.recent),
+        }
+
+
+class LoggingPipeline:
+    """루트 로거를 큐 기반 핸들러로 바꾸고 백그라운드 스레드에서 출력합니다."""
+
+    def __init__(self):
+        self.filter = SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES), LOG_RATE_LIMIT)
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+
+    def start(self, level: str = LOG_LEVEL):
+        if self.listener is not None:
+            return
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        self.handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        self.handler.addFilter(self.filter)
+        self.listener = _QueueListener(self.handler.queue, output, respect_handler_level=True)
+
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        # SQL echo도 같은 큐로 보낸다. 끈 경우 엔진 로거가 INFO 레코드를 만들지도 않게 한다
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if SQL_ECHO else logging.WARNING)
+        self.listener.start()
+
+    def stop(self):
+        """남은 레코드를 모두 출력하고 스레드를 종료합니다."""
+        if self.listener is None:
+            return
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        self.listener = None
+
+    def get_status(self) -> dict:
+        handler = self.handler
+        return {
+            "running": self.listener is not None,
+            "level": logging.getLevelName(logging.getLogger().level),
+            "sql_echo": SQL_ECHO,
+            "queue_size": handler.queue.qsize() if handler else 0,
+            "queue_capacity": LOG_QUEUE_SIZE,
+            "dropped": handler.dropped if handler else 0,
+            "rate_limit_per_sec": LOG_RATE_LIMIT,
+            "categories": self.filter.get_status(),
+            "slow_queries": slow_query_log.get_status(),
+        }
+
+
+# 전역 인스턴스
+slow_query_log = SlowQueryLog()
+logging_pipeline = LoggingPipeline()
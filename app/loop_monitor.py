@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))  # 초, lag 측정 간격
+LOOP_SLOW_THRESHOLD_MS = float(os.getenv("LOOP_SLOW_THRESHOLD_MS", "100"))  # 이보다 오래 루프를 잡으면 기록
+LOOP_STACK_DEPTH = int(os.getenv("LOOP_STACK_DEPTH", "20"))  # 기록할 스택 프레임 수 (가장 안쪽부터)
+LOOP_LAG_WINDOW = 120  # 통계에 쓰는 최근 lag 샘플 수
+LOOP_SLOW_KEEP = 50  # 보관할 최근 slow callback 기록 수
+
+loop_lag_seconds = metrics.histogram(
+    "event_loop_lag_seconds", "이벤트 루프가 예약된 콜백을 실행하기까지 걸린 시간",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+loop_slow_callbacks_total = metrics.counter(
+    "event_loop_slow_callbacks_total", "임계값보다 오래 이벤트 루프를 잡은 콜백 수")
+
+
+def _coroutine_name(coro) -> str:
+    return getattr(coro, "__qualname__", None) or type(coro).__name__
+
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def _frame(coro):
+    return getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+
+
+def _waiting_at(coro) -> str:
+    """await 체인을 따라가 asyncio 내부를 제외한 가장 안쪽 코루틴과 위치를 반환합니다."""
+    found = coro
+    while coro is not None and hasattr(coro, "__qualname__"):
+        frame = _frame(coro)
+        if frame is not None and not frame.f_code.co_filename.startswith(_ASYNCIO_DIR):
+            found = coro
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) \
+            or getattr(coro, "ag_await", None)
+    frame = _frame(found)
+    if frame is None:
+        return _coroutine_name(found)
+    return f"{_coroutine_name(found)} ({frame.f_code.co_filename}:{frame.f_lineno})"
+
+
+def _task_group_name(task: asyncio.Task) -> str:
+    # anyio 등은 코루틴을 감싸고 태스크 이름에 함수 이름을 넣는다. 기본 이름(Task-N)이면 코루틴 이름
+    name = task.get_name()
+    if name.startswith("Task-"):
+        return _coroutine_name(task.get_coro())
+    return name
+
+
+def _format_stack(frame, depth: int) -> List[str]:
+    entries = traceback.extract_stack(frame)[-depth:]
+    return [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in reversed(entries)]
+
+
+class LoopMonitor:
+    """이벤트 루프 지연(lag)과 루프를 오래 잡은 콜백을 감시합니다.
+
+    별도 스레드가 interval마다 call_soon_threadsafe로 heartbeat를 예약하고, 실행되기까지
+    걸린 시간을 lag로 기록합니다. threshold 안에 실행되지 않으면 그 시점 루프 스레드의
+    스택과 실행 중인 태스크를 잡아 두었다가, 루프가 풀리면 걸린 시간과 함께 기록합니다.
+    루프 쪽 비용은 interval마다 콜백 하나입니다 (asyncio debug 모드와 달리 모든 콜백을 재지 않음).
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold_ms: float = LOOP_SLOW_THRESHOLD_MS,
+                 stack_depth: int = LOOP_STACK_DEPTH, enabled: bool = LOOP_MONITOR_ENABLED):
+        self.enabled = enabled
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        self.stack_depth = stack_depth
+        self.lags = deque(maxlen=LOOP_LAG_WINDOW)
+        self.max_lag = 0.0
+        self.samples = 0
+        self.slow_callbacks = 0
+        self.recent_slow = deque(maxlen=LOOP_SLOW_KEEP)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._beat = threading.Event()
+        self._stall: Optional[dict] = None  # 스레드가 잡은 스택, 루프 쪽 heartbeat가 마무리한다
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._beat.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _heartbeat(self, sent: float):
+        # 루프 스레드에서 실행된다
+        lag = time.perf_counter() - sent
+        self.lags.append(lag)
+        self.samples += 1
+        if lag > self.max_lag:
+            self.max_lag = lag
+        loop_lag_seconds.observe(lag)
+        stall, self._stall = self._stall, None
+        if stall is not None:
+            stall["duration_ms"] = round(lag * 1000, 2)
+            self.recent_slow.append(stall)
+            self.slow_callbacks += 1
+            loop_slow_callbacks_total.inc()
+            logger.warning(f"Event loop blocked {lag * 1000:.0f}ms in {stall['task'] or 'callback'} "
+                           f"at {stall['stack'][0] if stall['stack'] else '?'}")
+        self._beat.set()
+
+    def _capture(self) -> dict:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        task = asyncio.current_task(self._loop)
+        return {
+            "timestamp": time.time(),
+            "duration_ms": None,
+            "task": task.get_name() if task is not None else None,
+            "coroutine": _coroutine_name(task.get_coro()) if task is not None else None,
+            "stack": _format_stack(frame, self.stack_depth) if frame is not None else [],
+        }
+
+    def _watch(self):
+        while not self._stop.is_set():
+            self._beat.clear()
+            try:
+                self._loop.call_soon_threadsafe(self._heartbeat, time.perf_counter())
+            except RuntimeError:
+                return  # 루프가 닫힘
+            if not self._beat.wait(self.threshold):
+                # 루프가 threshold 넘게 응답하지 않는다: 지금 루프를 잡고 있는 코드를 기록
+                stall = self._capture()
+                if not self._beat.is_set():  # 캡처하는 사이 풀렸으면 버린다
+                    self._stall = stall
+                self._beat.wait()
+            self._stop.wait(self.interval)
+
+    def get_status(self) -> dict:
+        lags = sorted(self.lags)
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "interval": self.interval,
+            "threshold_ms": self.threshold * 1000,
+            "samples": self.samples,
+            "lag_ms": round(self.lags[-1] * 1000, 3) if lags else 0.0,
+            "lag_avg_ms": round(sum(lags) / len(lags) * 1000, 3) if lags else 0.0,
+            "lag_p99_ms": round(lags[min(int(len(lags) * 0.99), len(lags) - 1)] * 1000, 3) if lags else 0.0,
+            "lag_max_ms": round(self.max_lag * 1000, 3),
+            "slow_callbacks": self.slow_callbacks,
+            "recent_slow": list(reversed(self.recent_slow)),
+        }
+
+
+def task_snapshot(detail: bool = False, limit: int = 50) -> dict:
+    """살아 있는 asyncio 태스크를 코루틴 이름(이름을 붙인 태스크는 태스크 이름)별로 묶어 반환합니다.
+
+    detail이면 각 태스크가 멈춰 있는 가장 안쪽 코루틴(asyncio 내부 제외)도 집계합니다.
+    요청 핸들러 태스크가 어디서 기다리는지 보려면 detail을 사용하세요.
+    """
+    groups: Dict[str, dict] = {}
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        name = _task_group_name(task)
+        group = groups.get(name)
+        if group is None:
+            group = groups[name] = {"coroutine": name, "count": 0, "waiting_at": Counter()}
+        group["count"] += 1
+        if detail:
+            group["waiting_at"][_waiting_at(task.get_coro())] += 1
+    ordered = sorted(groups.values(), key=lambda group: group["count"], reverse=True)[:limit]
+    for group in ordered:
+        group["waiting_at"] = dict(group["waiting_at"].most_common(5))
+    return {"total": len(tasks), "groups": len(groups), "by_coroutine": ordered}
+
+
+# 전역 이벤트 루프 모니터
+loop_monitor = LoopMonitor()
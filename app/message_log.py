@@ -0,0 +1,110 @@
+import os
+from collections import deque
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import UserMessage
+from .sse import encode_event
+from .write_behind import message_write_buffer
+
+MESSAGE_LOG_SIZE = int(os.getenv("MESSAGE_LOG_SIZE", "64"))  # 세션별로 메모리에 보관할 최근 프레임 수
+MESSAGE_REPLAY_MAX = int(os.getenv("MESSAGE_REPLAY_MAX", "1000"))  # 재연결 시 다시 보낼 최대 메시지 수
+
+
+class MessageLog:
+    """세션 스트림 재연결(Last-Event-ID) 시 놓친 메시지를 다시 보내기 위한 로그입니다.
+
+    최근 프레임은 세션별 고정 크기 링 버퍼에서 인코딩된 bytes 그대로 꺼내고,
+    링 버퍼보다 오래된 구간만 user_messages의 (session_id, message_counter) 인덱스로
+    범위 조회합니다.
+    """
+
+    def __init__(self, size: int = MESSAGE_LOG_SIZE, replay_max: int = MESSAGE_REPLAY_MAX):
+        self.size = size
+        self.replay_max = replay_max
+        self._frames: Dict[str, deque] = {}  # session_id -> deque[(counter, frame)]
+        # 통계
+        self.resumes = 0
+        self.replayed_from_memory = 0
+        self.replayed_from_db = 0
+        self.db_queries = 0
+        self.truncated = 0
+
+    def append(self, session_id: str, counter: int, frame: bytes):
+        if self.size <= 0:
+            return
+        frames = self._frames.get(session_id)
+        if frames is None:
+            frames = self._frames[session_id] = deque(maxlen=self.size)
+        frames.append((counter, frame))
+
+    def discard(self, session_id: str):
+        self._frames.pop(session_id, None)
+
+    async def replay(self, db: AsyncSession, session_id: str, last_id: int,
+                     latest: int, username: Optional[str]) -> List[bytes]:
+        """last_id 이후부터 latest까지의 메시지 프레임을 순서대로 반환합니다."""
+        self.resumes += 1
+        start = last_id
+        if latest - start > self.replay_max:
+            # 너무 오래 끊겨 있었으면 최근 replay_max개만 보낸다
+            start = latest - self.replay_max
+            self.truncated += 1
+        if start >= latest:
+            return []
+
+        memory = [(counter, frame) for counter, frame in self._frames.get(session_id, ()) if counter > start]
+        oldest_in_memory = memory[0][0] if memory else latest + 1
+        frames = []
+        if oldest_in_memory > start + 1:
+            frames = await self._load(db, session_id, start, oldest_in_memory, username)
+        frames.extend(frame for _, frame in memory)
+        self.replayed_from_memory += len(memory)
+        return frames
+
+    async def _load(self, db: AsyncSession, session_id: str, after: int, before: int,
+                    username: Optional[str]) -> List[bytes]:
+        if message_write_buffer.enabled:
+            # 아직 버퍼에 있는 메시지도 조회되도록 먼저 저장한다
+            await message_write_buffer.flush()
+        self.db_queries += 1
+        result = await db.execute(
+            select(UserMessage.message_counter, UserMessage.message_content, UserMessage.created_at)
+            .where(UserMessage.session_id == session_id,
+                   UserMessage.message_counter > after,
+                   UserMessage.message_counter < before)
+            .order_by(UserMessage.message_counter)
+            .limit(self.replay_max)
+        )
+        frames = [
+            encode_event({
+                "type": "message",
+                "timestamp": created_at.timestamp() if created_at else None,
+                "session_id": session_id,
+                "username": username or "Anonymous",
+                "counter": counter,
+                "message": content,
+                "replayed": True,
+            }, id=counter)
+            for counter, content, created_at in result
+        ]
+        self.replayed_from_db += len(frames)
+        return frames
+
+    def get_status(self) -> dict:
+        return {
+            "size": self.size,
+            "replay_max": self.replay_max,
+            "sessions": len(self._frames),
+            "resumes": self.resumes,
+            "replayed_from_memory": self.replayed_from_memory,
+            "replayed_from_db": self.replayed_from_db,
+            "db_queries": self.db_queries,
+            "truncated": self.truncated,
+        }
+
+
+# 전역 메시지 로그 인스턴스
+message_log = MessageLog()
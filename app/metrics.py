@@ -0,0 +1,228 @@
+import inspect
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# /metrics 엔드포인트와 요청 지연 측정 미들웨어 사용 여부
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# SSE 쓰기처럼 호출이 많은 경로는 N번에 한 번만 시간을 잰다 (카운터는 항상 센다)
+METRICS_SAMPLE_EVERY = max(int(os.getenv("METRICS_SAMPLE_EVERY", "16")), 1)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """단조 증가 카운터입니다. 라벨 값 튜플별로 값을 보관합니다."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in self._values.items()]
+
+
+class Histogram:
+    """고정 bucket 히스토그램입니다.
+
+    observe()는 bucket 하나와 합계만 갱신하고, 누적 bucket 값은 출력할 때 계산합니다.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, list] = {}  # 라벨 -> [bucket별 수..., +Inf 수, 합계]
+
+    def observe(self, value: float, labels: Labels = ()):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> List[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Callback:
+    """조회 시점에 값을 읽어 오는 gauge/counter입니다.
+
+    func는 숫자나 {라벨 값 튜플: 숫자} dict를 반환하며, async 함수여도 됩니다.
+    다른 모듈이 이미 세고 있는 값을 핫 경로에 코드를 더하지 않고 내보낼 때 사용합니다.
+    """
+
+    def __init__(self, type: str, name: str, documentation: str, func: Callable, labelnames: Labels = ()):
+        self.type = type
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.labelnames = labelnames
+        self._values: Dict[Labels, float] = {}
+
+    async def refresh(self):
+        result = self.func()
+        if inspect.isawaitable(result):
+            result = await result
+        self._values = result if isinstance(result, dict) else {(): result}
+
+    def collect(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in self._values.items()]
+
+
+class MetricsRegistry:
+    """프로세스 내 지표를 모아 Prometheus 텍스트 형식으로 출력합니다.
+
+    값은 워커 프로세스별입니다. 워커가 여러 개면 각 워커를 따로 수집해야 합니다.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics: Dict[str, object] = {}
+        self.pool_waiting = 0
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Labels = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Labels = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, func: Callable, labelnames: Labels = ()) -> Callback:
+        return self._register(Callback("gauge", name, documentation, func, labelnames))
+
+    def counter_callback(self, name: str, documentation: str, func: Callable, labelnames: Labels = ()) -> Callback:
+        return self._register(Callback("counter", name, documentation, func, labelnames))
+
+    def install(self, engine):
+        """엔진 커넥션 풀의 checkout 대기 시간과 대기 중인 요청 수를 측정합니다."""
+        from sqlalchemy import event
+
+        sync_engine = getattr(engine, "sync_engine", engine)
+
+        def wrap(pool):
+            connect = pool.connect
+
+            def timed_connect():
+                self.pool_waiting += 1
+                started = time.perf_counter()
+                try:
+                    return connect()
+                finally:
+                    self.pool_waiting -= 1
+                    db_pool_checkout_seconds.observe(time.perf_counter() - started)
+
+            pool.connect = timed_connect
+
+        wrap(sync_engine.pool)
+        # dispose()는 풀을 새로 만든다
+        event.listen(sync_engine, "engine_disposed", lambda disposed: wrap(disposed.pool))
+
+        def checked_out():
+            checkedout = getattr(sync_engine.pool, "checkedout", None)
+            return checkedout() if checkedout is not None else 0
+
+        self.gauge_callback("db_pool_checkout_waiting", "커넥션 풀 checkout을 기다리는 요청 수",
+                            lambda: self.pool_waiting)
+        self.gauge_callback("db_pool_checked_out", "사용 중인 DB 커넥션 수", checked_out)
+
+    async def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            if isinstance(metric, Callback):
+                await metric.refresh()
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """라우트별 요청 수와 응답 시작까지의 지연 시간을 기록하는 ASGI 미들웨어입니다.
+
+    라우트 라벨은 경로 템플릿(/stream/{session_id})을 사용합니다. SSE 같은 스트리밍
+    응답은 응답 헤더를 보낼 때까지의 시간만 잽니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                labels = (scope["method"], route)
+                http_request_seconds.observe(time.perf_counter() - started, labels)
+                http_requests_total.inc(labels + (str(message["status"]),))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# 전역 지표 레지스트리
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "라우트별 요청 처리 시간 (스트리밍 응답은 응답 시작까지)", ("method", "route"))
+http_requests_total = metrics.counter(
+    "http_requests_total", "라우트/상태 코드별 요청 수", ("method", "route", "status"))
+db_commit_seconds = metrics.histogram(
+    "db_commit_duration_seconds", "작업별 DB commit 시간", ("operation",))
+db_pool_checkout_seconds = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "DB 커넥션 풀 checkout 대기 시간")
+sse_send_seconds = metrics.histogram(
+    "sse_send_duration_seconds", f"SSE 청크 소켓 쓰기 시간 (스트림별 {METRICS_SAMPLE_EVERY}번에 한 번 샘플링)")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -38,6 +38,10 @@ class UserSession(Base):
 
 class UserMessage(Base):
     __tablename__ = "user_messages"
+    __table_args__ = (
+        # Last-Event-ID 재전송 시 세션의 counter 범위 조회용
+        Index("ix_user_messages_session_counter", "session_id", "message_counter"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String(255), ForeignKey("user_sessions.session_id"), nullable=False)
@@ -0,0 +1,210 @@
+import asyncio
+import os
+import secrets
+import time
+from typing import AsyncGenerator, Dict, Iterable, List, Optional, Tuple
+
+from .broadcast import Subscription
+from .database import AsyncSessionLocal
+from .deadline_scheduler import DeadlineScheduler
+from .session_events import session_event_hub
+from .session_frames import SessionFrames, STREAM_ENDING_EVENTS, create_messages
+from .session_manager import session_manager
+from .sse import encode_event
+
+MULTIPLEX_MAX_SESSIONS = int(os.getenv("MULTIPLEX_MAX_SESSIONS", "1000"))  # 다중화 스트림 하나의 최대 세션 수
+MULTIPLEX_MESSAGE_INTERVAL = 2.0  # 세션별 메시지 간격 (초), /stream/{session_id}와 같음
+MULTIPLEX_TICK_BATCH = 100  # 이벤트를 확인하기 전에 만드는 최대 메시지 수 (한 청크, DB commit은 활동/메시지 한 번씩)
+
+# 구독 변경 요청은 세션 이벤트 허브의 이 채널로 전달된다 (릴레이가 있으면 다른 워커에서도)
+_CONTROL_PREFIX = "multiplex:"
+_UPDATE = "multiplex_update"
+
+
+def control_channel(stream_id: str) -> str:
+    return _CONTROL_PREFIX + stream_id
+
+
+class MultiplexStream:
+    """연결 하나로 여러 세션의 이벤트를 보내는 SSE 스트림입니다.
+
+    세션마다 제너레이터와 소켓을 두는 대신, 모든 세션의 이벤트를 Subscription 하나로 받고
+    세션별 메시지 tick은 DeadlineScheduler 하나로 관리합니다. 같은 시점에 생긴 프레임은
+    묶어서 한 번에 씁니다. 모든 프레임의 data에 session_id가 들어갑니다.
+
+    구독 세션은 session_event_hub의 control_channel(id)로 보낸 multiplex_update 이벤트로
+    바꾸며, 상태 변경은 제너레이터 안에서만 일어납니다.
+    """
+
+    def __init__(self, session_ids: Iterable[str], max_sessions: int = MULTIPLEX_MAX_SESSIONS,
+                 interval: float = MULTIPLEX_MESSAGE_INTERVAL):
+        self.id = secrets.token_urlsafe(12)
+        self.max_sessions = max_sessions
+        self.interval = interval
+        self.initial = list(dict.fromkeys(session_ids))
+        self.events = Subscription()
+        # 다중화 스트림의 프레임에는 id를 붙이지 않는다 (Last-Event-ID는 세션 하나만 가리킬 수 있음)
+        self.sessions: Dict[str, SessionFrames] = {}
+        self._ticks = DeadlineScheduler()
+        self.messages = 0
+
+    async def _add(self, session_ids: Iterable[str]) -> Tuple[List[str], List[str], List[bytes]]:
+        added, rejected, frames = [], [], []
+        now = time.monotonic()
+        for session_id in session_ids:
+            if session_id in self.sessions:
+                continue
+            if len(self.sessions) >= self.max_sessions:
+                rejected.append(session_id)
+                continue
+            session = await session_manager.get_session(session_id)
+            if not session:
+                rejected.append(session_id)
+                continue
+            session_frames = self.sessions[session_id] = SessionFrames(session_id, message_ids=False)
+            session_event_hub.subscribe(session_id, self.events)
+            self._ticks.schedule(session_id, now)
+            added.append(session_id)
+            if session.get("ping_pending", False):
+                frames.append(session_frames.ping())
+        return added, rejected, frames
+
+    def _remove(self, session_id: str) -> bool:
+        if self.sessions.pop(session_id, None) is None:
+            return False
+        session_event_hub.unsubscribe(session_id, self.events)
+        self._ticks.cancel(session_id)
+        return True
+
+    def _control_frame(self, event_type: str, **fields) -> bytes:
+        return encode_event({"type": event_type, "timestamp": time.time(), "session_id": None,
+                             "stream_id": self.id, "sessions": len(self.sessions), **fields})
+
+    async def _messages(self, db, session_ids: List[str]) -> List[bytes]:
+        """tick이 된 세션들의 메시지 프레임을 만듭니다.
+
+        세션마다 commit하지 않고 배치 전체의 활동 시간 UPDATE와 메시지 INSERT를 한 번씩 합니다
+        (write-behind / 활동 flusher가 켜져 있으면 그쪽 버퍼로 보냅니다).
+        """
+        frames, live = [], []
+        for session_id in session_ids:
+            session = await session_manager.get_session(session_id)
+            if not session:
+                frames.append(self.sessions[session_id].disconnected())
+                self._remove(session_id)
+            else:
+                live.append((session_id, session))
+        if not live:
+            return frames
+        await session_manager.update_sessions_activity(db, [session_id for session_id, _ in live])
+        messages = await create_messages(db, live)
+        for session_id, counter, payload in messages:
+            frames.append(self.sessions[session_id].message(counter, payload))
+        self.messages += len(messages)
+        return frames
+
+    async def _handle(self, session_id: str, event_type: str, data: Optional[dict]) -> List[bytes]:
+        if session_id == control_channel(self.id):
+            if event_type != _UPDATE:
+                return []
+            removed = [sid for sid in (data or {}).get("remove", ()) if self._remove(sid)]
+            added, rejected, frames = await self._add((data or {}).get("add", ()))
+            return [self._control_frame("multiplex_updated", added=added, removed=removed, rejected=rejected)] + frames
+        session_frames = self.sessions.get(session_id)
+        if session_frames is None:
+            return []  # 구독 해제 전에 들어온 이벤트
+        if event_type in STREAM_ENDING_EVENTS:
+            # 그 세션만 구독에서 빼고 스트림은 계속 연다
+            self._remove(session_id)
+        return [session_frames.event(event_type, data)]
+
+    async def frames(self) -> AsyncGenerator[bytes, None]:
+        """스트림 전체의 SSE 프레임을 만듭니다. 같은 시점의 프레임은 한 청크로 묶습니다."""
+        control = control_channel(self.id)
+        session_event_hub.subscribe(control, self.events)
+        multiplex_registry.open(self)
+        db = AsyncSessionLocal()
+        try:
+            added, rejected, frames = await self._add(self.initial)
+            yield b"".join([self._control_frame("multiplex_open", added=added, rejected=rejected,
+                                                max_sessions=self.max_sessions)] + frames)
+
+            while True:
+                # tick이 된 세션들의 메시지를 한 청크로 묶는다 (같이 추가된 세션은 tick도 같이 돈다)
+                now = time.monotonic()
+                due = [session_id for session_id, _ in self._ticks.pop_due(now, limit=MULTIPLEX_TICK_BATCH)
+                       if session_id in self.sessions]
+                if due:
+                    frames = await self._messages(db, due)
+                    for session_id in due:
+                        if session_id in self.sessions:
+                            self._ticks.schedule(session_id, now + self.interval)
+                    yield b"".join(frames)
+
+                next_deadline = self._ticks.next_deadline()
+                if next_deadline is not None and next_deadline <= time.monotonic():
+                    # tick이 밀려 있어도 구독 변경과 세션 이벤트는 배치 사이마다 처리한다
+                    # (timeout=0인 wait_for는 큐에 항목이 있어도 TimeoutError를 낸다)
+                    pending = self.events.get_nowait()
+                else:
+                    try:
+                        pending = await asyncio.wait_for(
+                            self.events.get_many(),
+                            timeout=None if next_deadline is None else next_deadline - time.monotonic()
+                        )
+                    except asyncio.TimeoutError:
+                        continue
+                    if pending is None:
+                        return
+
+                frames = []
+                for session_id, event_type, data in pending:
+                    frames.extend(await self._handle(session_id, event_type, data))
+                if frames:
+                    yield b"".join(frames)
+        except Exception as e:
+            yield self._control_frame("error", message=f"Stream error: {str(e)}")
+        finally:
+            for session_id in list(self.sessions):
+                self._remove(session_id)
+            session_event_hub.unsubscribe(control, self.events)
+            multiplex_registry.close(self)
+            await db.close()
+
+
+class MultiplexRegistry:
+    """프로세스에 열린 다중화 스트림 목록입니다."""
+
+    def __init__(self):
+        self._streams: Dict[str, MultiplexStream] = {}
+        self.opened = 0
+
+    def open(self, stream: MultiplexStream):
+        self._streams[stream.id] = stream
+        self.opened += 1
+
+    def close(self, stream: MultiplexStream):
+        self._streams.pop(stream.id, None)
+
+    def session_count(self) -> int:
+        return sum(len(stream.sessions) for stream in self._streams.values())
+
+    def get_status(self) -> dict:
+        sizes = [len(stream.sessions) for stream in self._streams.values()]
+        return {
+            "open": len(sizes),
+            "opened": self.opened,
+            "sessions": sum(sizes),
+            "max_sessions_per_stream": max(sizes, default=0),
+            "session_limit": MULTIPLEX_MAX_SESSIONS,
+            "messages": sum(stream.messages for stream in self._streams.values()),
+        }
+
+
+def request_update(stream_id: str, add: List[str], remove: List[str]) -> int:
+    """다중화 스트림에 구독 변경을 요청하고, 이 워커에서 전달된 스트림 수를 반환합니다."""
+    return session_event_hub.publish(control_channel(stream_id), _UPDATE, {"add": add, "remove": remove})
+
+
+# 전역 다중화 스트림 레지스트리
+multiplex_registry = MultiplexRegistry()
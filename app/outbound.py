@@ -0,0 +1,258 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import List, Optional, Set
+
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+
+SSE_QUEUE_MAX_FRAMES = int(os.getenv("SSE_QUEUE_MAX_FRAMES", "256"))  # 구독자별 전송 대기 최대 청크 수
+SSE_QUEUE_MAX_BYTES = int(os.getenv("SSE_QUEUE_MAX_BYTES", str(256 * 1024)))  # 구독자별 전송 대기 최대 바이트
+SSE_BUFFER_MAX_BYTES = int(os.getenv("SSE_BUFFER_MAX_BYTES", str(64 * 1024 * 1024)))  # 프로세스 전체 최대 바이트
+# 세션별 스트림(SSE, WebSocket)의 기본 정책. 메시지 프레임에 id가 있으므로 기본값은 disconnect:
+# 클라이언트가 Last-Event-ID로 재연결해 놓친 메시지를 받는다. drop_oldest/coalesce는 id에 빈틈을 남긴다
+SSE_OVERFLOW_POLICY = os.getenv("SSE_OVERFLOW_POLICY", DISCONNECT)
+
+if SSE_OVERFLOW_POLICY not in OVERFLOW_POLICIES:
+    raise ValueError(f"SSE_OVERFLOW_POLICY must be one of {OVERFLOW_POLICIES}, got {SSE_OVERFLOW_POLICY!r}")
+
+
+class ControlFrame(bytes):
+    """overflow 정책으로 버리지 않는 제어 프레임입니다 (ping_required, session_disconnected 등).
+
+    drop_oldest / coalesce가 큐를 줄일 때 건너뛰며, 한도를 넘어도 큐에 넣습니다.
+    제어 프레임은 작고 드물어 한도를 크게 넘지 않습니다.
+    """
+
+    __slots__ = ()
+
+
+class BufferBudget:
+    """프로세스 전체 SSE 전송 대기 바이트 한도입니다.
+
+    한도가 차면 공정 몫(max_bytes / 큐 수)보다 많이 쌓인 큐만 각자의 overflow 정책으로
+    공정 몫까지 줄입니다. 밀리지 않은 구독자는 느린 구독자 때문에 프레임을 잃지 않습니다.
+    """
+
+    def __init__(self, max_bytes: int = SSE_BUFFER_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.peak = 0
+        self.rejections = 0
+        self.sheds = 0
+        self._queues: Set["OutboundQueue"] = set()
+
+    def attach(self, queue: "OutboundQueue"):
+        self._queues.add(queue)
+
+    def detach(self, queue: "OutboundQueue"):
+        self._queues.discard(queue)
+
+    def fair_share(self) -> float:
+        return self.max_bytes / max(len(self._queues), 1)
+
+    def reserve(self, size: int, queue: "OutboundQueue", force: bool = False) -> bool:
+        """size 바이트를 예약합니다. force면 한도를 넘어도 예약합니다 (제어 프레임)."""
+        if self.used + size > self.max_bytes and not force:
+            fair = self.fair_share()
+            if queue.queued_bytes + size > fair:
+                # 이 큐가 공정 몫을 넘었으면 스스로 정책을 적용해야 한다
+                self.rejections += 1
+                return False
+            # 공정 몫보다 많이 쌓인 큐들을 한 번에 공정 몫까지 줄인다
+            for other in list(self._queues):
+                if other is not queue and other.queued_bytes > fair:
+                    other.shed_to(fair)
+                    self.sheds += 1
+            if self.used + size > self.max_bytes:
+                self.rejections += 1
+                return False
+        self.used += size
+        if self.used > self.peak:
+            self.peak = self.used
+        return True
+
+    def release(self, size: int):
+        self.used -= size
+
+    def get_status(self) -> dict:
+        return {"max_bytes": self.max_bytes, "used": self.used, "peak": self.peak,
+                "rejections": self.rejections, "sheds": self.sheds}
+
+
+class OutboundQueue:
+    """SSE 구독자 하나의 전송 대기 큐입니다.
+
+    프레임 생성과 소켓 쓰기를 분리해, 느린 클라이언트 때문에 생성 쪽이 막히거나
+    버퍼가 끝없이 커지지 않게 합니다. 큐가 max_frames / max_bytes 또는 프로세스
+    한도(budget)를 넘으면 overflow 정책을 적용합니다.
+
+    - drop_oldest: 가장 오래된 청크부터 버립니다.
+    - coalesce: 대기 중인 청크를 모두 버리고 최신 청크만 남깁니다 (최신 상태만 의미 있는 스트림).
+    - disconnect: put()이 False를 반환하고, 호출 측이 연결을 끊습니다.
+
+    ControlFrame은 drop_oldest / coalesce에서도 버리지 않습니다.
+
+    다 쓴 큐는 discard()로 프로세스 한도에서 빼야 합니다.
+    """
+
+    __slots__ = ("policy", "max_frames", "max_bytes", "budget", "_items", "_bytes", "_waiter", "closed",
+                 "overflowed", "dropped", "coalesced", "max_lag")
+
+    def __init__(self, policy: str = SSE_OVERFLOW_POLICY, max_frames: int = SSE_QUEUE_MAX_FRAMES,
+                 max_bytes: int = SSE_QUEUE_MAX_BYTES, budget: Optional[BufferBudget] = None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}")
+        self.policy = policy
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.budget = budget if budget is not None else buffer_budget
+        self._items: deque = deque()  # (chunk, enqueued_at, control)
+        self._bytes = 0
+        self._waiter: Optional[asyncio.Future] = None
+        self.closed = False
+        self.overflowed = False  # disconnect 정책에서 한도를 넘음
+        self.budget.attach(self)
+        # 통계
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_lag = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def queued_bytes(self) -> int:
+        return self._bytes
+
+    def lag(self, now: Optional[float] = None) -> float:
+        """가장 오래 기다린 청크의 대기 시간 (초)"""
+        if not self._items:
+            return 0.0
+        return (now if now is not None else time.monotonic()) - self._items[0][1]
+
+    def _admit(self, size: int) -> bool:
+        """구독자 한도와 프로세스 한도 안에 들어가면 바이트를 예약합니다."""
+        return (len(self._items) < self.max_frames and self._bytes + size <= self.max_bytes
+                and self.budget.reserve(size, self))
+
+    def _pop_oldest(self):
+        chunk, _, _ = self._items.popleft()
+        self._bytes -= len(chunk)
+        self.budget.release(len(chunk))
+
+    def _drop_oldest(self) -> bool:
+        """제어 프레임이 아닌 가장 오래된 청크를 버립니다. 버릴 것이 없으면 False."""
+        for index, (chunk, _, control) in enumerate(self._items):
+            if not control:
+                del self._items[index]
+                self._bytes -= len(chunk)
+                self.budget.release(len(chunk))
+                return True
+        return False
+
+    def _coalesce(self, keep_last: bool) -> int:
+        """제어 프레임만 남기고 (keep_last면 마지막 청크도) 버린 청크 수를 반환합니다."""
+        last = self._items[-1] if keep_last and self._items else None
+        kept = deque()
+        dropped = 0
+        for item in self._items:
+            if item[2] or item is last:
+                kept.append(item)
+            else:
+                self._bytes -= len(item[0])
+                self.budget.release(len(item[0]))
+                dropped += 1
+        self._items = kept
+        return dropped
+
+    def put(self, chunk: bytes) -> bool:
+        """청크를 넣습니다. disconnect 정책에서 넘치면 False를 반환합니다."""
+        if self.overflowed:
+            return False
+        if self.closed:
+            return True
+        size = len(chunk)
+        control = isinstance(chunk, ControlFrame)
+        if not self._admit(size):
+            if self.policy == DISCONNECT:
+                self.overflowed = True
+                self.clear()
+                return False
+            if self.policy == COALESCE:
+                self.coalesced += self._coalesce(keep_last=False)
+            while not self._admit(size):
+                if not self._drop_oldest():
+                    if control:
+                        # 제어 프레임은 한도를 넘어도 넣는다
+                        self.budget.reserve(size, self, force=True)
+                        break
+                    # 제어 프레임만 남은 큐에도 들어가지 않는 청크는 버린다
+                    self.dropped += 1
+                    return True
+                self.dropped += 1
+        self._items.append((chunk, time.monotonic(), control))
+        self._bytes += size
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+        return True
+
+    def close(self):
+        """더 넣을 청크가 없음을 알립니다. 남은 청크는 get()으로 계속 꺼낼 수 있습니다."""
+        self.closed = True
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def shed_to(self, limit: float):
+        """프로세스 한도가 찼을 때 대기 바이트를 limit 이하로 줄입니다."""
+        if self.policy == DISCONNECT:
+            self.overflowed = True
+            self.clear()
+            return
+        if self.policy == COALESCE:
+            self.coalesced += self._coalesce(keep_last=True)
+        while self._bytes > limit and self._drop_oldest():
+            self.dropped += 1
+
+    def clear(self):
+        """남은 청크를 버리고 예약한 바이트를 반환합니다."""
+        while self._items:
+            self._pop_oldest()
+
+    def discard(self):
+        """큐를 비우고 프로세스 한도에서 뺍니다."""
+        self.clear()
+        self.budget.detach(self)
+
+    async def get(self) -> Optional[bytes]:
+        """쌓인 청크를 한 번에 이어 붙여 꺼냅니다. 닫혔고 비어 있으면 None."""
+        chunks = await self.get_many()
+        if chunks is None:
+            return None
+        return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+    async def get_many(self) -> Optional[List[bytes]]:
+        """쌓인 청크를 목록으로 꺼냅니다 (메시지 경계를 지켜야 하는 WebSocket용). 닫혔고 비어 있으면 None."""
+        while not self._items:
+            if self.closed:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        lag = self.lag()
+        if lag > self.max_lag:
+            self.max_lag = lag
+        chunks = [item[0] for item in self._items]
+        self.clear()
+        return chunks
+
+
+# 전역 SSE 버퍼 한도
+buffer_budget = BufferBudget()
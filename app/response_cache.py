@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "5"))  # 초, 0이면 캐시 끔
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+
+# 로더는 (JSON 본문 bytes, 추가 응답 헤더)를 반환한다
+Loader = Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+
+
+class _Entry:
+    __slots__ = ("body", "etag", "headers", "expires_at", "table")
+
+    def __init__(self, body: bytes, etag: str, headers: Dict[str, str], expires_at: float, table: str):
+        self.body = body
+        self.etag = etag
+        self.headers = headers
+        self.expires_at = expires_at
+        self.table = table
+
+
+class _RouteStats:
+    __slots__ = ("hits", "misses", "coalesced", "not_modified", "invalidated")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.invalidated = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def make_etag(body: bytes) -> str:
+    """본문 해시로 만든 strong ETag"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip() == etag for candidate in if_none_match.split(","))
+
+
+class ResponseCache:
+    """조회 위주 API의 JSON 응답 캐시입니다.
+
+    - TTL과 함께, 해당 테이블에 쓰기가 일어나면 엔진 이벤트 훅으로 즉시 무효화합니다.
+    - If-None-Match가 캐시된 ETag와 같으면 DB 작업 없이 304를 반환합니다.
+    - 같은 키의 동시 미스는 하나의 조회 결과를 함께 기다립니다 (stampede 방지).
+      조회하던 요청이 취소되면 기다리던 요청 중 하나가 다시 조회합니다.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 테이블별 쓰기 세대: 조회 중에 쓰기가 있었으면 결과를 캐시하지 않는다
+        self._generations: Dict[str, int] = {}
+        # 테이블별로 쓰기를 실행했지만 아직 커넥션을 반납하지 않은(commit 전) 연결 수
+        self._open_writes: Dict[str, int] = {}
+        self.routes: Dict[str, _RouteStats] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _stats(self, route: str) -> _RouteStats:
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = _RouteStats()
+        return stats
+
+    async def respond(self, request: Request, route: str, table: str, loader: Loader) -> Response:
+        """캐시된 응답(또는 304)을 반환하고, 없으면 loader로 만들어 캐시합니다."""
+        stats = self._stats(route)
+        if not self.enabled:
+            stats.misses += 1
+            body, headers = await loader()
+            return self._response(request, stats, body, make_etag(body), headers, "BYPASS")
+
+        key = f"{route}?{request.url.query}"
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                stats.hits += 1
+                return self._response(request, stats, entry.body, entry.etag, entry.headers, "HIT")
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            stats.coalesced += 1
+            try:
+                entry = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # 이 요청 자체가 취소됨
+                # 조회하던 요청이 취소됨 (클라이언트 연결 끊김): 다시 조회하거나 새 조회를 기다린다
+                continue
+            return self._response(request, stats, entry.body, entry.etag, entry.headers, "COALESCED")
+
+        stats.misses += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        generation = self._generations.get(table, 0)
+        try:
+            body, headers = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # 기다리는 요청이 없어도 "exception was never retrieved" 경고가 나지 않도록
+            future.exception()
+            raise
+        except BaseException:
+            # 기다리던 요청들은 취소된 future를 보고 조회를 다시 시도한다
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+        entry = _Entry(body, make_etag(body), headers, time.monotonic() + self.ttl, table)
+        # 조회 중에 쓰기가 있었거나 commit 전인 쓰기가 있으면 캐시하지 않는다
+        if self._generations.get(table, 0) == generation and not self._open_writes.get(table):
+            self._store(key, entry)
+        future.set_result(entry)
+        return self._response(request, stats, entry.body, entry.etag, entry.headers, "MISS")
+
+    def _response(self, request: Request, stats: _RouteStats, body: bytes, etag: str,
+                  headers: Dict[str, str], state: str) -> Response:
+        response_headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Cache": state, **headers}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            stats.not_modified += 1
+            return Response(status_code=304, headers=response_headers)
+        return Response(content=body, media_type="application/json", headers=response_headers)
+
+    def _store(self, key: str, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, table: str):
+        """테이블의 캐시된 응답을 모두 버립니다."""
+        self._generations[table] = self._generations.get(table, 0) + 1
+        for key in [key for key, entry in self._entries.items() if entry.table == table]:
+            route = key.split("?", 1)[0]
+            self._stats(route).invalidated += 1
+            del self._entries[key]
+
+    def install(self, engine, tables=("users", "events")):
+        """엔진의 INSERT/UPDATE/DELETE를 감지해 해당 테이블 캐시를 무효화합니다.
+
+        쓰기 실행 시점에 무효화하고, 커넥션이 풀로 반납될 때(commit/rollback 이후)
+        한 번 더 무효화합니다. 그 사이에는 해당 테이블의 조회 결과를 캐시하지 않아
+        commit 전 데이터가 캐시에 남지 않습니다.
+        """
+        from sqlalchemy import event
+
+        watched = frozenset(tables)
+        sync_engine = getattr(engine, "sync_engine", engine)
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if context is None or not (context.isinsert or context.isupdate or context.isdelete):
+                return
+            table = getattr(getattr(context.compiled, "statement", None), "table", None)
+            name = getattr(table, "name", None)
+            if name in watched:
+                dirty = conn.info.setdefault("dirty_tables", set())
+                if name not in dirty:
+                    dirty.add(name)
+                    self._open_writes[name] = self._open_writes.get(name, 0) + 1
+                self.invalidate(name)
+
+        def release(dbapi_connection, connection_record, *args):
+            for name in connection_record.info.pop("dirty_tables", ()):
+                self._open_writes[name] -= 1
+                self.invalidate(name)
+
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(sync_engine, "checkin", release)
+        event.listen(sync_engine, "invalidate", release)
+
+    def get_status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "routes": {route: stats.as_dict() for route, stats in self.routes.items()},
+        }
+
+
+# 전역 응답 캐시 인스턴스
+response_cache = ResponseCache()
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .models import UserMessage
+
+logger = logging.getLogger(__name__)
+
+# 이 일수보다 오래된 user_messages 행을 지운다. 기본 0(끔): 지운 기록은 되돌릴 수 없으므로
+# 명시적으로 켜야 한다 (예: MESSAGE_RETENTION_DAYS=7)
+MESSAGE_RETENTION_DAYS = float(os.getenv("MESSAGE_RETENTION_DAYS", "0"))
+MESSAGE_PURGE_BATCH = int(os.getenv("MESSAGE_PURGE_BATCH", "1000"))  # DELETE 한 번에 지울 최대 행 수
+MESSAGE_PURGE_INTERVAL = float(os.getenv("MESSAGE_PURGE_INTERVAL", "60"))  # 초
+MESSAGE_PURGE_PAUSE = float(os.getenv("MESSAGE_PURGE_PAUSE", "0.05"))  # 배치 사이 대기 (초)
+MESSAGE_PARTITION_AHEAD_DAYS = int(os.getenv("MESSAGE_PARTITION_AHEAD_DAYS", "3"))  # 미리 만들어 둘 일 단위 파티션 수
+
+_TO_DAYS_OFFSET = 365  # MySQL TO_DAYS(d) == d.toordinal() + 365
+
+
+def to_days(day: date) -> int:
+    """MySQL TO_DAYS()와 같은 값을 계산합니다."""
+    return day.toordinal() + _TO_DAYS_OFFSET
+
+
+def _local(value: datetime) -> datetime:
+    """DB가 돌려준 시간을 로컬 naive datetime으로 맞춥니다."""
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo is not None else value
+
+
+def partition_name(day: date) -> str:
+    """day 이전 행을 담는 파티션 이름 (VALUES LESS THAN (TO_DAYS(day)))"""
+    return "p" + day.strftime("%Y%m%d")
+
+
+class MessageRetention:
+    """user_messages에서 보관 기간이 지난 행을 지웁니다.
+
+    id 순 keyset으로 batch_size 행씩 읽어 오래된 행만 DELETE하고, 보관 기간 안의
+    행을 만나면 그 회차를 끝냅니다. 배치마다 짧게 commit해 잠금을 오래 잡지 않습니다.
+    MESSAGE_RETENTION_DAYS를 설정해야 켜집니다 (기본 0 = 끔).
+
+    MySQL에서 테이블이 created_at 기준 RANGE 파티션으로 나뉘어 있으면
+    (alembic 0002 마이그레이션) 통째로 만료된 파티션은 DROP PARTITION으로 지우고
+    앞으로 쓸 파티션을 미리 만들어 둡니다.
+    """
+
+    def __init__(self, retention_days: float = MESSAGE_RETENTION_DAYS, batch_size: int = MESSAGE_PURGE_BATCH,
+                 interval: float = MESSAGE_PURGE_INTERVAL, pause: float = MESSAGE_PURGE_PAUSE,
+                 ahead_days: int = MESSAGE_PARTITION_AHEAD_DAYS):
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pause = pause
+        self.ahead_days = ahead_days
+        self._lock = asyncio.Lock()
+
+        # 통계
+        self.runs = 0
+        self.batches = 0
+        self.purged_rows = 0
+        self.dropped_partitions = 0
+        self.created_partitions = 0
+        self.failed_runs = 0
+        self.partitioned = False
+        self.last_run_at: Optional[float] = None
+        self.last_run_duration = 0.0
+        self.last_run_purged = 0
+        self.cursor = 0  # 마지막으로 확인한 id
+        self.oldest_created_at: Optional[datetime] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.retention_days > 0
+
+    def cutoff(self) -> datetime:
+        # write-behind 버퍼와 같은 로컬 시간 기준
+        return datetime.now() - timedelta(days=self.retention_days)
+
+    async def run_once(self) -> int:
+        """만료된 메시지를 모두 지우고 지운 행 수를 반환합니다."""
+        if not self.enabled:
+            return 0
+        async with self._lock:
+            started = time.monotonic()
+            purged = 0
+            try:
+                cutoff = self.cutoff()
+                async with AsyncSessionLocal() as db:
+                    if db.bind.dialect.name == "mysql":
+                        await self._maintain_partitions(db, cutoff)
+                    after = 0
+                    while True:
+                        deleted, after, done = await self._purge_batch(db, cutoff, after)
+                        purged += deleted
+                        if done:
+                            break
+                        await asyncio.sleep(self.pause)
+                    self.oldest_created_at = await db.scalar(
+                        select(UserMessage.created_at).order_by(UserMessage.id).limit(1)
+                    )
+            except Exception:
+                self.failed_runs += 1
+                raise
+            finally:
+                self.runs += 1
+                self.last_run_at = time.time()
+                self.last_run_duration = time.monotonic() - started
+                self.last_run_purged = purged
+            return purged
+
+    async def _purge_batch(self, db: AsyncSession, cutoff: datetime, after: int) -> Tuple[int, int, bool]:
+        """id가 after보다 큰 batch_size 행 중 만료된 행을 지웁니다.
+
+        (지운 수, 마지막으로 읽은 id, 이번 회차 끝 여부)를 반환합니다.
+        """
+        rows = (await db.execute(
+            select(UserMessage.id, UserMessage.created_at)
+            .where(UserMessage.id > after)
+            .order_by(UserMessage.id)
+            .limit(self.batch_size)
+        )).all()
+        if not rows:
+            await db.rollback()
+            return 0, after, True
+        expired = [row.id for row in rows if row.created_at is not None and _local(row.created_at) < cutoff]
+        # 보관 기간 안의 행을 만났거나 마지막 배치면 이번 회차는 끝.
+        # id(autoincrement) 순서가 created_at 순서와 같다고 가정한다: 보관 기간 안의 행 뒤의 id는 모두
+        # 더 최근 행이다. write-behind 버퍼는 created_at을 enqueue 시각으로 채우지만 그 순서대로 INSERT하므로
+        # 어긋남은 워커 간 flush 간격 이내다. 이 가정이 깨지는 쓰기 경로가 생기면 그 행들은 앞선 id의 행이
+        # 만료될 때까지 남는다 (파티션 DROP 경로는 이 가정에 기대지 않음).
+        done = len(expired) < len(rows) or len(rows) < self.batch_size
+        self.cursor = rows[-1].id
+        if not expired:
+            await db.rollback()
+            return 0, self.cursor, True
+        await db.execute(delete(UserMessage).where(UserMessage.id.in_(expired)))
+        await db.commit()
+        self.batches += 1
+        self.purged_rows += len(expired)
+        return len(expired), self.cursor, done
+
+    async def _partitions(self, db: AsyncSession) -> List[Tuple[str, Optional[int]]]:
+        """(파티션 이름, TO_DAYS 상한 또는 MAXVALUE면 None) 목록"""
+        result = await db.execute(text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_messages' "
+            "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+        ))
+        return [(name, None if bound == "MAXVALUE" else int(bound)) for name, bound in result]
+
+    async def _maintain_partitions(self, db: AsyncSession, cutoff: datetime):
+        partitions = await self._partitions(db)
+        self.partitioned = bool(partitions)
+        if not partitions:
+            return
+
+        # 상한이 cutoff 날짜 이하인 파티션은 모든 행이 만료됨
+        expired = [name for name, bound in partitions if bound is not None and bound <= to_days(cutoff.date())]
+        # 마지막(MAXVALUE) 파티션은 남겨 둔다
+        expired = expired[:len(partitions) - 1]
+        if expired:
+            await db.execute(text(f"ALTER TABLE user_messages DROP PARTITION {', '.join(expired)}"))
+            self.dropped_partitions += len(expired)
+            logger.info(f"Dropped {len(expired)} expired user_messages partitions")
+
+        highest = max((bound for _, bound in partitions if bound is not None), default=to_days(date.today()))
+        wanted = [date.today() + timedelta(days=offset) for offset in range(1, self.ahead_days + 2)]
+        missing = [day for day in wanted if to_days(day) > highest]
+        if missing and partitions[-1][1] is None:
+            definitions = ", ".join(
+                f"PARTITION {partition_name(day)} VALUES LESS THAN ({to_days(day)})" for day in missing
+            )
+            await db.execute(text(
+                f"ALTER TABLE user_messages REORGANIZE PARTITION {partitions[-1][0]} INTO "
+                f"({definitions}, PARTITION {partitions[-1][0]} VALUES LESS THAN MAXVALUE)"
+            ))
+            self.created_partitions += len(missing)
+
+    def get_status(self) -> dict:
+        oldest_age = None
+        lag = 0.0
+        if self.oldest_created_at is not None:
+            oldest_age = (datetime.now() - _local(self.oldest_created_at)).total_seconds()
+            # 가장 오래된 행이 보관 기간을 넘긴 정도 (0이면 밀린 삭제 없음)
+            lag = max(0.0, oldest_age - self.retention_days * 86400)
+        return {
+            "enabled": self.enabled,
+            "retention_days": self.retention_days,
+            "batch_size": self.batch_size,
+            "interval": self.interval,
+            "partitioned": self.partitioned,
+            "runs": self.runs,
+            "batches": self.batches,
+            "purged_rows": self.purged_rows,
+            "dropped_partitions": self.dropped_partitions,
+            "created_partitions": self.created_partitions,
+            "failed_runs": self.failed_runs,
+            "cursor": self.cursor,
+            "last_run_at": self.last_run_at,
+            "last_run_duration": self.last_run_duration,
+            "last_run_purged": self.last_run_purged,
+            "oldest_message_age": oldest_age,
+            "lag_seconds": lag,
+        }
+
+
+# 전역 메시지 보관 정책 인스턴스
+message_retention = MessageRetention()
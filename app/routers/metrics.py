@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import metrics, CONTENT_TYPE
+from ..multiplex import multiplex_registry
+from ..outbound import buffer_budget
+from ..session_manager import session_manager
+from ..stream_registry import stream_registry
+
+router = APIRouter(tags=["system"])
+
+# 다른 모듈이 이미 세고 있는 값은 조회 시점에 읽는다 (핫 경로에 추가 비용 없음)
+metrics.gauge_callback("sessions_active", "활성 세션 수", session_manager.get_active_sessions_count)
+metrics.gauge_callback("sessions_ping_pending", "pong을 기다리는 세션 수", session_manager.get_ping_pending_count)
+metrics.gauge_callback(
+    "sse_open_streams", "종류별 열린 SSE 스트림 수",
+    lambda: {(kind,): count for kind, count in stream_registry.by_kind().items()}, ("kind",))
+metrics.counter_callback(
+    "sse_frames_sent_total", "종류별 전송한 SSE 청크 수 (묶어 보낸 프레임은 1)",
+    lambda: {(kind,): sent[0] for kind, sent in stream_registry.sent_totals().items()}, ("kind",))
+metrics.counter_callback(
+    "sse_bytes_sent_total", "종류별 전송한 SSE 바이트 수",
+    lambda: {(kind,): sent[1] for kind, sent in stream_registry.sent_totals().items()}, ("kind",))
+metrics.gauge_callback("sse_queued_bytes", "SSE 전송 대기 바이트 (프로세스 전체)", lambda: buffer_budget.used)
+metrics.gauge_callback("sse_multiplexed_sessions", "다중화 스트림이 구독 중인 세션 수", multiplex_registry.session_count)
+
+@router.get("/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus 지표",
+    description="""
+    이 워커 프로세스의 지표를 Prometheus 텍스트 형식으로 반환합니다.
+
+    - 라우트별 요청 지연 히스토그램과 요청 수
+    - save_message / update_session_activity 등 작업별 DB commit 지연
+    - SSE 전송 청크/바이트 누적 (rate()로 초당 값), 샘플링한 소켓 쓰기 시간
+    - 열린 스트림, 활성 세션, pong 대기 세션, 커넥션 풀 checkout 대기 gauge
+
+    METRICS_ENABLED=false 이면 404를 반환합니다.
+    """
+)
+async def get_metrics():
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return PlainTextResponse(await metrics.render(), media_type=CONTENT_TYPE)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Form, HTTPException, Depends
+import os
 from sqlalchemy.ext.asyncio import AsyncSession
 import time
 from typing import Optional
@@ -6,12 +7,15 @@ from typing import Optional
 from ..dependencies import DatabaseDep, get_session_or_404, validate_session_exists
 from ..session_manager import session_manager
 from ..schemas import (
-    SessionCreateResponse, SessionMessageResponse, SessionInfoResponse,
+    SessionCreateResponse, SessionBatchCreateRequest, SessionBatchCreateResponse, SessionBatchItem,
+    SessionMessageResponse, SessionInfoResponse,
     PingStatusResponse, PongResponse, DisconnectResponse, ErrorResponse
 )
 
 router = APIRouter(prefix="/api/session", tags=["session"])
 
+SESSION_BATCH_MAX = int(os.getenv("SESSION_BATCH_MAX", "10000"))  # 배치 생성 요청 하나의 최대 세션 수
+
 @router.post("/create", 
     response_model=SessionCreateResponse,
     responses={
@@ -35,6 +39,47 @@ async def create_session(db: DatabaseDep, username: Optional[str] = Form(None)):
         message="Session created successfully"
     )
 
+@router.post("/batch",
+    response_model=SessionBatchCreateResponse,
+    responses={
+        200: {"description": "세션들이 성공적으로 생성됨"},
+        400: {"model": ErrorResponse, "description": "잘못된 요청 (usernames/count 누락 또는 최대 개수 초과)"},
+        500: {"model": ErrorResponse, "description": "서버 내부 오류"}
+    },
+    summary="세션 일괄 생성",
+    description="""
+    여러 세션을 한 번의 요청으로 생성합니다.
+    
+    - **usernames**: 사용자명 목록. 목록 순서대로 세션이 만들어집니다.
+    - **count**: usernames 대신 익명 세션 수를 지정합니다.
+    - 유저 조회/생성과 세션 INSERT를 묶어 commit 한 번으로 처리합니다.
+    - 요청 하나당 최대 SESSION_BATCH_MAX(기본 10000)개까지 생성할 수 있습니다.
+    """
+)
+async def create_sessions_batch(request: SessionBatchCreateRequest, db: DatabaseDep):
+    if request.usernames is not None:
+        size = len(request.usernames)
+    elif request.count is not None:
+        size = request.count
+    else:
+        raise HTTPException(status_code=400, detail="usernames or count is required")
+    # 목록을 만들기 전에 확인한다 (count=10**12 같은 요청이 메모리를 다 쓰지 않도록)
+    if size > SESSION_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {SESSION_BATCH_MAX} sessions per batch")
+    if request.usernames is not None:
+        usernames = [name or None for name in request.usernames]
+    else:
+        usernames = [None] * size
+
+    session_ids = await session_manager.create_sessions(db, usernames)
+    return SessionBatchCreateResponse(
+        sessions=[
+            SessionBatchItem(session_id=session_id, username=username or "Anonymous")
+            for session_id, username in zip(session_ids, usernames)
+        ],
+        created=len(session_ids)
+    )
+
 @router.get("/{session_id}/message",
     response_model=SessionMessageResponse,
     responses={
@@ -109,7 +154,7 @@ async def disconnect_session(session_id: str, db: DatabaseDep):
     """
 )
 async def get_session_info(session_id: str):
-    session_info = session_manager.get_session_info(session_id)
+    session_info = await session_manager.get_session_info(session_id)
     if not session_info:
         raise HTTPException(status_code=404, detail="Session not found")
     return SessionInfoResponse(**session_info)
@@ -126,6 +171,8 @@ async def get_session_info(session_id: str):
     
     - **requires_pong**: true인 경우 클라이언트는 pong 응답을 보내야 합니다.
     - **ping_miss_count**: 놓친 ping 횟수 (3회 연속 놓치면 세션 종료)
+    - SSE 클라이언트(`/stream/{session_id}`)는 ping 시점에 `ping_required` 이벤트를 즉시 받으므로
+      이 엔드포인트를 폴링할 필요가 없습니다. 폴링 방식 클라이언트용입니다.
     """
 )
 async def check_ping_status(session_id: str):
@@ -13,6 +13,6 @@ router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 )
 async def get_active_sessions():
     return ActiveSessionsResponse(
-        active_sessions_count=session_manager.get_active_sessions_count(),
+        active_sessions_count=await session_manager.get_active_sessions_count(),
         timestamp=time.time()
     )
\ No newline at end of file
@@ -1,21 +1,38 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Header, HTTPException, Query
 import asyncio
-import json
-import time
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-from ..dependencies import DatabaseDep
+from ..database import AsyncSessionLocal
 from ..session_manager import session_manager
+from ..broadcast import broadcast_hub
+from ..session_events import session_event_hub
+from ..message_log import message_log
+from ..sse import sse_response
+from ..outbound import COALESCE, DISCONNECT
+from ..session_frames import SessionFrames, STREAM_ENDING_EVENTS, create_message
+from ..multiplex import MultiplexStream, request_update, MULTIPLEX_MAX_SESSIONS
+from ..schemas import MultiplexUpdateRequest, MultiplexUpdateResponse, ErrorResponse
 
 router = APIRouter(tags=["stream"])
 
+
+def _require_unsharded():
+    # 다중화 스트림은 한 프로세스의 세션 저장소와 이벤트 허브만 본다. 샤딩하면 세션이 프로세스마다
+    # 나뉘므로 다른 샤드 세션은 구독할 수 없다 (프록시도 multiplex 경로를 세션 ID로 라우팅하지 않는다)
+    if session_manager.shards.enabled:
+        raise HTTPException(status_code=409, detail="Multiplexed streams are not available with session sharding")
+
+
 @router.get("/stream",
     summary="Server-Sent Events 스트림",
     description="""
     Server-Sent Events (SSE) 스트림을 제공합니다.
     
     - 2초마다 새로운 메시지를 전송합니다.
+    - 모든 연결이 하나의 producer가 만든 같은 프레임을 공유합니다.
+    - 클라이언트 연결이 끊기면 즉시 감지해 구독을 해제합니다. 보낼 것이 없으면
+      SSE_HEARTBEAT_INTERVAL초마다 `: keepalive` 주석을 보냅니다.
+    - 클라이언트가 느려 전송 대기 큐가 넘치면 밀린 프레임을 버리고 최신 프레임만 보냅니다.
     - 브라우저에서 EventSource로 연결할 수 있습니다.
     - 실시간 데이터 스트리밍에 사용됩니다.
     
@@ -40,28 +57,87 @@ router = APIRouter(tags=["stream"])
     }
 )
 async def stream_events():
-    async def event_generator() -> AsyncGenerator[str, None]:
-        counter = 0
-        while True:
-            data = {
-                "timestamp": time.time(),
-                "counter": counter,
-                "message": f"Server message #{counter}"
-            }
-            
-            yield f"data: {json.dumps(data)}\n\n"
-            counter += 1
-            await asyncio.sleep(2)
+    async def event_generator() -> AsyncGenerator[bytes, None]:
+        # 프레임은 허브의 producer가 한 번만 만들고, 여기서는 전달만 한다
+        subscription = broadcast_hub.subscribe()
+        try:
+            while True:
+                frames = await subscription.get_many()
+                if frames is None:
+                    break
+                yield b"".join(frames)
+        finally:
+            broadcast_hub.unsubscribe(subscription)
     
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
-        }
-    )
+    # 전역 스트림은 최신 tick만 의미가 있으므로 밀리면 최신 프레임만 보낸다
+    return sse_response(event_generator(), kind="broadcast", overflow=COALESCE)
+
+@router.get("/stream/multiplex",
+    summary="여러 세션을 하나로 묶은 Server-Sent Events 스트림",
+    description=f"""
+    연결 하나로 여러 세션의 이벤트를 받는 SSE 스트림입니다. 많은 최종 사용자를 대신하는
+    게이트웨이가 세션마다 `/stream/{{session_id}}` 연결을 열지 않도록 합니다.
+
+    - **sessions**: 처음 구독할 세션 ID 목록 (쉼표로 구분). 비워 두고 나중에 추가해도 됩니다.
+    - 첫 프레임은 `multiplex_open` 이벤트이며 `stream_id`와 추가된/거절된 세션 목록을 담습니다.
+    - 이후 프레임은 세션별 스트림과 같은 이벤트(`message`, `ping_required`, `session_disconnected`, ...)이고
+      모든 프레임의 data에 `session_id`가 들어갑니다. 스트림 자체의 이벤트는 `session_id`가 null입니다.
+    - 구독 세션은 `POST /stream/multiplex/{{stream_id}}`로 바꿉니다. 결과는 `multiplex_updated` 이벤트로 옵니다.
+    - 세션이 종료되면 `session_disconnected`를 보내고 그 세션만 구독에서 빠집니다. 스트림은 계속 열려 있습니다.
+    - 서버는 연결당 제너레이터 하나와 쓰기 경로 하나만 사용하며, 같은 시점의 프레임은 한 번에 씁니다.
+    - 프레임에 `id:`가 없으므로 Last-Event-ID 재전송은 지원하지 않습니다. 놓친 메시지는
+      세션별 스트림의 Last-Event-ID로 받을 수 있습니다.
+    - 스트림 하나에 최대 MULTIPLEX_MAX_SESSIONS({MULTIPLEX_MAX_SESSIONS})개 세션까지 구독할 수 있습니다.
+    - 세션 샤딩(SHARD_NODES)을 쓰면 409를 반환합니다. 세션이 여러 프로세스에 나뉘어 있어 한 샤드의
+      스트림이 다른 샤드 세션의 이벤트를 받을 수 없기 때문입니다. 세션별 스트림을 사용하세요.
+    - 청크 하나에 여러 세션의 프레임이 들어가므로 전송 대기 큐가 넘치면 프레임을 버리지 않고
+      연결을 끊습니다 (SSE_OVERFLOW_POLICY와 무관하게 disconnect). 다시 연결해 세션을 구독하고,
+      놓친 메시지는 세션별 스트림의 Last-Event-ID로 받습니다.
+    """,
+    responses={
+        200: {
+            "description": "다중화 SSE 스트림",
+            "content": {
+                "text/event-stream": {
+                    "example": 'data: {"type": "message", "session_id": "abc123", "counter": 1, "message": "Stream message #1 for john"}\\n\\n'
+                }
+            }
+        },
+        409: {"model": ErrorResponse, "description": "세션 샤딩 중에는 사용할 수 없음"}
+    }
+)
+async def stream_multiplexed_events(
+    sessions: str = Query("", description="구독할 세션 ID 목록 (쉼표로 구분)"),
+):
+    _require_unsharded()
+    stream = MultiplexStream(session_id for session_id in sessions.split(",") if session_id)
+    # 청크 하나를 버리면 여러 세션의 프레임이 함께 사라지므로 넘치면 끊는다
+    return sse_response(stream.frames(), kind="multiplex", overflow=DISCONNECT)
+
+@router.post("/stream/multiplex/{stream_id}",
+    response_model=MultiplexUpdateResponse,
+    responses={
+        200: {"description": "변경 요청이 전달됨"},
+        404: {"model": ErrorResponse, "description": "다중화 스트림을 찾을 수 없음"},
+        409: {"model": ErrorResponse, "description": "세션 샤딩 중에는 사용할 수 없음"}
+    },
+    summary="다중화 스트림 구독 변경",
+    description="""
+    열린 다중화 스트림의 구독 세션을 추가하거나 뺍니다.
+
+    - 변경은 스트림의 제너레이터가 적용하며, 결과(added, removed, rejected)는 스트림의
+      `multiplex_updated` 이벤트로 전달됩니다. 없는 세션은 rejected에 들어갑니다.
+    - 이벤트 릴레이(EVENT_RELAY_SOCKET)가 있으면 스트림이 다른 워커에 열려 있어도 전달됩니다.
+      릴레이가 없고 이 워커에 스트림이 없으면 404를 반환합니다.
+    - 세션 샤딩(SHARD_NODES)을 쓰면 409를 반환합니다.
+    """
+)
+async def update_multiplexed_stream(stream_id: str, request: MultiplexUpdateRequest):
+    _require_unsharded()
+    delivered = request_update(stream_id, request.add, request.remove)
+    if not delivered and session_event_hub.relay is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return MultiplexUpdateResponse(stream_id=stream_id, accepted=True)
 
 @router.get("/stream/{session_id}",
     summary="세션별 Server-Sent Events 스트림",
@@ -71,6 +147,18 @@ async def stream_events():
     - 세션별로 고유한 메시지를 전송합니다.
     - 세션의 활동 상태를 실시간으로 업데이트합니다.
     - ping/pong 상태도 스트림에 포함됩니다.
+    - 서버가 ping을 보내거나 세션이 종료되면 즉시 `ping_required` / `session_disconnected` 이벤트를 전송합니다.
+      SSE 클라이언트는 `/api/session/{session_id}/ping`을 폴링할 필요가 없습니다.
+    - 클라이언트 연결이 끊기면 즉시 감지해 스트림을 멈추고 DB 세션을 반환합니다. 끊긴 뒤에는
+      활동 시간 갱신과 메시지 저장이 멈추므로 세션은 ping 타임아웃으로 정리됩니다.
+    - 클라이언트가 느려 전송 대기 큐(SSE_QUEUE_MAX_FRAMES / SSE_QUEUE_MAX_BYTES)가 넘치면
+      SSE_OVERFLOW_POLICY (기본값 disconnect)를 적용합니다. 연결이 끊기면 클라이언트가
+      Last-Event-ID로 재연결해 놓친 메시지를 받습니다. drop_oldest / coalesce로 바꾸면 메시지 id에
+      빈틈이 생길 수 있지만, `ping_required` / `session_disconnected` 같은 제어 이벤트는 버리지 않습니다.
+    - 메시지 프레임에는 `id: <message_counter>`가 붙습니다. 연결이 끊겨 EventSource가
+      `Last-Event-ID` 헤더와 함께 재연결하면 그 사이에 놓친 메시지를 먼저 다시 보냅니다.
+      최근 메시지는 메모리 링 버퍼(MESSAGE_LOG_SIZE)에서, 더 오래된 메시지는 user_messages의
+      (session_id, message_counter) 인덱스로 조회하며 최대 MESSAGE_REPLAY_MAX개까지 보냅니다.
     - 세션이 존재하지 않으면 404 에러를 반환합니다.
     
     **사용 예시:**
@@ -87,7 +175,7 @@ async def stream_events():
             "description": "세션별 SSE 스트림",
             "content": {
                 "text/event-stream": {
-                    "example": 'data: {"timestamp": 1640995200.0, "session_id": "abc123", "username": "john", "counter": 1, "message": "Message #1 for john", "ping_status": "ok"}\\n\\n'
+                    "example": 'id: 1\ndata: {"timestamp": 1640995200.0, "session_id": "abc123", "username": "john", "counter": 1, "message": "Message #1 for john", "ping_status": "ok"}\\n\\n'
                 }
             }
         },
@@ -96,85 +184,78 @@ async def stream_events():
         }
     }
 )
-async def stream_session_events(session_id: str, db: DatabaseDep):
+async def stream_session_events(
+    session_id: str,
+    last_event_id: Optional[str] = Header(None, description="마지막으로 받은 메시지 id (EventSource가 재연결 시 자동 전송)"),
+):
     # 세션 존재 여부 확인
     session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        resume_after = int(last_event_id) if last_event_id else None
+    except ValueError:
+        resume_after = None
     
-    async def session_event_generator() -> AsyncGenerator[str, None]:
+    frames = SessionFrames(session_id)
+
+    async def session_event_generator() -> AsyncGenerator[bytes, None]:
+        # send_ping(), disconnect_session() 등의 이벤트로 sleep 없이 바로 깨어난다
+        events = session_event_hub.subscribe(session_id)
+        # 요청 의존성 세션이 아니라 스트림 수명과 같은 세션: 연결이 끊기면 finally에서 바로 반환된다
+        db = AsyncSessionLocal()
+        loop = asyncio.get_running_loop()
         try:
+            # 재연결이면 끊긴 동안 보내지 못한 메시지를 먼저 다시 보낸다
+            if resume_after is not None:
+                replay = await message_log.replay(
+                    db, session_id, resume_after, session.message_counter, session.username
+                )
+                if replay:
+                    yield b"".join(replay)
+
+            # 재연결 시 아직 pong을 받지 못한 ping이 있으면 바로 알린다
+            if session.get("ping_pending", False):
+                yield frames.ping()
+
+            next_tick = loop.time()
             while True:
                 # 세션이 여전히 존재하는지 확인
                 current_session = await session_manager.get_session(session_id)
                 if not current_session:
                     # 세션이 종료되었음을 알리고 스트림 종료
-                    disconnect_data = {
-                        "type": "session_disconnected",
-                        "timestamp": time.time(),
-                        "session_id": session_id,
-                        "message": "Session has been disconnected"
-                    }
-                    yield f"data: {json.dumps(disconnect_data)}\n\n"
+                    yield frames.disconnected()
                     break
-                
-                # 세션 활동 업데이트
-                await session_manager.update_session_activity(db, session_id)
-                
-                # 다음 메시지 카운터 가져오기
-                counter = await session_manager.get_next_message_counter(session_id)
-                
-                # 세션별 메시지 생성
-                message_content = f"Stream message #{counter} for {current_session.get('username', 'Anonymous')}"
-                
-                # 메시지를 데이터베이스에 저장
-                await session_manager.save_message(db, session_id, message_content, counter)
-                
-                # ping 상태 확인
-                ping_status = "pending" if current_session.get("ping_pending", False) else "ok"
-                
-                # 스트림 데이터 생성
-                stream_data = {
-                    "type": "message",
-                    "timestamp": time.time(),
-                    "session_id": session_id,
-                    "username": current_session.get("username", "Anonymous"),
-                    "counter": counter,
-                    "message": message_content,
-                    "ping_status": ping_status,
-                    "ping_miss_count": current_session.get("ping_miss_count", 0)
-                }
-                
-                yield f"data: {json.dumps(stream_data)}\n\n"
-                
-                # ping이 pending 상태이면 ping 이벤트도 전송
-                if current_session.get("ping_pending", False):
-                    ping_data = {
-                        "type": "ping_required",
-                        "timestamp": time.time(),
-                        "session_id": session_id,
-                        "message": "Server is requesting pong response"
-                    }
-                    yield f"data: {json.dumps(ping_data)}\n\n"
-                
-                await asyncio.sleep(2)
+
+                if loop.time() >= next_tick:
+                    next_tick = loop.time() + 2
+
+                    # 세션 활동 업데이트
+                    await session_manager.update_session_activity(db, session_id)
+                    
+                    # 메시지를 만들어 저장하고 id를 붙여 보낸다
+                    counter, payload = await create_message(db, session_id, current_session)
+                    yield frames.message(counter, payload)
+
+                # 다음 메시지 tick까지 세션 이벤트를 기다린다
+                try:
+                    pending_events = await asyncio.wait_for(
+                        events.get_many(), timeout=max(next_tick - loop.time(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    continue
+
+                for _, event_type, data in pending_events or ():
+                    yield frames.event(event_type, data)
+                    if event_type in STREAM_ENDING_EVENTS:
+                        # 세션 종료 또는 샤드 재배치: 클라이언트가 재연결하도록 종료
+                        return
                 
         except Exception as e:
             # 에러 발생 시 클라이언트에게 알림
-            error_data = {
-                "type": "error",
-                "timestamp": time.time(),
-                "session_id": session_id,
-                "message": f"Stream error: {str(e)}"
-            }
-            yield f"data: {json.dumps(error_data)}\n\n"
+            yield frames.error(e)
+        finally:
+            session_event_hub.unsubscribe(session_id, events)
+            await db.close()
     
-    return StreamingResponse(
-        session_event_generator(),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
-        }
-    )
\ No newline at end of file
+    return sse_response(session_event_generator(), kind="session", session_id=session_id)
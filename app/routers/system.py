@@ -1,9 +1,27 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query
 import time
 
 from ..background_tasks import background_task_manager
+from ..dependencies import require_shard_admin
 from ..session_manager import session_manager
-from ..schemas import HealthResponse, PingSystemStatusResponse
+from ..write_behind import message_write_buffer, activity_flusher
+from ..session_events import session_event_hub
+from ..logging_config import logging_pipeline
+from ..user_cache import user_cache
+from ..response_cache import response_cache
+from ..message_log import message_log
+from ..retention import message_retention
+from ..stream_registry import stream_registry
+from ..multiplex import multiplex_registry
+from ..loop_monitor import loop_monitor, task_snapshot
+from ..schemas import (
+    HealthResponse, PingSystemStatusResponse, WriteBehindStatusResponse,
+    ActivityFlushStatusResponse, EventRelayStatusResponse, ShardStatusResponse,
+    ShardHandoverRequest, ShardHandoverResponse, ShardAdoptRequest, ShardAdoptResponse,
+    LoggingStatusResponse, UserCacheStatusResponse, ResponseCacheStatusResponse,
+    MessageLogStatusResponse, MessageRetentionStatusResponse,
+    StreamRegistryStatusResponse, MultiplexStatusResponse, LoopMonitorStatusResponse, TaskSnapshotResponse
+)
 
 router = APIRouter(prefix="/api/system", tags=["system"])
 
@@ -24,10 +42,226 @@ async def get_ping_system_status():
     status = background_task_manager.get_status()
     return PingSystemStatusResponse(
         background_tasks=status,
-        sessions_needing_ping=len(session_manager.get_sessions_needing_ping()),
-        active_sessions=session_manager.get_active_sessions_count()
+        sessions_needing_ping=await session_manager.get_sessions_needing_ping_count(),
+        active_sessions=await session_manager.get_active_sessions_count()
     )
 
+@router.get("/write-behind",
+    response_model=WriteBehindStatusResponse,
+    summary="메시지 write-behind 버퍼 상태 조회",
+    description="""
+    메시지 write-behind 버퍼의 상태와 통계를 조회합니다.
+    
+    - MESSAGE_WRITE_BEHIND=true 로 활성화됩니다.
+    - commits 대비 flushed_rows 비율로 commit 절감 효과를 확인할 수 있습니다.
+    """
+)
+async def get_write_behind_status():
+    return WriteBehindStatusResponse(**message_write_buffer.get_status())
+
+@router.get("/activity-flush",
+    response_model=ActivityFlushStatusResponse,
+    summary="세션 활동 시간 일괄 저장 상태 조회",
+    description="""
+    세션 last_activity 일괄 저장(flusher)의 상태와 통계를 조회합니다.
+    
+    - ACTIVITY_FLUSH_INTERVAL (초) 마다 변경된 세션만 한 번의 UPDATE로 기록합니다.
+    - 0으로 설정하면 요청마다 즉시 UPDATE합니다.
+    - writes_saved는 일괄 저장으로 절약한 행 쓰기 수입니다.
+    """
+)
+async def get_activity_flush_status():
+    return ActivityFlushStatusResponse(**activity_flusher.get_status())
+
+@router.get("/event-relay",
+    response_model=EventRelayStatusResponse,
+    summary="워커 간 이벤트 릴레이 상태 조회",
+    description="""
+    세션 이벤트(ping_required, pong_received, session_disconnected) 릴레이 상태를 조회합니다.
+    
+    - EVENT_RELAY_SOCKET이 설정되면 다른 워커에 열린 스트림에도 이벤트가 전달됩니다.
+    - 처리량은 채널 종류별(session 등)로 집계하며 초당 처리량은 EWMA 값입니다.
+    - queue_depth / buffered_bytes는 아직 전송되지 않은 메시지와 바이트입니다.
+    """
+)
+async def get_event_relay_status():
+    status = session_event_hub.get_status()
+    relay = session_event_hub.relay
+    status["hub"] = await relay.hub_stats() if relay is not None else None
+    return EventRelayStatusResponse(**status)
+
+@router.get("/shard",
+    response_model=ShardStatusResponse,
+    summary="세션 샤드 상태 조회",
+    description="""
+    이 프로세스의 샤드 구성과 보관 중인 세션 수를 조회합니다.
+    
+    - SHARD_ID / SHARD_NODES 가 설정되면 세션 ID가 consistent hash로 샤드에 매핑됩니다.
+    - 앞단 프록시(python -m app.shard_proxy)가 세션 요청을 주인 샤드로 보냅니다.
+    """
+)
+async def get_shard_status():
+    return ShardStatusResponse(
+        **session_manager.shards.get_status(),
+        owned_sessions=await session_manager.get_active_sessions_count()
+    )
+
+@router.post("/shard/handover",
+    response_model=ShardHandoverResponse,
+    dependencies=[Depends(require_shard_admin)],
+    summary="샤드 구성 변경 및 세션 인계",
+    description="""
+    새 샤드 구성을 적용하고 더 이상 소유하지 않는 세션을 제거해 반환합니다.
+    
+    - `X-Shard-Admin-Token` 헤더가 SHARD_ADMIN_TOKEN과 같아야 합니다 (설정되지 않으면 항상 403).
+    - 샤드 프록시가 노드 추가/제거 시 모든 샤드에 호출합니다. 프록시는 이 경로를 클라이언트 요청으로 전달하지 않습니다.
+    - 반환된 세션은 새 주인 샤드의 /shard/adopt 로 전달됩니다.
+    - 인계된 세션의 열린 스트림은 `session_moved` 이벤트 후 종료됩니다.
+    """
+)
+async def hand_over_sessions(request: ShardHandoverRequest):
+    moved = await session_manager.hand_over_sessions(request.nodes)
+    return ShardHandoverResponse(moved=moved, moved_count=sum(len(items) for items in moved.values()))
+
+@router.post("/shard/adopt",
+    response_model=ShardAdoptResponse,
+    dependencies=[Depends(require_shard_admin)],
+    summary="다른 샤드의 세션 인수",
+    description="""
+    다른 샤드에서 인계된 세션 레코드를 ping/만료 상태 그대로 등록합니다.
+
+    - `X-Shard-Admin-Token` 헤더가 SHARD_ADMIN_TOKEN과 같아야 합니다 (설정되지 않으면 항상 403).
+    """
+)
+async def adopt_sessions(request: ShardAdoptRequest):
+    return ShardAdoptResponse(adopted=await session_manager.adopt_sessions(request.sessions))
+
+@router.get("/logging",
+    response_model=LoggingStatusResponse,
+    summary="로깅 파이프라인 상태 조회",
+    description="""
+    큐 기반 로깅 파이프라인과 느린 쿼리 로그의 상태를 조회합니다.
+    
+    - LOG_LEVEL, SQL_ECHO, SLOW_QUERY_MS, LOG_SAMPLE_RATES, LOG_RATE_LIMIT, LOG_QUEUE_SIZE 환경 변수로 설정합니다.
+    - WARNING 이상 레코드는 샘플링/초당 제한 없이 항상 출력됩니다.
+    """
+)
+async def get_logging_status():
+    return LoggingStatusResponse(**logging_pipeline.get_status())
+
+@router.get("/user-cache",
+    response_model=UserCacheStatusResponse,
+    summary="유저 캐시 상태 조회",
+    description="""
+    세션 생성 시 사용하는 username -> user_id 캐시의 상태를 조회합니다.
+    
+    - USER_CACHE_SIZE (0이면 끔), USER_CACHE_TTL (초) 환경 변수로 설정합니다.
+    - 캐시 미스 시 dialect별 upsert 한 번으로 유저를 찾거나 생성합니다.
+    """
+)
+async def get_user_cache_status():
+    return UserCacheStatusResponse(**user_cache.get_status())
+
+@router.get("/response-cache",
+    response_model=ResponseCacheStatusResponse,
+    summary="조회 API 응답 캐시 상태 조회",
+    description="""
+    /api/users, /api/events JSON 응답 캐시의 경로별 통계를 조회합니다.
+    
+    - RESPONSE_CACHE_TTL (초, 0이면 끔), RESPONSE_CACHE_MAX_ENTRIES 환경 변수로 설정합니다.
+    - users/events 테이블에 쓰기가 일어나면 해당 테이블의 캐시가 즉시 무효화됩니다.
+    - coalesced는 동시 미스에서 진행 중인 조회 결과를 함께 기다린 요청 수입니다.
+    """
+)
+async def get_response_cache_status():
+    return ResponseCacheStatusResponse(**response_cache.get_status())
+
+@router.get("/message-log",
+    response_model=MessageLogStatusResponse,
+    summary="세션 스트림 재전송 로그 상태 조회",
+    description="""
+    Last-Event-ID 재연결 시 놓친 메시지를 다시 보내는 로그의 통계를 조회합니다.
+    
+    - MESSAGE_LOG_SIZE (세션별 링 버퍼 크기, 0이면 항상 DB 조회), MESSAGE_REPLAY_MAX 환경 변수로 설정합니다.
+    - replayed_from_db가 크면 링 버퍼를 늘리는 것을 고려하세요.
+    """
+)
+async def get_message_log_status():
+    return MessageLogStatusResponse(**message_log.get_status())
+
+@router.get("/message-retention",
+    response_model=MessageRetentionStatusResponse,
+    summary="메시지 보관 기간 삭제 상태 조회",
+    description="""
+    user_messages 보관 기간 삭제 작업의 진행 상황과 지연을 조회합니다.
+    
+    - MESSAGE_RETENTION_DAYS (기본 0 = 끔, 예: 7), MESSAGE_PURGE_BATCH, MESSAGE_PURGE_INTERVAL 환경 변수로 설정합니다.
+    - id 순으로 배치 단위 DELETE를 실행하며, 파티션 테이블(MySQL)이면 만료된 파티션을 DROP합니다.
+    - lag_seconds가 계속 커지면 삭제가 유입 속도를 따라가지 못하는 것입니다.
+    """
+)
+async def get_message_retention_status():
+    return MessageRetentionStatusResponse(**message_retention.get_status())
+
+@router.get("/streams",
+    response_model=StreamRegistryStatusResponse,
+    summary="열린 SSE 스트림 조회",
+    description="""
+    이 프로세스에 열려 있는 SSE 스트림 수와 연결 시간, 종료 사유별 통계를 조회합니다.
+    
+    - 클라이언트 연결 종료는 http.disconnect로 즉시 감지합니다 (client_disconnect).
+    - SSE_HEARTBEAT_INTERVAL초 동안 보낸 것이 없으면 `: keepalive`를 보내 응답 없는 연결을 찾아냅니다 (write_failed).
+    - 스트림마다 전송 대기 큐의 길이, 대기 시간(lag), 버린 청크 수를 보여 줍니다.
+      SSE_BUFFER_MAX_BYTES가 프로세스 전체 대기 바이트의 상한입니다.
+    """
+)
+async def get_stream_registry_status(limit: int = Query(20, ge=0, le=1000, description="목록에 포함할 최대 스트림 수")):
+    return StreamRegistryStatusResponse(**stream_registry.get_status(limit))
+
+@router.get("/multiplex",
+    response_model=MultiplexStatusResponse,
+    summary="다중화 SSE 스트림 조회",
+    description="""
+    이 프로세스에 열린 `/stream/multiplex` 스트림 수와 구독 중인 세션 수를 조회합니다.
+    
+    - 다중화 스트림은 세션 수와 관계없이 연결당 제너레이터 하나, 전송 큐 하나를 씁니다.
+    - 연결 자체의 전송 통계는 `/api/system/streams`의 kind=multiplex 항목에 있습니다.
+    """
+)
+async def get_multiplex_status():
+    return MultiplexStatusResponse(**multiplex_registry.get_status())
+
+@router.get("/loop",
+    response_model=LoopMonitorStatusResponse,
+    summary="이벤트 루프 지연 및 slow callback 조회",
+    description="""
+    이벤트 루프 지연(lag)과 루프를 오래 잡은 코드의 스택을 조회합니다.
+    
+    - LOOP_LAG_INTERVAL (초)마다 별도 스레드가 루프에 heartbeat를 예약해 실행까지 걸린 시간을 잽니다.
+    - LOOP_SLOW_THRESHOLD_MS 안에 실행되지 않으면 그 시점의 태스크와 스택을 기록합니다.
+      스택에 due_pings/collect_expired 같은 세션 스캔이 보이면 세션 수에 비례하는 작업이 원인입니다.
+    - LOOP_MONITOR_ENABLED=false 로 끌 수 있습니다.
+    """
+)
+async def get_loop_monitor_status():
+    return LoopMonitorStatusResponse(**loop_monitor.get_status())
+
+@router.get("/tasks",
+    response_model=TaskSnapshotResponse,
+    summary="asyncio 태스크 스냅샷",
+    description="""
+    이 프로세스의 살아 있는 asyncio 태스크를 코루틴 이름별로 묶어 조회합니다.
+    
+    - SSE 스트림(SSEResponse의 produce/watch_disconnect), 백그라운드 루프, 요청 처리 태스크가 구분됩니다.
+    - detail=true 이면 각 태스크가 멈춰 있는 가장 안쪽 코루틴과 위치도 집계합니다.
+    """
+)
+async def get_task_snapshot(
+    detail: bool = Query(False, description="멈춰 있는 위치까지 집계"),
+    limit: int = Query(50, ge=1, le=1000, description="반환할 최대 코루틴 종류 수"),
+):
+    return TaskSnapshotResponse(**task_snapshot(detail, limit))
+
 @router.get("/health",
     response_model=HealthResponse,
     summary="시스템 헬스 체크",
@@ -1,30 +1,116 @@
-from fastapi import APIRouter
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
-from typing import List
+from typing import AsyncGenerator, List, Literal, Optional
 
+from ..database import AsyncSessionLocal
 from ..dependencies import DatabaseDep
 from ..models import User, Event
+from ..response_cache import response_cache
 from ..schemas import UserResponse, EventResponse
+from ..sse import dumps
 
 router = APIRouter(prefix="/api", tags=["users"])
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_ROWS = 1000  # NDJSON 스트리밍 시 서버 측 커서에서 한 번에 가져올 행 수
+
+_PAGINATION_DESCRIPTION = """
+    - **limit** / **after**: id 기준 keyset 페이지네이션입니다. 다음 페이지는 응답의
+      `X-Next-Cursor` 헤더 값(또는 `Link: rel="next"`)을 after로 넘겨 조회합니다.
+      마지막 페이지에서는 헤더가 없습니다. after만 주면 페이지 크기는 {default}입니다.
+    - limit과 after를 모두 생략하면 이전과 같이 전체 목록을 반환합니다 (큰 테이블은 페이지나 ndjson 권장).
+    - **format=ndjson**: 한 줄에 JSON 하나씩 스트리밍합니다. 서버 측 커서로 청크 단위로 읽어
+      테이블 크기와 무관하게 메모리 사용량이 일정합니다. limit을 생략하면 끝까지 전송합니다.
+    - JSON 응답은 RESPONSE_CACHE_TTL (초) 동안 캐시되고 테이블에 쓰기가 있으면 즉시 무효화됩니다.
+      응답의 `ETag`를 `If-None-Match`로 보내면 변경이 없을 때 DB 조회 없이 304를 반환합니다.
+""".format(default=DEFAULT_PAGE_SIZE)
+
+
+def _page_size(limit: Optional[int], after: Optional[int]) -> Optional[int]:
+    # 페이지 파라미터 없이 호출하던 기존 클라이언트는 계속 전체 목록을 받는다
+    if limit is None and after is None:
+        return None
+    return limit or DEFAULT_PAGE_SIZE
+
+
+def _keyset(stmt, id_column, after: Optional[int], limit: Optional[int]):
+    stmt = stmt.order_by(id_column)
+    if after is not None:
+        stmt = stmt.where(id_column > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def _next_cursor_headers(path: str, rows: list, limit: Optional[int]) -> dict:
+    # 꽉 찬 페이지일 때만 다음 페이지가 있을 수 있다 (limit이 없으면 전체 목록)
+    if limit is None or len(rows) != limit:
+        return {}
+    cursor = rows[-1].id
+    return {
+        "X-Next-Cursor": str(cursor),
+        "Link": f'<{path}?after={cursor}&limit={limit}>; rel="next"',
+    }
+
+
+async def _cached_page(request: Request, db, path: str, table: str, stmt, fields: tuple,
+                       limit: Optional[int]) -> Response:
+    async def load():
+        rows = (await db.execute(stmt)).all()
+        return dumps([dict(zip(fields, row)) for row in rows]), _next_cursor_headers(path, rows, limit)
+
+    return await response_cache.respond(request, path, table, load)
+
+
+def _ndjson_response(stmt, fields: tuple) -> StreamingResponse:
+    async def row_generator() -> AsyncGenerator[bytes, None]:
+        # 요청 의존성 세션이 아니라 스트림 수명과 같은 세션을 쓴다
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(stmt.execution_options(yield_per=STREAM_CHUNK_ROWS))
+            async for rows in result.partitions():
+                yield b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+    return StreamingResponse(row_generator(), media_type="application/x-ndjson")
+
+
 @router.get("/users",
     response_model=List[UserResponse],
-    summary="전체 사용자 목록 조회",
-    description="데이터베이스에 등록된 모든 사용자의 목록을 반환합니다."
+    summary="사용자 목록 조회",
+    description="데이터베이스에 등록된 사용자 목록을 id 순으로 반환합니다.\n" + _PAGINATION_DESCRIPTION
 )
-async def get_users(db: DatabaseDep):
-    result = await db.execute(select(User))
-    users = result.scalars().all()
-    return [UserResponse(id=user.id, username=user.username, email=user.email) for user in users]
+async def get_users(
+    db: DatabaseDep,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=f"페이지 크기 (after만 주면 {DEFAULT_PAGE_SIZE}, 둘 다 생략하면 전체)"),
+    after: Optional[int] = Query(None, description="이 id 다음부터 조회 (이전 페이지의 X-Next-Cursor)"),
+    format: Literal["json", "ndjson"] = Query("json", description="응답 형식"),
+):
+    stmt = select(User.id, User.username, User.email)
+    if format == "ndjson":
+        return _ndjson_response(_keyset(stmt, User.id, after, limit), ("id", "username", "email"))
+
+    limit = _page_size(limit, after)
+    return await _cached_page(request, db, "/api/users", "users",
+                              _keyset(stmt, User.id, after, limit), ("id", "username", "email"), limit)
 
 @router.get("/events",
     response_model=List[EventResponse],
-    summary="전체 이벤트 목록 조회", 
-    description="데이터베이스에 저장된 모든 이벤트의 목록을 반환합니다."
+    summary="이벤트 목록 조회",
+    description="데이터베이스에 저장된 이벤트 목록을 id 순으로 반환합니다.\n" + _PAGINATION_DESCRIPTION
 )
-async def get_events(db: DatabaseDep):
-    result = await db.execute(select(Event))
-    events = result.scalars().all()
-    return [EventResponse(id=event.id, title=event.title, content=event.content) for event in events]
\ No newline at end of file
+async def get_events(
+    db: DatabaseDep,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=f"페이지 크기 (after만 주면 {DEFAULT_PAGE_SIZE}, 둘 다 생략하면 전체)"),
+    after: Optional[int] = Query(None, description="이 id 다음부터 조회 (이전 페이지의 X-Next-Cursor)"),
+    format: Literal["json", "ndjson"] = Query("json", description="응답 형식"),
+):
+    stmt = select(Event.id, Event.title, Event.content)
+    if format == "ndjson":
+        return _ndjson_response(_keyset(stmt, Event.id, after, limit), ("id", "title", "content"))
+
+    limit = _page_size(limit, after)
+    return await _cached_page(request, db, "/api/events", "events",
+                              _keyset(stmt, Event.id, after, limit), ("id", "title", "content"), limit)
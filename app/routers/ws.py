@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Query, WebSocket
+import asyncio
+from typing import AsyncGenerator, Optional
+
+from ..broadcast import Subscription
+from ..database import AsyncSessionLocal
+from ..session_manager import session_manager
+from ..session_events import session_event_hub
+from ..message_log import message_log
+from ..session_frames import SessionFrames, STREAM_ENDING_EVENTS, REQUESTED_MESSAGE, create_message
+from ..sse import event_payloads
+from ..ws import (
+    serve_websocket, COMMAND_PONG, COMMAND_MESSAGE,
+    CLOSE_SESSION_NOT_FOUND, CLOSE_SESSION_DISCONNECTED, CLOSE_SESSION_MOVED,
+)
+
+router = APIRouter(tags=["stream"])
+
+# 세션 이벤트 큐에 클라이언트 명령을 넣을 때 쓰는 이벤트 타입
+_CLIENT_COMMAND = "client_command"
+
+
+@router.websocket("/ws/{session_id}")
+async def session_websocket(
+    websocket: WebSocket,
+    session_id: str,
+    last_id: Optional[int] = Query(None, description="마지막으로 받은 메시지 counter (재연결 시 놓친 메시지를 다시 받음)"),
+    push: bool = Query(True, description="false면 주기 메시지를 보내지 않고 `m` 명령에만 응답"),
+):
+    """세션별 WebSocket 전송 방식입니다. `/stream/{session_id}`와 같은 세션 상태를 사용합니다.
+
+    메시지, ping/pong, 메시지 요청을 소켓 하나로 주고받으므로 클라이언트는 /message, /ping,
+    /pong을 HTTP로 호출할 필요가 없습니다.
+
+    - 서버 -> 클라이언트: 텍스트 메시지 하나에 JSON 이벤트 하나. 내용은 SSE 스트림의 `data:`
+      payload와 같습니다 (`message`, `ping_required`, `pong_received`, `session_disconnected`, ...).
+    - 클라이언트 -> 서버: 한 글자 명령. `p` = pong, `m` = 메시지 하나 요청.
+    - push=true(기본값)면 SSE 스트림처럼 2초마다 메시지를 보냅니다.
+    - last_id를 주면 SSE의 Last-Event-ID처럼 그 이후 메시지를 먼저 다시 보냅니다.
+    - 세션이 없으면 4404, 세션이 종료되면 4410, 다른 샤드로 옮겨지면 4307 코드로 닫습니다.
+    """
+    await websocket.accept()
+    session = await session_manager.get_session(session_id)
+    if not session:
+        await websocket.close(CLOSE_SESSION_NOT_FOUND, "Session not found")
+        return
+
+    frames = SessionFrames(session_id, sse=False)
+    # 클라이언트 명령도 세션 이벤트와 같은 큐로 받아, DB 세션을 쓰는 태스크를 하나로 유지한다
+    events = Subscription()
+    close_code = 1000
+
+    def on_command(command: str):
+        events.push((session_id, _CLIENT_COMMAND, command))
+
+    async def session_frames() -> AsyncGenerator[bytes, None]:
+        nonlocal close_code
+        session_event_hub.subscribe(session_id, events)
+        db = AsyncSessionLocal()
+        loop = asyncio.get_running_loop()
+        try:
+            if last_id is not None:
+                replay = await message_log.replay(db, session_id, last_id, session.message_counter, session.username)
+                for payload in event_payloads(b"".join(replay)):
+                    yield payload
+
+            if session.get("ping_pending", False):
+                yield frames.ping()
+
+            next_tick = loop.time() if push else float("inf")
+            while True:
+                current_session = await session_manager.get_session(session_id)
+                if not current_session:
+                    yield frames.disconnected()
+                    close_code = CLOSE_SESSION_DISCONNECTED
+                    return
+
+                if loop.time() >= next_tick:
+                    next_tick = loop.time() + 2
+                    await session_manager.update_session_activity(db, session_id)
+                    counter, payload = await create_message(db, session_id, current_session)
+                    yield frames.message(counter, payload)
+
+                try:
+                    pending_events = await asyncio.wait_for(
+                        events.get_many(), timeout=max(next_tick - loop.time(), 0) if push else None
+                    )
+                except asyncio.TimeoutError:
+                    continue
+
+                for _, event_type, data in pending_events or ():
+                    if event_type == _CLIENT_COMMAND:
+                        if data == COMMAND_PONG:
+                            # handle_pong이 pong_received를 publish하므로 그 이벤트가 응답이 된다
+                            await session_manager.handle_pong(session_id)
+                            await session_manager.update_session_activity(db, session_id)
+                        elif data == COMMAND_MESSAGE:
+                            await session_manager.update_session_activity(db, session_id)
+                            counter, payload = await create_message(db, session_id, current_session,
+                                                                    REQUESTED_MESSAGE)
+                            yield frames.message(counter, payload)
+                        continue
+                    yield frames.event(event_type, data)
+                    if event_type in STREAM_ENDING_EVENTS:
+                        close_code = (CLOSE_SESSION_DISCONNECTED if event_type == "session_disconnected"
+                                      else CLOSE_SESSION_MOVED)
+                        return
+
+        except Exception as e:
+            yield frames.error(e)
+        finally:
+            session_event_hub.unsubscribe(session_id, events)
+            await db.close()
+
+    await serve_websocket(websocket, session_frames(), on_command, session_id=session_id,
+                          close_code=lambda: close_code)
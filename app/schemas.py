@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # Session related schemas
@@ -11,6 +11,18 @@ class SessionCreateResponse(BaseModel):
     username: str = Field(..., description="사용자명", example="john_doe")
     message: str = Field(..., description="응답 메시지", example="Session created successfully")
 
+class SessionBatchCreateRequest(BaseModel):
+    usernames: Optional[List[str]] = Field(None, description="세션을 만들 사용자명 목록 (중복 가능)", example=["device_1", "device_2"])
+    count: Optional[int] = Field(None, ge=1, description="익명 세션 수 (usernames 대신 사용)", example=100)
+
+class SessionBatchItem(BaseModel):
+    session_id: str = Field(..., description="생성된 세션 ID")
+    username: str = Field(..., description="사용자명")
+
+class SessionBatchCreateResponse(BaseModel):
+    sessions: List[SessionBatchItem] = Field(..., description="생성된 세션 목록 (요청 순서)")
+    created: int = Field(..., description="생성된 세션 수")
+
 class SessionMessageResponse(BaseModel):
     timestamp: float = Field(..., description="메시지 생성 시간 (Unix timestamp)", example=1640995200.0)
     session_id: str = Field(..., description="세션 ID", example="550e8400-e29b-41d4-a716-446655440000")
@@ -43,6 +55,15 @@ class PongResponse(BaseModel):
 class DisconnectResponse(BaseModel):
     message: str = Field(..., description="응답 메시지", example="Session disconnected successfully")
 
+# Stream related schemas
+class MultiplexUpdateRequest(BaseModel):
+    add: List[str] = Field(default_factory=list, description="구독에 추가할 세션 ID 목록")
+    remove: List[str] = Field(default_factory=list, description="구독에서 뺄 세션 ID 목록")
+
+class MultiplexUpdateResponse(BaseModel):
+    stream_id: str = Field(..., description="다중화 스트림 ID")
+    accepted: bool = Field(..., description="변경 요청이 스트림에 전달되었는지 (결과는 스트림의 multiplex_updated 이벤트로 옴)")
+
 # System related schemas
 class HealthResponse(BaseModel):
     status: str = Field(..., description="시스템 상태", example="healthy")
@@ -56,8 +77,10 @@ class BackgroundTaskStatus(BaseModel):
     running: bool = Field(..., description="실행 중인지 여부")
     ping_task_active: bool = Field(..., description="ping 태스크 활성 상태")
     cleanup_task_active: bool = Field(..., description="정리 태스크 활성 상태")
-    ping_interval: int = Field(..., description="ping 간격 (초)")
-    ping_timeout: int = Field(..., description="ping 타임아웃 (초)")
+    retention_task_active: bool = Field(..., description="메시지 보관 기간 삭제 태스크 활성 상태")
+    loop_monitor_active: bool = Field(..., description="이벤트 루프 모니터 스레드 활성 상태")
+    ping_interval: float = Field(..., description="ping 간격 (초)")
+    ping_timeout: float = Field(..., description="ping 타임아웃 (초)")
     timestamp: str = Field(..., description="상태 조회 시간 (ISO format)")
 
 class PingSystemStatusResponse(BaseModel):
@@ -65,6 +88,244 @@ class PingSystemStatusResponse(BaseModel):
     sessions_needing_ping: int = Field(..., description="ping이 필요한 세션 수")
     active_sessions: int = Field(..., description="전체 활성 세션 수")
 
+class WriteBehindStatusResponse(BaseModel):
+    enabled: bool = Field(..., description="write-behind 모드 활성화 여부")
+    pending: int = Field(..., description="저장 대기 중인 메시지 수")
+    max_pending: int = Field(..., description="버퍼 최대 크기 (초과 시 backpressure)")
+    flush_size: int = Field(..., description="한 번에 INSERT하는 최대 행 수")
+    flush_interval: float = Field(..., description="flush 간격 (초)")
+    enqueued: int = Field(..., description="버퍼에 추가된 누적 메시지 수")
+    flushed_rows: int = Field(..., description="저장된 누적 메시지 수")
+    commits: int = Field(..., description="누적 commit 수")
+    failed_flushes: int = Field(..., description="실패한 flush 횟수")
+    backpressure_waits: int = Field(..., description="버퍼가 가득 차 대기한 횟수")
+
+class ActivityFlushStatusResponse(BaseModel):
+    enabled: bool = Field(..., description="활동 시간 일괄 저장 활성화 여부")
+    flush_interval: float = Field(..., description="flush 간격 (초)")
+    dirty_sessions: int = Field(..., description="저장 대기 중인 세션 수")
+    updates_requested: int = Field(..., description="누적 활동 시간 갱신 요청 수")
+    rows_written: int = Field(..., description="DB에 실제로 기록한 누적 행 수")
+    statements: int = Field(..., description="실행한 누적 UPDATE 문 수")
+    writes_saved: int = Field(..., description="일괄 저장으로 절약한 행 쓰기 수")
+    failed_flushes: int = Field(..., description="실패한 flush 횟수")
+
+class ChannelThroughput(BaseModel):
+    messages_in: int = Field(..., description="누적 수신 메시지 수")
+    messages_out: int = Field(..., description="누적 송신 메시지 수")
+    rate_in: float = Field(..., description="초당 수신 메시지 수 (EWMA)")
+    rate_out: float = Field(..., description="초당 송신 메시지 수 (EWMA)")
+
+class EventRelayClientStatus(BaseModel):
+    connected: bool = Field(..., description="릴레이 허브 연결 여부")
+    subscribed_channels: int = Field(..., description="이 워커가 구독 중인 채널 수")
+    queue_depth: int = Field(..., description="아직 전송하지 않은 메시지 수")
+    buffered_bytes: int = Field(..., description="소켓 쓰기 버퍼에 남은 바이트 수")
+    batches_sent: int = Field(..., description="전송한 배치 수")
+    messages_sent: int = Field(..., description="전송한 메시지 수")
+    dropped: int = Field(..., description="연결이 없어 버린 메시지 수")
+    reconnects: int = Field(..., description="재연결 횟수")
+    channels: Dict[str, ChannelThroughput] = Field(..., description="채널 종류별 처리량")
+
+class EventRelayHubStatus(BaseModel):
+    peers: int = Field(..., description="연결된 워커 수")
+    channels: int = Field(..., description="구독자가 있는 채널 수")
+    peer_queue_depths: List[int] = Field(..., description="워커별 전송 대기 메시지 수")
+    peer_buffered_bytes: List[int] = Field(..., description="워커별 소켓 쓰기 버퍼 바이트 수")
+    throughput: Dict[str, ChannelThroughput] = Field(..., description="채널 종류별 처리량")
+
+class EventRelayStatusResponse(BaseModel):
+    sessions_with_listeners: int = Field(..., description="이 워커에 스트림이 열린 세션 수")
+    published: int = Field(..., description="이 워커에서 발행한 이벤트 수")
+    delivered: int = Field(..., description="이 워커의 스트림에 전달한 이벤트 수")
+    relayed_in: int = Field(..., description="다른 워커에서 릴레이로 받은 이벤트 수")
+    relay: Optional[EventRelayClientStatus] = Field(None, description="릴레이 클라이언트 상태 (미사용 시 null)")
+    hub: Optional[EventRelayHubStatus] = Field(None, description="릴레이 허브 상태 (조회 실패 시 null)")
+
+class ShardStatusResponse(BaseModel):
+    enabled: bool = Field(..., description="세션 샤딩 사용 여부")
+    shard_id: Optional[str] = Field(None, description="이 프로세스의 샤드 이름")
+    nodes: Dict[str, str] = Field(..., description="샤드 이름별 주소")
+    owned_sessions: int = Field(..., description="이 샤드가 보관 중인 세션 수")
+
+class ShardHandoverRequest(BaseModel):
+    nodes: Dict[str, str] = Field(..., description="새 샤드 구성 (샤드 이름별 주소)")
+
+class ShardHandoverResponse(BaseModel):
+    moved: Dict[str, List[list]] = Field(..., description="새 주인 샤드별로 넘겨줄 [session_id, record] 목록")
+    moved_count: int = Field(..., description="넘겨준 세션 수")
+
+class ShardAdoptRequest(BaseModel):
+    sessions: List[list] = Field(..., description="넘겨받을 [session_id, record] 목록")
+
+class ShardAdoptResponse(BaseModel):
+    adopted: int = Field(..., description="등록한 세션 수")
+
+class LogCategoryStats(BaseModel):
+    sample_rate: float = Field(..., description="INFO 이하 레코드 샘플링 비율")
+    passed: int = Field(..., description="출력된 레코드 수")
+    sampled_out: int = Field(..., description="샘플링으로 버린 레코드 수")
+    rate_limited: int = Field(..., description="초당 제한으로 버린 레코드 수")
+
+class SlowQueryEntry(BaseModel):
+    statement: str = Field(..., description="SQL 문 (최대 500자)")
+    duration_ms: float = Field(..., description="실행 시간 (ms)")
+    executemany: bool = Field(..., description="executemany 여부")
+    timestamp: float = Field(..., description="기록 시각 (Unix timestamp)")
+
+class SlowQueryStats(BaseModel):
+    enabled: bool = Field(..., description="느린 쿼리 로그 활성화 여부")
+    threshold_ms: float = Field(..., description="기록 임계값 (ms)")
+    statements: int = Field(..., description="측정한 전체 SQL 수")
+    slow_statements: int = Field(..., description="임계값을 넘은 SQL 수")
+    max_ms: float = Field(..., description="가장 느린 SQL 실행 시간 (ms)")
+    recent: List[SlowQueryEntry] = Field(..., description="최근 느린 쿼리 목록")
+
+class LoggingStatusResponse(BaseModel):
+    running: bool = Field(..., description="큐 기반 로깅 스레드 실행 여부")
+    level: str = Field(..., description="루트 로그 레벨")
+    sql_echo: bool = Field(..., description="SQL echo 활성화 여부")
+    queue_size: int = Field(..., description="출력 대기 중인 레코드 수")
+    queue_capacity: int = Field(..., description="로그 큐 크기")
+    dropped: int = Field(..., description="큐가 가득 차 버린 레코드 수")
+    rate_limit_per_sec: float = Field(..., description="카테고리별 INFO 이하 초당 최대 레코드 수 (0이면 제한 없음)")
+    categories: Dict[str, LogCategoryStats] = Field(..., description="카테고리별 통계")
+    slow_queries: SlowQueryStats = Field(..., description="느린 쿼리 로그")
+
+class UserCacheStatusResponse(BaseModel):
+    enabled: bool = Field(..., description="유저 캐시 활성화 여부")
+    size: int = Field(..., description="캐시된 유저 수")
+    max_size: int = Field(..., description="최대 캐시 유저 수")
+    ttl: float = Field(..., description="캐시 항목 유효 시간 (초)")
+    hits: int = Field(..., description="캐시 적중 수")
+    misses: int = Field(..., description="캐시 미스 수 (upsert 실행)")
+    hit_ratio: float = Field(..., description="캐시 적중률")
+    evictions: int = Field(..., description="LRU로 제거된 항목 수")
+    expired: int = Field(..., description="TTL 만료로 제거된 항목 수")
+
+class ResponseCacheRouteStats(BaseModel):
+    hits: int = Field(..., description="캐시 적중 수")
+    misses: int = Field(..., description="캐시 미스 수 (DB 조회 실행)")
+    coalesced: int = Field(..., description="진행 중인 조회 결과를 함께 기다린 요청 수")
+    not_modified: int = Field(..., description="If-None-Match로 304를 반환한 수")
+    invalidated: int = Field(..., description="쓰기로 무효화된 캐시 항목 수")
+
+class ResponseCacheStatusResponse(BaseModel):
+    enabled: bool = Field(..., description="응답 캐시 활성화 여부")
+    ttl: float = Field(..., description="캐시 항목 유효 시간 (초)")
+    entries: int = Field(..., description="캐시된 응답 수")
+    max_entries: int = Field(..., description="최대 캐시 응답 수")
+    routes: Dict[str, ResponseCacheRouteStats] = Field(..., description="경로별 통계")
+
+class MessageLogStatusResponse(BaseModel):
+    size: int = Field(..., description="세션별 메모리 링 버퍼 크기 (프레임 수)")
+    replay_max: int = Field(..., description="재연결 시 다시 보내는 최대 메시지 수")
+    sessions: int = Field(..., description="링 버퍼를 가진 세션 수")
+    resumes: int = Field(..., description="Last-Event-ID로 재연결한 횟수")
+    replayed_from_memory: int = Field(..., description="링 버퍼에서 다시 보낸 메시지 수")
+    replayed_from_db: int = Field(..., description="user_messages에서 조회해 다시 보낸 메시지 수")
+    db_queries: int = Field(..., description="재전송을 위해 실행한 DB 조회 수")
+    truncated: int = Field(..., description="놓친 메시지가 replay_max를 넘어 일부만 보낸 횟수")
+
+class MessageRetentionStatusResponse(BaseModel):
+    enabled: bool = Field(..., description="메시지 보관 기간 삭제 활성화 여부")
+    retention_days: float = Field(..., description="보관 기간 (일)")
+    batch_size: int = Field(..., description="DELETE 한 번에 지우는 최대 행 수")
+    interval: float = Field(..., description="삭제 작업 주기 (초)")
+    partitioned: bool = Field(..., description="created_at 기준 파티션 사용 여부 (MySQL)")
+    runs: int = Field(..., description="삭제 작업 실행 횟수")
+    batches: int = Field(..., description="실행한 DELETE 배치 수")
+    purged_rows: int = Field(..., description="지운 전체 행 수")
+    dropped_partitions: int = Field(..., description="DROP한 파티션 수")
+    created_partitions: int = Field(..., description="미리 만든 파티션 수")
+    failed_runs: int = Field(..., description="실패한 작업 수")
+    cursor: int = Field(..., description="마지막으로 확인한 메시지 id")
+    last_run_at: Optional[float] = Field(None, description="마지막 작업 시각 (unix time)")
+    last_run_duration: float = Field(..., description="마지막 작업 소요 시간 (초)")
+    last_run_purged: int = Field(..., description="마지막 작업에서 지운 행 수")
+    oldest_message_age: Optional[float] = Field(None, description="남아 있는 가장 오래된 메시지의 나이 (초)")
+    lag_seconds: float = Field(..., description="가장 오래된 메시지가 보관 기간을 넘긴 시간 (초, 0이면 밀림 없음)")
+
+class OpenStreamInfo(BaseModel):
+    id: int = Field(..., description="스트림 번호")
+    kind: str = Field(..., description="스트림 종류 (broadcast, session, websocket, multiplex)")
+    session_id: Optional[str] = Field(None, description="세션 스트림이면 세션 ID")
+    client: Optional[str] = Field(None, description="클라이언트 주소")
+    age: float = Field(..., description="연결 후 경과 시간 (초)")
+    idle: float = Field(..., description="마지막 전송 후 경과 시간 (초)")
+    frames: int = Field(..., description="보낸 프레임 묶음 수")
+    bytes_sent: int = Field(..., description="보낸 바이트 수")
+    heartbeats: int = Field(..., description="보낸 keepalive 주석 수")
+    overflow: Optional[str] = Field(None, description="큐 overflow 정책 (drop_oldest, coalesce, disconnect)")
+    queued_frames: int = Field(..., description="전송 대기 중인 청크 수")
+    queued_bytes: int = Field(..., description="전송 대기 중인 바이트")
+    lag: float = Field(..., description="가장 오래 기다린 청크의 대기 시간 (초)")
+    max_lag: float = Field(..., description="지금까지의 최대 대기 시간 (초)")
+    dropped: int = Field(..., description="큐가 넘쳐 버린 청크 수")
+    coalesced: int = Field(..., description="최신 청크로 대체되어 버린 청크 수")
+
+class SSEBufferStatus(BaseModel):
+    max_bytes: int = Field(..., description="프로세스 전체 전송 대기 바이트 한도")
+    used: int = Field(..., description="현재 전송 대기 바이트")
+    peak: int = Field(..., description="최대 전송 대기 바이트")
+    rejections: int = Field(..., description="한도 초과로 거절된 예약 수")
+    sheds: int = Field(..., description="한도가 차서 공정 몫까지 줄인 큐 수")
+
+class StreamRegistryStatusResponse(BaseModel):
+    open: int = Field(..., description="열려 있는 스트림 수")
+    by_kind: Dict[str, int] = Field(..., description="종류별 열린 스트림 수")
+    opened: int = Field(..., description="지금까지 연 스트림 수")
+    closed: Dict[str, int] = Field(..., description="종료 사유별 스트림 수 (completed, client_disconnect, write_failed, slow_consumer, cancelled, error)")
+    oldest_age: float = Field(..., description="가장 오래 열린 스트림의 경과 시간 (초)")
+    average_age: float = Field(..., description="열린 스트림의 평균 경과 시간 (초)")
+    average_closed_duration: float = Field(..., description="종료된 스트림의 평균 연결 시간 (초)")
+    lagging: int = Field(..., description="전송 대기 중인 청크가 있는 스트림 수")
+    max_lag: float = Field(..., description="열린 스트림 중 최대 대기 시간 (초)")
+    queued_bytes: int = Field(..., description="열린 스트림의 전송 대기 바이트 합계")
+    dropped: int = Field(..., description="큐가 넘쳐 버린 전체 청크 수")
+    coalesced: int = Field(..., description="최신 청크로 대체되어 버린 전체 청크 수")
+    buffer: SSEBufferStatus = Field(..., description="프로세스 전체 버퍼 한도")
+    streams: List[OpenStreamInfo] = Field(..., description="가장 오래된 스트림부터 최대 limit개")
+    slowest: List[OpenStreamInfo] = Field(..., description="대기 시간이 가장 긴 스트림부터 최대 limit개")
+
+class SlowCallbackInfo(BaseModel):
+    timestamp: float = Field(..., description="감지 시간 (Unix timestamp)")
+    duration_ms: Optional[float] = Field(None, description="루프를 잡고 있던 시간 (ms)")
+    task: Optional[str] = Field(None, description="실행 중이던 태스크 이름 (태스크 밖 콜백이면 null)")
+    coroutine: Optional[str] = Field(None, description="실행 중이던 태스크의 코루틴")
+    stack: List[str] = Field(..., description="감지 시점 루프 스레드의 스택 (가장 안쪽 프레임부터)")
+
+class LoopMonitorStatusResponse(BaseModel):
+    enabled: bool = Field(..., description="이벤트 루프 모니터 사용 여부")
+    running: bool = Field(..., description="감시 스레드 실행 여부")
+    interval: float = Field(..., description="lag 측정 간격 (초)")
+    threshold_ms: float = Field(..., description="slow callback 기준 (ms)")
+    samples: int = Field(..., description="누적 lag 측정 수")
+    lag_ms: float = Field(..., description="마지막 lag (ms)")
+    lag_avg_ms: float = Field(..., description="최근 lag 평균 (ms)")
+    lag_p99_ms: float = Field(..., description="최근 lag p99 (ms)")
+    lag_max_ms: float = Field(..., description="최대 lag (ms)")
+    slow_callbacks: int = Field(..., description="누적 slow callback 수")
+    recent_slow: List[SlowCallbackInfo] = Field(..., description="최근 slow callback (최신순)")
+
+class TaskGroupInfo(BaseModel):
+    coroutine: str = Field(..., description="태스크 코루틴 이름")
+    count: int = Field(..., description="태스크 수")
+    waiting_at: Dict[str, int] = Field(..., description="멈춰 있는 가장 안쪽 코루틴별 수 (detail=true일 때)")
+
+class TaskSnapshotResponse(BaseModel):
+    total: int = Field(..., description="살아 있는 태스크 수")
+    groups: int = Field(..., description="코루틴 종류 수")
+    by_coroutine: List[TaskGroupInfo] = Field(..., description="태스크가 많은 코루틴부터 최대 limit개")
+
+class MultiplexStatusResponse(BaseModel):
+    open: int = Field(..., description="열린 다중화 스트림 수")
+    opened: int = Field(..., description="지금까지 연 다중화 스트림 수")
+    sessions: int = Field(..., description="열린 다중화 스트림이 구독 중인 세션 수 합계")
+    max_sessions_per_stream: int = Field(..., description="세션을 가장 많이 구독한 스트림의 세션 수")
+    session_limit: int = Field(..., description="스트림 하나의 최대 세션 수 (MULTIPLEX_MAX_SESSIONS)")
+    messages: int = Field(..., description="열린 다중화 스트림이 보낸 메시지 수")
+
 # User related schemas
 class UserResponse(BaseModel):
     id: int = Field(..., description="유저 ID")
@@ -0,0 +1,103 @@
+from typing import Dict, Optional, Set
+
+from .broadcast import Subscription
+from .event_relay import EventRelayClient, create_event_relay
+
+_CHANNEL_PREFIX = "session:"
+
+
+class SessionEventHub:
+    """세션별 이벤트를 해당 세션의 열린 스트림에 즉시 전달하는 허브입니다.
+
+    send_ping(), disconnect_session() 등이 publish하면 구독 중인 스트림이
+    sleep 주기를 기다리지 않고 바로 깨어납니다. 이벤트는 (session_id, event_type, data)
+    튜플로 전달됩니다.
+
+    릴레이가 설정되어 있으면 다른 워커에 열린 스트림에도 이벤트가 전달됩니다.
+    이 워커에 스트림이 있는 세션만 릴레이 채널을 구독합니다.
+    """
+
+    def __init__(self, relay: Optional[EventRelayClient] = None):
+        self._listeners: Dict[str, Set[Subscription]] = {}
+        self.relay = relay
+        if relay is not None:
+            relay.on_message = self._on_relay_message
+        self.published = 0
+        self.delivered = 0
+        self.relayed_in = 0
+
+    async def start(self):
+        """릴레이 연결을 시작합니다."""
+        if self.relay is not None:
+            await self.relay.start()
+
+    async def stop(self):
+        """릴레이 연결을 종료합니다."""
+        if self.relay is not None:
+            await self.relay.stop()
+
+    def subscribe(self, session_id: str, subscription: Optional[Subscription] = None) -> Subscription:
+        """세션 이벤트 구독을 등록합니다. 기존 구독 객체를 넘기면 그 큐로 함께 받습니다."""
+        if subscription is None:
+            subscription = Subscription()
+        listeners = self._listeners.get(session_id)
+        if listeners is None:
+            listeners = self._listeners[session_id] = set()
+            if self.relay is not None:
+                self.relay.subscribe(_CHANNEL_PREFIX + session_id)
+        listeners.add(subscription)
+        return subscription
+
+    def unsubscribe(self, session_id: str, subscription: Subscription):
+        """세션 이벤트 구독을 해제합니다."""
+        listeners = self._listeners.get(session_id)
+        if listeners is None:
+            return
+        listeners.discard(subscription)
+        if not listeners:
+            del self._listeners[session_id]
+            if self.relay is not None:
+                self.relay.unsubscribe(_CHANNEL_PREFIX + session_id)
+
+    def publish(self, session_id: str, event_type: str, data: Optional[dict] = None) -> int:
+        """세션의 모든 스트림에 이벤트를 전달하고 로컬에서 전달된 구독 수를 반환합니다."""
+        self.published += 1
+        if self.relay is not None:
+            self.relay.publish(_CHANNEL_PREFIX + session_id, [event_type, data])
+        return self._deliver(session_id, event_type, data)
+
+    def has_listeners(self, session_id: str) -> bool:
+        """세션에 열린 스트림이 있는지 확인합니다."""
+        return session_id in self._listeners
+
+    def get_status(self) -> dict:
+        """허브 상태와 통계를 반환합니다."""
+        return {
+            "sessions_with_listeners": len(self._listeners),
+            "published": self.published,
+            "delivered": self.delivered,
+            "relayed_in": self.relayed_in,
+            "relay": self.relay.get_status() if self.relay is not None else None,
+        }
+
+    def _deliver(self, session_id: str, event_type: str, data: Optional[dict]) -> int:
+        listeners = self._listeners.get(session_id)
+        if not listeners:
+            return 0
+        event = (session_id, event_type, data)
+        for subscription in listeners:
+            subscription.push(event)
+        self.delivered += len(listeners)
+        return len(listeners)
+
+    def _on_relay_message(self, channel: str, payload):
+        # 다른 워커에서 publish한 이벤트
+        if not channel.startswith(_CHANNEL_PREFIX):
+            return
+        event_type, data = payload
+        self.relayed_in += 1
+        self._deliver(channel[len(_CHANNEL_PREFIX):], event_type, data)
+
+
+# 전역 세션 이벤트 허브 인스턴스
+session_event_hub = SessionEventHub(create_event_relay())
@@ -0,0 +1,116 @@
+import time
+from typing import List, Optional, Tuple
+
+from .message_log import message_log
+from .outbound import ControlFrame
+from .session_manager import session_manager
+from .session_record import SessionRecord
+from .sse import dumps, encode_event, FrameTemplate
+
+STREAM_MESSAGE = "Stream message #{counter} for {username}"  # 주기 메시지 (SSE, WebSocket push, 다중화)
+REQUESTED_MESSAGE = "Message #{counter} for {username}"  # WebSocket `m` 명령 (GET /api/session/{id}/message와 같은 문구)
+
+# 이 이벤트를 보낸 뒤 세션 스트림은 끝난다 (다중화 스트림은 그 세션만 구독에서 뺀다)
+STREAM_ENDING_EVENTS = frozenset(("session_disconnected", "session_moved"))
+
+
+def message_payload(session_id: str, session: SessionRecord, counter: int, content: str) -> bytes:
+    """message 이벤트의 JSON payload를 만듭니다. 모든 전송 방식이 같은 payload를 씁니다."""
+    return dumps({
+        "type": "message",
+        "timestamp": time.time(),
+        "session_id": session_id,
+        "username": session.get("username", "Anonymous"),
+        "counter": counter,
+        "message": content,
+        "ping_status": "pending" if session.get("ping_pending", False) else "ok",
+        "ping_miss_count": session.get("ping_miss_count", 0)
+    })
+
+
+async def create_message(db, session_id: str, session: SessionRecord,
+                         template: str = STREAM_MESSAGE) -> Tuple[int, bytes]:
+    """다음 메시지를 만들어 저장하고 message_log에 기록한 뒤 (counter, payload)를 반환합니다."""
+    counter = await session_manager.get_next_message_counter(session_id)
+    content = template.format(counter=counter, username=session.get("username", "Anonymous"))
+    await session_manager.save_message(db, session_id, content, counter)
+    payload = message_payload(session_id, session, counter, content)
+    # 어느 전송 방식으로 재연결해도 다시 보낼 수 있도록 id를 붙인 SSE 프레임으로 기록한다
+    message_log.append(session_id, counter, encode_event(payload, id=counter))
+    return counter, payload
+
+
+async def create_messages(db, sessions: List[Tuple[str, SessionRecord]],
+                          template: str = STREAM_MESSAGE) -> List[Tuple[str, int, bytes]]:
+    """create_message의 배치판입니다. 메시지를 multi-row INSERT 한 번으로 저장하고
+    (session_id, counter, payload) 목록을 반환합니다."""
+    rows, messages = [], []
+    for session_id, session in sessions:
+        counter = await session_manager.get_next_message_counter(session_id)
+        content = template.format(counter=counter, username=session.get("username", "Anonymous"))
+        rows.append({"session_id": session_id, "message_counter": counter, "message_content": content})
+        messages.append((session_id, counter, message_payload(session_id, session, counter, content)))
+    await session_manager.save_messages(db, rows)
+    for session_id, counter, payload in messages:
+        message_log.append(session_id, counter, encode_event(payload, id=counter))
+    return messages
+
+
+class SessionFrames:
+    """세션 하나의 이벤트를 전송 방식에 맞는 프레임으로 바꿉니다.
+
+    sse면 SSE 프레임, 아니면 JSON payload(WebSocket 텍스트 메시지 하나)를 만듭니다.
+    message_ids면 message 프레임에 `id: <counter>`를 붙입니다 (세션별 SSE 스트림).
+    ping_required, session_disconnected 등 제어 이벤트는 ControlFrame으로 반환합니다.
+    """
+
+    __slots__ = ("session_id", "sse", "message_ids", "_ping", "_disconnected")
+
+    def __init__(self, session_id: str, sse: bool = True, message_ids: bool = True):
+        self.session_id = session_id
+        self.sse = sse
+        self.message_ids = message_ids
+        # 본문이 고정된 이벤트는 미리 인코딩해 두고 timestamp만 붙인다
+        self._ping = FrameTemplate({
+            "type": "ping_required",
+            "session_id": session_id,
+            "message": "Server is requesting pong response"
+        })
+        self._disconnected = FrameTemplate({
+            "type": "session_disconnected",
+            "session_id": session_id,
+            "message": "Session has been disconnected"
+        })
+
+    def _encode(self, data: dict) -> bytes:
+        return encode_event(data) if self.sse else dumps(data)
+
+    def message(self, counter: int, payload: bytes) -> bytes:
+        if not self.sse:
+            return payload
+        return encode_event(payload, id=counter if self.message_ids else None)
+
+    def ping(self) -> ControlFrame:
+        return self._ping.render() if self.sse else self._ping.render_payload()
+
+    def disconnected(self) -> ControlFrame:
+        return self._disconnected.render() if self.sse else self._disconnected.render_payload()
+
+    def event(self, event_type: str, data: Optional[dict] = None) -> bytes:
+        """세션 이벤트 허브의 이벤트 하나를 프레임으로 바꿉니다."""
+        if event_type == "ping_required":
+            return self.ping()
+        if event_type == "session_disconnected":
+            return self.disconnected()
+        if event_type == "session_moved":
+            # 샤드 재배치로 다른 프로세스가 세션을 맡게 됨: 클라이언트가 재연결해야 한다
+            return ControlFrame(self._encode({"type": "session_moved", "timestamp": time.time(),
+                                              "session_id": self.session_id, **(data or {})}))
+        # 기타 서버 push 이벤트는 type만 붙여 그대로 전달
+        push_data = {"type": event_type, "timestamp": time.time(), "session_id": self.session_id}
+        push_data.update(data or {})
+        return self._encode(push_data)
+
+    def error(self, error: Exception) -> ControlFrame:
+        return ControlFrame(self._encode({"type": "error", "timestamp": time.time(), "session_id": self.session_id,
+                                          "message": f"Stream error: {str(error)}"}))
@@ -1,210 +1,305 @@
-import uuid
-from typing import Optional, Dict
-from datetime import datetime, timedelta
+from typing import Optional, Dict, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import update, insert, case
 from .models import UserSession, UserMessage, User
+from .write_behind import message_write_buffer, activity_flusher
+from .session_events import session_event_hub
+from .message_log import message_log
+from .session_record import SessionRecord, mono_to_datetime
+from .session_store import SessionStore, InMemorySessionStore, create_session_store
+from .sharding import ShardMap, shard_map
+from .user_cache import user_cache, upsert_user, upsert_users
+from .metrics import db_commit_seconds
 import asyncio
+import time
+
+SESSION_INSERT_CHUNK = 1000  # 세션 일괄 생성 시 INSERT 한 번에 포함할 최대 행 수
 
 class SessionManager:
-    def __init__(self):
-        self.active_sessions: Dict[str, dict] = {}
-        self.ping_timeout = 45  # 45초 후 세션 만료
-        self.ping_interval = 20  # 20초마다 ping 전송
+    def __init__(self, store: Optional[SessionStore] = None, shards: Optional[ShardMap] = None):
+        # 세션 상태는 저장소가 보관한다 (기본: 프로세스 내부, 멀티 워커: Unix 소켓 데몬)
+        self.store = store or InMemorySessionStore()
+        # 샤딩 사용 시 이 프로세스는 자기 샤드가 소유한 세션만 보관한다
+        self.shards = shards or ShardMap()
+
+    @property
+    def ping_timeout(self) -> float:
+        return self.store.ping_timeout  # 45초 후 세션 만료
+
+    @ping_timeout.setter
+    def ping_timeout(self, value: float):
+        self.store.ping_timeout = value
+
+    @property
+    def ping_interval(self) -> float:
+        return self.store.ping_interval  # 20초마다 ping 전송
+
+    @ping_interval.setter
+    def ping_interval(self, value: float):
+        # RemoteSessionStore는 데몬 설정을 따르므로 AttributeError를 낸다
+        self.store.ping_interval = value
 
     async def create_session(self, db: AsyncSession, username: Optional[str] = None) -> str:
         """새로운 세션을 생성합니다."""
-        session_id = str(uuid.uuid4())
+        session_id = self.shards.new_session_id()
         
-        # 유저 이름이 제공된 경우 유저를 찾거나 생성
+        # 유저 이름이 제공된 경우 캐시에서 찾고, 없으면 upsert 한 번으로 찾거나 생성
         user_id = None
+        resolved_from_db = False
         if username:
-            user = await self.get_or_create_user(db, username)
-            user_id = user.id
+            user_id = user_cache.get(username) if user_cache.enabled else None
+            if user_id is None:
+                user_id = await upsert_user(db, username)
+                resolved_from_db = True
         
-        # 데이터베이스에 세션 저장
-        db_session = UserSession(
-            session_id=session_id,
-            user_id=user_id,
-            is_connected=True
+        # 데이터베이스에 세션 저장 (유저 upsert와 같은 트랜잭션, commit 한 번)
+        await db.execute(
+            insert(UserSession).values(session_id=session_id, user_id=user_id, is_connected=True)
         )
-        db.add(db_session)
         await db.commit()
+        # commit된 id만 캐시한다 (rollback된 INSERT의 id가 남지 않도록)
+        if resolved_from_db:
+            user_cache.put(username, user_id)
         
         # 메모리에 세션 정보 저장
-        self.active_sessions[session_id] = {
-            "user_id": user_id,
-            "username": username,
-            "message_counter": 0,
-            "connected_at": datetime.now(),
-            "last_activity": datetime.now(),
-            "last_ping": datetime.now(),
-            "ping_pending": False,
-            "ping_miss_count": 0
-        }
+        await self.register_session(session_id, user_id, username)
         
         return session_id
 
+    async def create_sessions(self, db: AsyncSession, usernames: List[Optional[str]]) -> List[str]:
+        """여러 세션을 한 번에 생성합니다 (None은 익명 세션).
+
+        유저는 캐시 + multi-row upsert로 한꺼번에 찾고, 세션 행은 multi-row INSERT로
+        저장한 뒤 commit은 한 번만 합니다.
+        """
+        user_ids: Dict[str, int] = {}
+        missing = []
+        for username in dict.fromkeys(name for name in usernames if name):
+            user_id = user_cache.get(username) if user_cache.enabled else None
+            if user_id is None:
+                missing.append(username)
+            else:
+                user_ids[username] = user_id
+        resolved = await upsert_users(db, missing) if missing else {}
+        user_ids.update(resolved)
+
+        sessions = [
+            [self.shards.new_session_id(), user_ids.get(username) if username else None, username]
+            for username in usernames
+        ]
+        for start in range(0, len(sessions), SESSION_INSERT_CHUNK):
+            await db.execute(insert(UserSession).values([
+                {"session_id": session_id, "user_id": user_id, "is_connected": True}
+                for session_id, user_id, _ in sessions[start:start + SESSION_INSERT_CHUNK]
+            ]))
+        await db.commit()
+        for username, user_id in resolved.items():
+            user_cache.put(username, user_id)
+
+        await self.store.add_many(sessions)
+        return [session_id for session_id, _, _ in sessions]
+
+    async def register_session(self, session_id: str, user_id: Optional[int], username: Optional[str]) -> SessionRecord:
+        """세션을 저장소에 등록하고 ping/만료 데드라인을 예약합니다."""
+        return await self.store.add(session_id, user_id, username)
+
+    async def hand_over_sessions(self, nodes: Dict[str, str]) -> Dict[str, List[list]]:
+        """샤드 구성을 바꾸고 더 이상 소유하지 않는 세션을 새 주인별로 넘겨줍니다.
+
+        반환값은 {새 주인 샤드: [[session_id, record tuple], ...]} 입니다.
+        세션 상태를 공유하는 저장소(RemoteSessionStore)에서는 옮길 상태가 없습니다.
+        """
+        self.shards.update(nodes)
+        if not isinstance(self.store, InMemorySessionStore):
+            return {}
+
+        moved: Dict[str, List[list]] = {}
+        for session_id in [sid for sid in self.store.sessions if not self.shards.owns(sid)]:
+            record = await self.store.remove(session_id)
+            activity_flusher.discard(session_id)
+            message_log.discard(session_id)
+            moved.setdefault(self.shards.owner(session_id), []).append([session_id, record.to_tuple()])
+            # 이 프로세스에 열린 스트림은 끊어 클라이언트가 새 주인으로 재연결하게 한다
+            session_event_hub.publish(session_id, "session_moved", {"owner": self.shards.owner(session_id)})
+        return moved
+
+    async def adopt_sessions(self, sessions: List[list]) -> int:
+        """다른 샤드에서 넘겨받은 세션을 등록합니다."""
+        for session_id, values in sessions:
+            await self.store.adopt(session_id, SessionRecord.from_tuple(values))
+        return len(sessions)
+
     async def get_or_create_user(self, db: AsyncSession, username: str) -> User:
-        """유저를 찾거나 새로 생성합니다."""
-        result = await db.execute(select(User).where(User.username == username))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            user = User(
-                username=username,
-                email=f"{username}@example.com",
-                is_active=True
-            )
-            db.add(user)
-            await db.commit()
-            await db.refresh(user)
-        
-        return user
+        """유저를 찾거나 새로 생성합니다 (upsert라 동시 생성에도 안전)."""
+        user_id = await upsert_user(db, username)
+        await db.commit()
+        user_cache.put(username, user_id)
+        return await db.get(User, user_id)
 
-    async def get_session(self, session_id: str) -> Optional[dict]:
+    async def get_session(self, session_id: str) -> Optional[SessionRecord]:
         """세션 정보를 반환합니다."""
-        return self.active_sessions.get(session_id)
+        return await self.store.get(session_id)
 
     async def update_session_activity(self, db: AsyncSession, session_id: str):
         """세션 활동 시간을 업데이트합니다."""
-        if session_id in self.active_sessions:
-            self.active_sessions[session_id]["last_activity"] = datetime.now()
+        now = await self.store.touch(session_id)
+        if now is not None:
+            if activity_flusher.enabled:
+                # 메모리 값이 기준이고 DB에는 주기적으로 일괄 반영
+                activity_flusher.mark(session_id, now)
+                return
             
             # 데이터베이스 업데이트
             await db.execute(
                 update(UserSession)
                 .where(UserSession.session_id == session_id)
-                .values(last_activity=datetime.now())
+                .values(last_activity=mono_to_datetime(now))
             )
+            started = time.perf_counter()
             await db.commit()
+            db_commit_seconds.observe(time.perf_counter() - started, ("update_session_activity",))
+
+    async def update_sessions_activity(self, db: AsyncSession, session_ids: List[str]):
+        """여러 세션의 활동 시간을 UPDATE 한 번과 commit 한 번으로 갱신합니다 (다중화 스트림의 tick 배치)."""
+        touched = {}
+        for session_id in session_ids:
+            now = await self.store.touch(session_id)
+            if now is not None:
+                if activity_flusher.enabled:
+                    activity_flusher.mark(session_id, now)
+                else:
+                    touched[session_id] = mono_to_datetime(now)
+        if not touched:
+            return
+        await db.execute(
+            update(UserSession)
+            .where(UserSession.session_id.in_(list(touched)))
+            .values(last_activity=case(touched, value=UserSession.session_id))
+        )
+        started = time.perf_counter()
+        await db.commit()
+        db_commit_seconds.observe(time.perf_counter() - started, ("update_sessions_activity",))
 
     async def disconnect_session(self, db: AsyncSession, session_id: str):
         """세션을 종료합니다."""
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
+        session = await self.store.remove(session_id)
+        if session:
+            activity_flusher.discard(session_id)
+            message_log.discard(session_id)
+            # 열린 스트림에 즉시 종료를 알린다
+            session_event_hub.publish(session_id, "session_disconnected")
             
-            # 데이터베이스 업데이트
+            # 데이터베이스 업데이트 (아직 반영되지 않은 활동 시간도 함께 기록)
             await db.execute(
                 update(UserSession)
                 .where(UserSession.session_id == session_id)
-                .values(is_connected=False)
+                .values(is_connected=False, last_activity=mono_to_datetime(session.last_activity_mono))
             )
             await db.commit()
 
     async def get_next_message_counter(self, session_id: str) -> int:
         """세션의 다음 메시지 카운터를 반환합니다."""
-        if session_id in self.active_sessions:
-            self.active_sessions[session_id]["message_counter"] += 1
-            return self.active_sessions[session_id]["message_counter"]
-        return 1
+        return await self.store.next_counter(session_id)
 
     async def save_message(self, db: AsyncSession, session_id: str, message_content: str, counter: int):
         """메시지를 데이터베이스에 저장합니다."""
+        if message_write_buffer.enabled:
+            # write-behind 모드: 버퍼에 넣고 백그라운드에서 multi-row INSERT로 저장
+            await message_write_buffer.enqueue(session_id, counter, message_content)
+            return
+
         user_message = UserMessage(
             session_id=session_id,
             message_counter=counter,
             message_content=message_content
         )
         db.add(user_message)
+        started = time.perf_counter()
+        await db.commit()
+        db_commit_seconds.observe(time.perf_counter() - started, ("save_message",))
+
+    async def save_messages(self, db: AsyncSession, messages: List[dict]):
+        """메시지 여러 개({session_id, message_counter, message_content})를 multi-row INSERT 한 번으로 저장합니다."""
+        if not messages:
+            return
+        if message_write_buffer.enabled:
+            for message in messages:
+                await message_write_buffer.enqueue(
+                    message["session_id"], message["message_counter"], message["message_content"]
+                )
+            return
+
+        await db.execute(insert(UserMessage).values(messages))
+        started = time.perf_counter()
         await db.commit()
+        db_commit_seconds.observe(time.perf_counter() - started, ("save_messages",))
 
-    def get_active_sessions_count(self) -> int:
+    async def get_active_sessions_count(self) -> int:
         """현재 활성 세션 수를 반환합니다."""
-        return len(self.active_sessions)
+        return await self.store.count()
 
-    def get_session_info(self, session_id: str) -> Optional[dict]:
+    async def get_ping_pending_count(self) -> int:
+        """pong을 기다리는 세션 수를 반환합니다."""
+        return await self.store.pending_pings()
+
+    async def get_session_info(self, session_id: str) -> Optional[dict]:
         """세션의 상세 정보를 반환합니다."""
-        session = self.active_sessions.get(session_id)
+        session = await self.store.get(session_id)
         if session:
+            # monotonic 시간은 여기서만 ISO 문자열로 변환
             return {
                 "session_id": session_id,
-                "username": session.get("username", "Anonymous"),
-                "message_counter": session["message_counter"],
-                "connected_at": session["connected_at"].isoformat(),
-                "last_activity": session["last_activity"].isoformat(),
-                "last_ping": session["last_ping"].isoformat(),
-                "ping_pending": session["ping_pending"],
-                "ping_miss_count": session["ping_miss_count"]
+                "username": session.username,
+                "message_counter": session.message_counter,
+                "connected_at": mono_to_datetime(session.connected_at_mono).isoformat(),
+                "last_activity": mono_to_datetime(session.last_activity_mono).isoformat(),
+                "last_ping": mono_to_datetime(session.last_ping_mono).isoformat(),
+                "ping_pending": session.ping_pending,
+                "ping_miss_count": session.ping_miss_count
             }
         return None
 
     async def send_ping(self, session_id: str) -> bool:
         """세션에 ping을 전송합니다."""
-        if session_id in self.active_sessions:
-            session = self.active_sessions[session_id]
-            session["last_ping"] = datetime.now()
-            session["ping_pending"] = True
+        if await self.store.mark_ping(session_id):
+            # 세션 스트림을 바로 깨워 ping_required를 전송하게 한다
+            session_event_hub.publish(session_id, "ping_required")
             return True
         return False
 
     async def handle_pong(self, session_id: str) -> bool:
         """클라이언트로부터 pong 응답을 처리합니다."""
-        if session_id in self.active_sessions:
-            session = self.active_sessions[session_id]
-            session["ping_pending"] = False
-            session["ping_miss_count"] = 0
-            session["last_activity"] = datetime.now()
+        if await self.store.pong(session_id):
+            # 다른 워커에 열린 스트림도 ping 상태를 바로 알 수 있도록 알린다
+            session_event_hub.publish(session_id, "pong_received")
             return True
         return False
 
     async def check_inactive_sessions(self, db: AsyncSession) -> list:
-        """비활성 세션들을 확인하고 정리합니다."""
-        now = datetime.now()
-        inactive_sessions = []
-        sessions_to_remove = []
-
-        for session_id, session in self.active_sessions.items():
-            # ping이 pending 상태이고 timeout을 초과한 경우
-            if session["ping_pending"]:
-                time_since_ping = (now - session["last_ping"]).total_seconds()
-                if time_since_ping > self.ping_timeout:
-                    session["ping_miss_count"] += 1
-                    
-                    # 3번 연속 ping을 놓친 경우 세션 제거
-                    if session["ping_miss_count"] >= 3:
-                        sessions_to_remove.append(session_id)
-                        inactive_sessions.append({
-                            "session_id": session_id,
-                            "username": session.get("username", "Anonymous"),
-                            "reason": "ping_timeout"
-                        })
-                    else:
-                        # ping을 다시 전송
-                        session["ping_pending"] = False
-
-            # 일반적인 비활성 체크 (ping 없이도)
-            time_since_activity = (now - session["last_activity"]).total_seconds()
-            if time_since_activity > (self.ping_timeout * 2):  # ping timeout의 2배
-                sessions_to_remove.append(session_id)
-                inactive_sessions.append({
-                    "session_id": session_id,
-                    "username": session.get("username", "Anonymous"),
-                    "reason": "inactivity"
-                })
+        """비활성 세션들을 확인하고 정리합니다.
+
+        데드라인이 지난 세션만 확인하므로 비용은 전체 세션 수가 아니라
+        만료 후보 수에 비례합니다.
+        """
+        inactive_sessions = await self.store.collect_expired()
 
         # 비활성 세션들 제거
-        for session_id in sessions_to_remove:
-            await self.disconnect_session(db, session_id)
+        for session_info in inactive_sessions:
+            await self.disconnect_session(db, session_info["session_id"])
 
         return inactive_sessions
 
-    def get_sessions_needing_ping(self) -> list:
-        """ping이 필요한 세션들의 목록을 반환합니다."""
-        now = datetime.now()
-        sessions_needing_ping = []
+    async def get_sessions_needing_ping(self) -> list:
+        """ping이 필요한 세션들을 꺼내 목록으로 반환합니다.
 
-        for session_id, session in self.active_sessions.items():
-            # ping이 pending이 아니고, 마지막 ping으로부터 interval이 지난 경우
-            if not session["ping_pending"]:
-                time_since_ping = (now - session["last_ping"]).total_seconds()
-                if time_since_ping >= self.ping_interval:
-                    sessions_needing_ping.append({
-                        "session_id": session_id,
-                        "username": session.get("username", "Anonymous")
-                    })
+        ping 데드라인이 지난 세션만 확인합니다. 꺼낸 세션은 다음 interval로 재시도가
+        예약되고, send_ping()이 성공하면 그 시점 기준으로 다시 예약됩니다.
+        """
+        return await self.store.due_pings()
 
-        return sessions_needing_ping
+    async def get_sessions_needing_ping_count(self) -> int:
+        """ping이 필요한 세션 수를 예약 상태를 바꾸지 않고 반환합니다."""
+        return await self.store.due_ping_count()
 
 # 전역 세션 매니저 인스턴스
-session_manager = SessionManager()
\ No newline at end of file
+session_manager = SessionManager(create_session_store(), shard_map)
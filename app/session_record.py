@@ -0,0 +1,105 @@
+import time
+from datetime import datetime
+from typing import Optional
+
+# monotonic 시계를 벽시계로 바꾸기 위한 기준점 (프로세스 시작 시 한 번 고정)
+_WALL_ANCHOR = time.time()
+_MONO_ANCHOR = time.monotonic()
+
+
+def mono_to_datetime(mono: float) -> datetime:
+    """time.monotonic() 값을 로컬 datetime으로 변환합니다."""
+    return datetime.fromtimestamp(_WALL_ANCHOR + (mono - _MONO_ANCHOR))
+
+
+def datetime_to_mono(value: datetime) -> float:
+    """로컬 datetime을 time.monotonic() 기준 값으로 변환합니다."""
+    return _MONO_ANCHOR + (value.timestamp() - _WALL_ANCHOR)
+
+
+class SessionRecord:
+    """메모리에 보관하는 세션 상태입니다.
+
+    시간 값은 time.monotonic() float로 저장하고, 기존 dict 형태의 접근
+    (session["last_ping"], session.get("username"))도 그대로 지원합니다.
+    dict 키로 시간 필드를 읽으면 datetime으로 변환해 반환합니다.
+    """
+
+    __slots__ = (
+        "user_id",
+        "username",
+        "message_counter",
+        "connected_at_mono",
+        "last_activity_mono",
+        "last_ping_mono",
+        "ping_pending",
+        "ping_miss_count",
+    )
+
+    # dict 키 -> monotonic 속성
+    _TIME_FIELDS = {
+        "connected_at": "connected_at_mono",
+        "last_activity": "last_activity_mono",
+        "last_ping": "last_ping_mono",
+    }
+    _PLAIN_FIELDS = frozenset(("user_id", "username", "message_counter", "ping_pending", "ping_miss_count"))
+    _KEYS = ("user_id", "username", "message_counter", "connected_at",
+             "last_activity", "last_ping", "ping_pending", "ping_miss_count")
+
+    def __init__(self, user_id: Optional[int], username: Optional[str], now: Optional[float] = None):
+        if now is None:
+            now = time.monotonic()
+        self.user_id = user_id
+        self.username = username
+        self.message_counter = 0
+        self.connected_at_mono = now
+        self.last_activity_mono = now
+        self.last_ping_mono = now
+        self.ping_pending = False
+        self.ping_miss_count = 0
+
+    # dict 호환 API
+    def __getitem__(self, key: str):
+        attr = self._TIME_FIELDS.get(key)
+        if attr is not None:
+            return mono_to_datetime(getattr(self, attr))
+        if key in self._PLAIN_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        attr = self._TIME_FIELDS.get(key)
+        if attr is not None:
+            setattr(self, attr, datetime_to_mono(value))
+        elif key in self._PLAIN_FIELDS:
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._TIME_FIELDS or key in self._PLAIN_FIELDS
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self._KEYS
+
+    def to_tuple(self) -> tuple:
+        """프로세스 간 전송용 튜플로 변환합니다 (__slots__ 순서)."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_tuple(cls, values) -> "SessionRecord":
+        """to_tuple()로 만든 값에서 레코드를 복원합니다."""
+        record = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            setattr(record, name, value)
+        return record
+
+    def to_dict(self) -> dict:
+        """기존 dict 형태로 변환합니다."""
+        return {key: self[key] for key in self._KEYS}
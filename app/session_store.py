@@ -0,0 +1,497 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from .deadline_scheduler import DeadlineScheduler
+from .session_record import SessionRecord
+
+logger = logging.getLogger(__name__)
+
+# 설정되어 있으면 로컬 Unix 소켓 세션 스토어 데몬을 사용 (uvicorn --workers N 용)
+SESSION_STORE_SOCKET = os.getenv("SESSION_STORE_SOCKET", "")
+PING_TIMEOUT = float(os.getenv("PING_TIMEOUT", "45"))  # 초, pong이 없으면 이 시간 후 세션 만료
+PING_INTERVAL = float(os.getenv("PING_INTERVAL", "20"))  # 초마다 ping 전송
+
+
+class SessionStore(ABC):
+    """SessionManager가 사용하는 세션 상태 저장소 인터페이스입니다.
+
+    모든 상태 변경(카운터, ping/pong, 만료 처리)은 저장소 안에서 원자적으로 수행됩니다.
+    """
+
+    ping_interval: float
+    ping_timeout: float
+
+    @abstractmethod
+    async def add(self, session_id: str, user_id: Optional[int], username: Optional[str]) -> SessionRecord:
+        """세션을 등록하고 ping/만료 데드라인을 예약합니다."""
+
+    @abstractmethod
+    async def adopt(self, session_id: str, record: SessionRecord) -> SessionRecord:
+        """다른 프로세스에서 넘겨받은 세션 레코드를 상태 그대로 등록합니다."""
+
+    @abstractmethod
+    async def add_many(self, sessions: List[list]) -> int:
+        """[session_id, user_id, username] 목록을 한 번에 등록하고 등록 수를 반환합니다."""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[SessionRecord]:
+        """세션 레코드를 반환합니다."""
+
+    @abstractmethod
+    async def remove(self, session_id: str) -> Optional[SessionRecord]:
+        """세션을 제거하고 제거된 레코드를 반환합니다."""
+
+    @abstractmethod
+    async def touch(self, session_id: str) -> Optional[float]:
+        """활동 시간을 갱신하고 그 값(monotonic)을 반환합니다. 세션이 없으면 None"""
+
+    @abstractmethod
+    async def next_counter(self, session_id: str) -> int:
+        """메시지 카운터를 1 증가시키고 반환합니다. 세션이 없으면 1"""
+
+    @abstractmethod
+    async def mark_ping(self, session_id: str) -> bool:
+        """ping 전송 상태로 표시하고 다음 ping/timeout 데드라인을 예약합니다."""
+
+    @abstractmethod
+    async def pong(self, session_id: str) -> bool:
+        """pong 응답을 반영합니다."""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """활성 세션 수를 반환합니다."""
+
+    @abstractmethod
+    async def pending_pings(self) -> int:
+        """ping을 보내고 pong을 기다리는 세션 수를 반환합니다."""
+
+    @abstractmethod
+    async def due_pings(self) -> List[dict]:
+        """ping 데드라인이 지났고 pending이 아닌 세션을 꺼내(claim) 목록으로 반환합니다.
+
+        반환된 세션은 다음 interval로 재시도가 예약되므로 다시 호출해도 바로 반환되지 않습니다.
+        데몬을 공유하는 워커 여럿이 호출해도 세션 하나는 한 워커에만 반환됩니다.
+        """
+
+    @abstractmethod
+    async def due_ping_count(self) -> int:
+        """ping 데드라인이 지났고 pending이 아닌 세션 수를 꺼내지 않고 반환합니다 (상태 조회용)."""
+
+    @abstractmethod
+    async def collect_expired(self) -> List[dict]:
+        """만료 데드라인이 지난 세션을 확인해 제거 대상 목록을 반환합니다.
+
+        제거 자체는 호출자가 remove()로 수행합니다 (DB 반영과 함께).
+        """
+
+    async def close(self):
+        """저장소 연결을 정리합니다."""
+
+
+class InMemorySessionStore(SessionStore):
+    """프로세스 내부 dict에 세션을 보관하는 저장소입니다 (기본값)."""
+
+    def __init__(self, ping_interval: float = PING_INTERVAL, ping_timeout: float = PING_TIMEOUT):
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.sessions: Dict[str, SessionRecord] = {}
+        # 데드라인 인덱스: 주기 체크가 전체 세션이 아닌 만료된 세션만 보도록 한다
+        # 키는 모두 session_id 문자열이다. (session_id, kind) 튜플을 키로 쓰면 GC가 추적하는 객체가 되어,
+        # 큰 토큰 dict가 새 키를 넣을 때마다 young 세대로 돌아가 매 gen0 수집마다 전체를 훑게 된다.
+        self._ping_schedule = DeadlineScheduler()
+        self._ping_timeout_schedule = DeadlineScheduler()
+        self._inactivity_schedule = DeadlineScheduler()
+        # ping_pending인 세션 수. /metrics가 조회할 때마다 전체 세션을 훑지 않도록 상태가 바뀔 때 센다
+        self._pending_count = 0
+
+    async def add(self, session_id: str, user_id: Optional[int], username: Optional[str]) -> SessionRecord:
+        mono_now = time.monotonic()
+        session = SessionRecord(user_id, username, mono_now)
+        self.sessions[session_id] = session
+
+        self._ping_schedule.schedule(session_id, mono_now + self.ping_interval)
+        self._inactivity_schedule.schedule(session_id, mono_now + self.ping_timeout * 2)
+        return session
+
+    async def add_many(self, sessions: List[list]) -> int:
+        for session_id, user_id, username in sessions:
+            await self.add(session_id, user_id, username)
+        return len(sessions)
+
+    async def adopt(self, session_id: str, record: SessionRecord) -> SessionRecord:
+        # 같은 호스트의 프로세스끼리는 monotonic 시계를 공유하므로 시각을 그대로 쓴다
+        previous = self.sessions.get(session_id)
+        if previous is not None and previous.ping_pending:
+            self._pending_count -= 1
+        self.sessions[session_id] = record
+        if record.ping_pending:
+            self._pending_count += 1
+        self._ping_schedule.schedule(session_id, record.last_ping_mono + self.ping_interval)
+        self._inactivity_schedule.schedule(session_id, record.last_activity_mono + self.ping_timeout * 2)
+        if record.ping_pending:
+            self._ping_timeout_schedule.schedule(session_id, record.last_ping_mono + self.ping_timeout)
+        return record
+
+    async def get(self, session_id: str) -> Optional[SessionRecord]:
+        return self.sessions.get(session_id)
+
+    async def remove(self, session_id: str) -> Optional[SessionRecord]:
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            if session.ping_pending:
+                self._pending_count -= 1
+            self._ping_schedule.cancel(session_id)
+            self._ping_timeout_schedule.cancel(session_id)
+            self._inactivity_schedule.cancel(session_id)
+        return session
+
+    async def touch(self, session_id: str) -> Optional[float]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        session.last_activity_mono = now
+        return now
+
+    async def next_counter(self, session_id: str) -> int:
+        session = self.sessions.get(session_id)
+        if session:
+            session.message_counter += 1
+            return session.message_counter
+        return 1
+
+    async def mark_ping(self, session_id: str) -> bool:
+        session = self.sessions.get(session_id)
+        if session:
+            mono_now = time.monotonic()
+            session.last_ping_mono = mono_now
+            if not session.ping_pending:
+                session.ping_pending = True
+                self._pending_count += 1
+
+            self._ping_schedule.schedule(session_id, mono_now + self.ping_interval)
+            self._ping_timeout_schedule.schedule(session_id, mono_now + self.ping_timeout)
+            return True
+        return False
+
+    async def pong(self, session_id: str) -> bool:
+        session = self.sessions.get(session_id)
+        if session:
+            mono_now = time.monotonic()
+            if session.ping_pending:
+                session.ping_pending = False
+                self._pending_count -= 1
+            session.ping_miss_count = 0
+            session.last_activity_mono = mono_now
+            if session_id not in self._ping_schedule:
+                # pending 중에 데드라인이 지나 due_pings()에서 꺼내졌으면 다음 ping을 다시 예약
+                self._ping_schedule.schedule(session_id, max(mono_now, session.last_ping_mono + self.ping_interval))
+            return True
+        return False
+
+    async def count(self) -> int:
+        return len(self.sessions)
+
+    async def pending_pings(self) -> int:
+        return self._pending_count
+
+    async def due_pings(self) -> List[dict]:
+        mono_now = time.monotonic()
+        retry_at = mono_now + self.ping_interval
+        sessions_needing_ping = []
+
+        # 데드라인이 지난 항목은 꺼낸다. 남겨 두면 pong을 기다리는 세션이 매 tick 다시 훑어지고,
+        # 데몬을 공유하는 워커들이 같은 세션에 ping을 중복 전송한다.
+        for session_id, _ in self._ping_schedule.pop_due(mono_now):
+            session = self.sessions.get(session_id)
+            # pending 세션은 pong() 또는 ping timeout 처리(collect_expired)가 다시 예약한다
+            if session is None or session.ping_pending:
+                continue
+            # send_ping()이 실패해도 다음 interval에 다시 시도된다 (성공하면 mark_ping()이 덮어씀)
+            self._ping_schedule.schedule(session_id, retry_at)
+            sessions_needing_ping.append({
+                "session_id": session_id,
+                "username": session.username
+            })
+
+        return sessions_needing_ping
+
+    async def due_ping_count(self) -> int:
+        count = 0
+        for session_id in self._ping_schedule.peek_due():
+            session = self.sessions.get(session_id)
+            if session and not session.ping_pending:
+                count += 1
+        return count
+
+    async def collect_expired(self) -> List[dict]:
+        mono_now = time.monotonic()
+        inactivity_limit = self.ping_timeout * 2  # ping timeout의 2배
+        inactive_sessions = []
+        expired = set()
+
+        # 두 스케줄에서 꺼낸 항목을 데드라인 순으로 처리한다
+        due = [(deadline, session_id, "ping_timeout")
+               for session_id, deadline in self._ping_timeout_schedule.pop_due(mono_now)]
+        due.extend((deadline, session_id, "inactivity")
+                   for session_id, deadline in self._inactivity_schedule.pop_due(mono_now))
+        due.sort(key=lambda entry: entry[0])
+
+        for _, session_id, kind in due:
+            session = self.sessions.get(session_id)
+            if not session or session_id in expired:
+                continue
+
+            if kind == "ping_timeout":
+                # pong으로 이미 해제된 ping은 무시
+                if not session.ping_pending:
+                    continue
+
+                session.ping_miss_count += 1
+
+                # 3번 연속 ping을 놓친 경우 세션 제거
+                if session.ping_miss_count >= 3:
+                    expired.add(session_id)
+                    inactive_sessions.append({
+                        "session_id": session_id,
+                        "username": session.username,
+                        "reason": "ping_timeout"
+                    })
+                else:
+                    # ping을 다시 전송 (pending 동안 꺼내진 ping 데드라인을 다시 예약)
+                    session.ping_pending = False
+                    self._pending_count -= 1
+                    if session_id not in self._ping_schedule:
+                        self._ping_schedule.schedule(session_id, mono_now)
+
+            elif kind == "inactivity":
+                # 활동 갱신은 O(1)로 타임스탬프만 바꾸므로 여기서 실제 데드라인을 다시 계산
+                time_since_activity = mono_now - session.last_activity_mono
+                if time_since_activity > inactivity_limit:
+                    expired.add(session_id)
+                    inactive_sessions.append({
+                        "session_id": session_id,
+                        "username": session.username,
+                        "reason": "inactivity"
+                    })
+                else:
+                    self._inactivity_schedule.schedule(
+                        session_id,
+                        mono_now + (inactivity_limit - time_since_activity)
+                    )
+
+        return inactive_sessions
+
+    async def settings(self) -> List[float]:
+        """[ping_interval, ping_timeout] (RemoteSessionStore가 연결할 때 읽어 감)"""
+        return [self.ping_interval, self.ping_timeout]
+
+
+# Unix 소켓 프로토콜: 한 줄에 JSON 하나
+#   요청  [request_id, op, args]
+#   응답  [request_id, ok, result]
+# SessionRecord는 to_tuple() 리스트로 전달한다.
+_RECORD_OPS = frozenset(("add", "adopt", "get", "remove"))
+_ALLOWED_OPS = frozenset((
+    "add", "add_many", "adopt", "get", "remove", "touch", "next_counter", "mark_ping", "pong",
+    "count", "pending_pings", "due_pings", "due_ping_count", "collect_expired", "settings",
+))
+
+
+class RemoteSessionStore(SessionStore):
+    """로컬 Unix 소켓 세션 스토어 데몬을 사용하는 저장소입니다.
+
+    여러 uvicorn 워커가 같은 데몬에 연결해 세션 상태를 공유합니다. 데몬은
+    단일 이벤트 루프에서 명령을 하나씩 처리하므로 모든 연산이 워커 간에 원자적입니다.
+    워커당 연결 하나에서 요청을 파이프라이닝합니다.
+
+    ping 간격과 timeout은 데몬의 스케줄이 기준이므로 연결할 때 데몬에서 읽어 오고,
+    워커에서는 바꿀 수 없습니다 (데몬의 --ping-interval / --ping-timeout으로 설정).
+    """
+
+    def __init__(self, socket_path: str, ping_interval: float = PING_INTERVAL, ping_timeout: float = PING_TIMEOUT):
+        self.socket_path = socket_path
+        # 데몬에 연결하기 전까지 쓰는 값
+        self._ping_interval = ping_interval
+        self._ping_timeout = ping_timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task = None
+        self._connect_lock = asyncio.Lock()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+            self._reader_task = asyncio.create_task(self._read_responses())
+            self._ping_interval, self._ping_timeout = await self._call("settings")
+
+    @property
+    def ping_interval(self) -> float:
+        return self._ping_interval
+
+    @ping_interval.setter
+    def ping_interval(self, value: float):
+        raise AttributeError("ping_interval is configured on the session store daemon (--ping-interval)")
+
+    @property
+    def ping_timeout(self) -> float:
+        return self._ping_timeout
+
+    @ping_timeout.setter
+    def ping_timeout(self, value: float):
+        raise AttributeError("ping_timeout is configured on the session store daemon (--ping-timeout)")
+
+    async def _read_responses(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    raise ConnectionError("session store connection closed")
+                request_id, ok, result = json.loads(line)
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(f"session store error: {result}"))
+        except Exception as e:
+            logger.error(f"Session store connection lost: {e}")
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(str(e)))
+            self._pending.clear()
+
+    async def _call(self, op: str, *args):
+        if self._writer is None:
+            await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps([request_id, op, args]).encode() + b"\n")
+        return await future
+
+    async def add(self, session_id, user_id, username):
+        return SessionRecord.from_tuple(await self._call("add", session_id, user_id, username))
+
+    async def add_many(self, sessions):
+        return await self._call("add_many", sessions)
+
+    async def adopt(self, session_id, record):
+        return SessionRecord.from_tuple(await self._call("adopt", session_id, record.to_tuple()))
+
+    async def get(self, session_id):
+        values = await self._call("get", session_id)
+        return SessionRecord.from_tuple(values) if values is not None else None
+
+    async def remove(self, session_id):
+        values = await self._call("remove", session_id)
+        return SessionRecord.from_tuple(values) if values is not None else None
+
+    async def touch(self, session_id):
+        return await self._call("touch", session_id)
+
+    async def next_counter(self, session_id):
+        return await self._call("next_counter", session_id)
+
+    async def mark_ping(self, session_id):
+        return await self._call("mark_ping", session_id)
+
+    async def pong(self, session_id):
+        return await self._call("pong", session_id)
+
+    async def count(self):
+        return await self._call("count")
+
+    async def pending_pings(self):
+        return await self._call("pending_pings")
+
+    async def due_pings(self):
+        return await self._call("due_pings")
+
+    async def due_ping_count(self):
+        return await self._call("due_ping_count")
+
+    async def collect_expired(self):
+        return await self._call("collect_expired")
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
+
+
+async def serve_session_store(socket_path: str, store: Optional[InMemorySessionStore] = None):
+    """세션 스토어 데몬을 실행합니다."""
+    store = store or InMemorySessionStore()
+
+    async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request_id, op, args = json.loads(line)
+                try:
+                    if op not in _ALLOWED_OPS:
+                        raise ValueError(f"unknown op {op}")
+                    if op == "adopt":
+                        args = (args[0], SessionRecord.from_tuple(args[1]))
+                    result = await getattr(store, op)(*args)
+                    if op in _RECORD_OPS and result is not None:
+                        result = result.to_tuple()
+                    response = [request_id, True, result]
+                except Exception as e:
+                    response = [request_id, False, str(e)]
+                writer.write(json.dumps(response).encode() + b"\n")
+                # 클라이언트가 응답을 읽지 않는 경우에만 대기
+                if writer.transport.get_write_buffer_size() > 1 << 20:
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(handle_client, path=socket_path)
+    logger.info(f"Session store listening on {socket_path}")
+    async with server:
+        await server.serve_forever()
+
+
+def create_session_store() -> SessionStore:
+    """환경 변수에 따라 세션 저장소를 만듭니다."""
+    if SESSION_STORE_SOCKET:
+        return RemoteSessionStore(SESSION_STORE_SOCKET)
+    return InMemorySessionStore()
+
+
+if __name__ == "__main__":
+    # python -m app.session_store --socket /tmp/subtree-sessions.sock
+    parser = argparse.ArgumentParser(description="Session store daemon shared by uvicorn workers")
+    parser.add_argument("--socket", default=SESSION_STORE_SOCKET or "/tmp/subtree-sessions.sock")
+    parser.add_argument("--ping-interval", type=float, default=PING_INTERVAL)
+    parser.add_argument("--ping-timeout", type=float, default=PING_TIMEOUT)
+    options = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve_session_store(
+        options.socket,
+        InMemorySessionStore(options.ping_interval, options.ping_timeout)
+    ))
@@ -0,0 +1,369 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import socket
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote_to_bytes
+
+from .sharding import SHARD_NODES, SHARD_ADMIN_TOKEN, SHARD_ADMIN_HEADER, HashRing, check_admin_token, parse_nodes
+
+logger = logging.getLogger(__name__)
+
+# 세션 ID가 들어 있는 경로: /api/session/{id}/..., /stream/{id}, /ws/{id}
+_SESSION_PREFIXES = (b"/api/session/", b"/stream/", b"/ws/")
+# 위 prefix 아래지만 세션 ID가 아닌 경로. /stream/multiplex는 샤딩 중에는 샤드가 409로 거절한다
+_NON_SESSION_SEGMENTS = frozenset((b"create", b"batch", b"multiplex"))
+_ADMIN_PATH = b"/_shards"
+# 샤드끼리만 쓰는 관리 API는 클라이언트 요청으로 전달하지 않는다
+_SHARD_API_PATH = b"/api/system/shard/"
+_STATUS_TEXT = {200: b"OK", 403: b"Forbidden", 404: b"Not Found", 405: b"Method Not Allowed", 409: b"Conflict"}
+_HEAD_LIMIT = 1 << 16
+
+
+def session_id_from_path(target: bytes) -> Optional[str]:
+    """요청 경로에서 세션 ID를 꺼냅니다. 세션 경로가 아니면 None"""
+    path = target.split(b"?", 1)[0]
+    for prefix in _SESSION_PREFIXES:
+        if path.startswith(prefix):
+            segment = path[len(prefix):].split(b"/", 1)[0]
+            if segment and segment not in _NON_SESSION_SEGMENTS:
+                return segment.decode("latin-1")
+    return None
+
+
+def _is_shard_api(target: bytes) -> bool:
+    # 앱은 퍼센트 인코딩을 푼 경로로 라우팅하므로 같은 기준으로 비교한다 (shard%2Fhandover 등)
+    return unquote_to_bytes(target.split(b"?", 1)[0]).startswith(_SHARD_API_PATH)
+
+
+def _parse_head(head: bytes) -> Tuple[bytes, Dict[bytes, bytes]]:
+    lines = head.split(b"\r\n")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+class _Upstream:
+    """클라이언트 연결 하나가 샤드 하나에 대해 유지하는 keep-alive 연결"""
+
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class ShardProxy:
+    """세션 요청을 consistent hash 링의 주인 샤드로 보내는 HTTP/1.1 프록시입니다.
+
+    요청마다 헤더만 파싱하고 본문은 그대로 전달합니다. chunked 응답(SSE)은
+    청크 단위로 바로 흘려보내고, Upgrade(WebSocket) 요청은 양방향으로 이어 붙입니다.
+    세션과 무관한 요청은 샤드들에 돌아가며 보냅니다.
+
+    /_shards 관리 API는 admin_token(X-Shard-Admin-Token 헤더)이 맞아야 하고, 토큰이 없으면
+    꺼져 있습니다. mutable=False(프로세스 여러 개)면 노드 구성을 바꿀 수 없습니다.
+    """
+
+    def __init__(self, nodes: Dict[str, str], admin_token: str = SHARD_ADMIN_TOKEN, mutable: bool = True):
+        self.admin_token = admin_token
+        self.mutable = mutable
+        self.nodes: Dict[str, Tuple[str, int]] = {}
+        self.ring = HashRing()
+        self._round_robin = itertools.cycle([])
+        self._rebalance_lock = asyncio.Lock()
+        self._set_nodes(nodes)
+
+    def _set_nodes(self, nodes: Dict[str, str]):
+        parsed = {}
+        for name, address in nodes.items():
+            host, _, port = address.rpartition(":")
+            parsed[name] = (host or "127.0.0.1", int(port))
+        for name in list(self.nodes):
+            if name not in parsed:
+                self.ring.remove_node(name)
+        for name in parsed:
+            self.ring.add_node(name)
+        self.nodes = parsed
+        self._round_robin = itertools.cycle(sorted(parsed))
+
+    def route(self, target: bytes) -> str:
+        session_id = session_id_from_path(target)
+        if session_id is not None:
+            return self.ring.owner(session_id)
+        return next(self._round_robin)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        upstreams: Dict[str, _Upstream] = {}
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                request_line, headers = _parse_head(head)
+                method, target, _ = request_line.split(b" ", 2)
+
+                if target.startswith(_ADMIN_PATH):
+                    await self._handle_admin(method, headers, reader, writer)
+                    continue
+                if _is_shard_api(target):
+                    await _read_body(reader, headers)
+                    await _write_json(writer, 404, {"detail": "Not Found"})
+                    continue
+
+                node = self.route(target)
+                upstream = upstreams.get(node)
+                if upstream is None or upstream.writer.is_closing():
+                    host, port = self.nodes[node]
+                    upstream = upstreams[node] = _Upstream(*await asyncio.open_connection(host, port))
+
+                upstream.writer.write(head)
+                await _copy_body(reader, upstream.writer, headers)
+
+                if b"upgrade" in headers:
+                    await self._splice(reader, writer, upstream)
+                    break
+
+                keep_alive = await _relay_response(upstream, writer, method)
+                if not keep_alive or headers.get(b"connection", b"").lower() == b"close":
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"Proxy connection closed: {e}")
+        except Exception as e:
+            logger.error(f"Proxy error: {e}")
+        finally:
+            for upstream in upstreams.values():
+                upstream.close()
+            writer.close()
+
+    async def _splice(self, reader, writer, upstream: _Upstream):
+        async def pipe(source: asyncio.StreamReader, target: asyncio.StreamWriter):
+            try:
+                while True:
+                    data = await source.read(65536)
+                    if not data:
+                        break
+                    target.write(data)
+                    await target.drain()
+            except ConnectionError:
+                pass
+            finally:
+                target.close()
+
+        await asyncio.gather(pipe(reader, upstream.writer), pipe(upstream.reader, writer))
+
+    async def _handle_admin(self, method: bytes, headers, reader, writer):
+        body = await _read_body(reader, headers)
+        if not self.admin_token:
+            status, payload = 403, {"detail": "Shard admin API is disabled (SHARD_ADMIN_TOKEN is not set)"}
+        elif not check_admin_token(headers.get(SHARD_ADMIN_HEADER.encode()), self.admin_token):
+            status, payload = 403, {"detail": "Invalid shard admin token"}
+        elif method == b"GET":
+            status, payload = 200, {"nodes": {name: f"{host}:{port}" for name, (host, port) in self.nodes.items()}}
+        elif method != b"POST":
+            status, payload = 405, {"detail": "Method not allowed"}
+        elif not self.mutable:
+            # SO_REUSEPORT로 나눠 받는 다른 프록시 프로세스의 링은 바뀌지 않으므로 거부한다
+            status, payload = 409, {"detail": "Node map is fixed with --processes > 1; restart with new --nodes"}
+        else:
+            status, payload = 200, await self.rebalance(json.loads(body)["nodes"])
+        await _write_json(writer, status, payload)
+
+    async def rebalance(self, nodes: Dict[str, str]) -> dict:
+        """샤드 구성을 바꾸고 주인이 바뀐 세션만 새 샤드로 옮깁니다.
+
+        1) 기존+새 샤드 전부에 새 구성을 알리고(handover) 인계할 세션을 받은 뒤
+        2) 새 주인 샤드에 전달(adopt)하고 3) 프록시 라우팅을 바꿉니다.
+        인계 중에 들어온 해당 세션 요청은 404가 될 수 있습니다.
+        """
+        async with self._rebalance_lock:
+            old_nodes = {name: f"{host}:{port}" for name, (host, port) in self.nodes.items()}
+            targets = {**old_nodes, **nodes}
+            moved: Dict[str, List[list]] = {}
+            results = await asyncio.gather(*(
+                _request_json(address, "POST", "/api/system/shard/handover", {"nodes": nodes}, self.admin_token)
+                for address in targets.values()
+            ))
+            for result in results:
+                for owner, sessions in result["moved"].items():
+                    moved.setdefault(owner, []).extend(sessions)
+            await asyncio.gather(*(
+                _request_json(nodes[owner], "POST", "/api/system/shard/adopt", {"sessions": sessions}, self.admin_token)
+                for owner, sessions in moved.items()
+            ))
+            self._set_nodes(nodes)
+            moved_count = sum(len(sessions) for sessions in moved.values())
+            logger.info(f"Rebalanced shards {sorted(old_nodes)} -> {sorted(nodes)}: {moved_count} sessions moved")
+            return {"nodes": nodes, "moved": {owner: len(sessions) for owner, sessions in moved.items()},
+                    "moved_count": moved_count}
+
+
+async def _read_body(reader: asyncio.StreamReader, headers) -> bytes:
+    """프록시가 직접 응답하는 요청의 본문을 읽습니다."""
+    length = int(headers.get(b"content-length", 0))
+    return await reader.readexactly(length) if length else b""
+
+
+async def _write_json(writer: asyncio.StreamWriter, status: int, payload):
+    data = json.dumps(payload).encode()
+    writer.write(b"HTTP/1.1 " + str(status).encode() + b" " + _STATUS_TEXT[status] +
+                 b"\r\ncontent-type: application/json\r\ncontent-length: " + str(len(data)).encode() +
+                 b"\r\n\r\n" + data)
+    await writer.drain()
+
+
+async def _copy_body(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers) -> None:
+    if b"content-length" in headers:
+        remaining = int(headers[b"content-length"])
+        while remaining:
+            data = await reader.read(min(remaining, 65536))
+            if not data:
+                raise ConnectionError("client closed during request body")
+            writer.write(data)
+            remaining -= len(data)
+    elif headers.get(b"transfer-encoding", b"").lower() == b"chunked":
+        await _copy_chunked(reader, writer)
+
+
+async def _copy_chunked(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    while True:
+        size_line = await reader.readuntil(b"\r\n")
+        size = int(size_line.split(b";", 1)[0], 16)
+        writer.write(size_line)
+        if size == 0:
+            # trailer 헤더 + 빈 줄
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                writer.write(line)
+                if line == b"\r\n":
+                    break
+            await writer.drain()
+            return
+        writer.write(await reader.readexactly(size + 2))
+        # SSE 청크는 쌓아두지 않고 바로 클라이언트로 보낸다
+        await writer.drain()
+
+
+async def _relay_response(upstream: _Upstream, writer: asyncio.StreamWriter, method: bytes) -> bool:
+    """응답 하나를 클라이언트로 전달하고 연결을 계속 쓸 수 있는지 반환합니다."""
+    head = await upstream.reader.readuntil(b"\r\n\r\n")
+    status_line, headers = _parse_head(head)
+    status = int(status_line.split(b" ", 2)[1])
+    writer.write(head)
+
+    if method == b"HEAD" or status in (204, 304) or 100 <= status < 200:
+        pass
+    elif b"content-length" in headers:
+        remaining = int(headers[b"content-length"])
+        while remaining:
+            data = await upstream.reader.read(min(remaining, 65536))
+            if not data:
+                raise ConnectionError("upstream closed during response body")
+            writer.write(data)
+            remaining -= len(data)
+    elif headers.get(b"transfer-encoding", b"").lower() == b"chunked":
+        await _copy_chunked(upstream.reader, writer)
+    else:
+        # 길이를 모르는 응답: 연결 종료까지 전달
+        while True:
+            data = await upstream.reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+        await writer.drain()
+        upstream.close()
+        return False
+
+    await writer.drain()
+    if headers.get(b"connection", b"").lower() == b"close":
+        upstream.close()
+        return False
+    return True
+
+
+async def _request_json(address: str, method: str, path: str, payload, admin_token: str) -> dict:
+    """샤드 관리 API 호출용 단발 HTTP 요청"""
+    host, _, port = address.rpartition(":")
+    reader, writer = await asyncio.open_connection(host or "127.0.0.1", int(port))
+    try:
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nhost: {address}\r\ncontent-type: application/json\r\n"
+            f"{SHARD_ADMIN_HEADER}: {admin_token}\r\n"
+            f"content-length: {len(body)}\r\nconnection: close\r\n\r\n".encode() + body
+        )
+        head = await reader.readuntil(b"\r\n\r\n")
+        status_line, headers = _parse_head(head)
+        status = int(status_line.split(b" ", 2)[1])
+        if b"content-length" in headers:
+            data = await reader.readexactly(int(headers[b"content-length"]))
+        else:
+            data = await reader.read()
+        if status != 200:
+            raise RuntimeError(f"{address}{path} returned {status}: {data[:200]!r}")
+        return json.loads(data)
+    finally:
+        writer.close()
+
+
+async def serve_shard_proxy(host: str, port: int, nodes: Dict[str, str], sock: Optional[socket.socket] = None,
+                            mutable: bool = True):
+    """샤드 프록시를 실행합니다."""
+    proxy = ShardProxy(nodes, mutable=mutable)
+    if sock is not None:
+        server = await asyncio.start_server(proxy.handle_client, sock=sock, limit=_HEAD_LIMIT)
+    else:
+        server = await asyncio.start_server(proxy.handle_client, host, port, limit=_HEAD_LIMIT)
+    logger.info(f"Shard proxy listening on {host}:{port} -> {sorted(nodes)}")
+    async with server:
+        await server.serve_forever()
+
+
+def _run_process(host: str, port: int, nodes: Dict[str, str]):
+    # 프록시 프로세스 여러 개가 SO_REUSEPORT로 같은 포트를 나눠 받는다
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    logging.basicConfig(level=logging.INFO)
+    # 노드 구성 변경은 받은 프로세스에만 적용되므로 여러 프로세스에서는 구성을 고정한다
+    asyncio.run(serve_shard_proxy(host, port, nodes, sock, mutable=False))
+
+
+if __name__ == "__main__":
+    # python -m app.shard_proxy --port 8001 --nodes "shard-0=127.0.0.1:9001,shard-1=127.0.0.1:9002"
+    parser = argparse.ArgumentParser(description="Session-affinity proxy in front of shard processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--nodes", default=SHARD_NODES, help="name=host:port,... (기본: SHARD_NODES)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="프록시 프로세스 수 (2 이상이면 POST /_shards로 노드 구성을 바꿀 수 없음)")
+    options = parser.parse_args()
+
+    nodes = parse_nodes(options.nodes)
+    if not nodes:
+        parser.error("--nodes or SHARD_NODES is required")
+    if options.processes == 1:
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(serve_shard_proxy(options.host, options.port, nodes))
+    else:
+        processes = [
+            multiprocessing.Process(target=_run_process, args=(options.host, options.port, nodes))
+            for _ in range(options.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
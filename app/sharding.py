@@ -0,0 +1,147 @@
+import bisect
+import hashlib
+import hmac
+import os
+import uuid
+from typing import Dict, Iterable, List, Optional, Union
+
+# 세션 샤딩 설정 (프로세스마다 하나의 샤드, 앞단은 python -m app.shard_proxy)
+#   SHARD_NODES="shard-0=127.0.0.1:9001,shard-1=127.0.0.1:9002"
+#   SHARD_ID="shard-0"
+SHARD_NODES = os.getenv("SHARD_NODES", "")
+SHARD_ID = os.getenv("SHARD_ID", "")
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "128"))
+# 샤드 관리 API(샤드의 /api/system/shard/handover·adopt, 프록시의 /_shards) 공유 비밀.
+# 비어 있으면 관리 API가 꺼져 있어 샤드 구성을 바꿀 수 없다. 샤드와 프록시에 같은 값을 설정한다.
+SHARD_ADMIN_TOKEN = os.getenv("SHARD_ADMIN_TOKEN", "")
+SHARD_ADMIN_HEADER = "x-shard-admin-token"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def check_admin_token(token: Union[str, bytes, None], expected: str = SHARD_ADMIN_TOKEN) -> bool:
+    """관리 API 요청의 토큰을 확인합니다. 설정된 토큰이 없으면 항상 False"""
+    if not expected or token is None:
+        return False
+    if isinstance(token, str):
+        token = token.encode()
+    return hmac.compare_digest(token, expected.encode())
+
+
+def parse_nodes(spec: str) -> Dict[str, str]:
+    """"name=host:port,..." 형식의 노드 목록을 {name: "host:port"}로 변환합니다."""
+    nodes = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, address = item.partition("=")
+        nodes[name.strip()] = address.strip()
+    return nodes
+
+
+class HashRing:
+    """가상 노드를 사용하는 consistent hash 링입니다.
+
+    노드를 추가/제거하면 해당 노드와 인접한 구간의 키만 이동하므로
+    N개 노드에서 하나를 추가할 때 약 1/(N+1)의 키만 주인이 바뀝니다.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = SHARD_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def add_node(self, node: str):
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove_node(self, node: str):
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def owner(self, key: str) -> Optional[str]:
+        """키를 소유한 노드 이름을 반환합니다. 노드가 없으면 None"""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key))
+        if index == len(self._points):
+            index = 0
+        return self._owners[index]
+
+
+class ShardMap:
+    """이 프로세스가 보는 샤드 구성입니다.
+
+    세션 ID는 여전히 UUID이지만, 생성 시 링에서 이 샤드가 소유하는 값만 골라
+    프록시가 ID만 보고 주인 프로세스로 라우팅할 수 있게 합니다.
+    """
+
+    def __init__(self, shard_id: str = "", nodes: Optional[Dict[str, str]] = None, vnodes: int = SHARD_VNODES):
+        self.shard_id = shard_id
+        self.nodes: Dict[str, str] = dict(nodes or {})
+        self.ring = HashRing(self.nodes, vnodes)
+
+    @classmethod
+    def from_env(cls) -> "ShardMap":
+        return cls(SHARD_ID, parse_nodes(SHARD_NODES))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.shard_id and self.nodes)
+
+    def owner(self, session_id: str) -> Optional[str]:
+        return self.ring.owner(session_id)
+
+    def owns(self, session_id: str) -> bool:
+        """이 샤드가 세션을 소유하는지 확인합니다. 샤딩을 쓰지 않으면 항상 True"""
+        return not self.enabled or self.ring.owner(session_id) == self.shard_id
+
+    def new_session_id(self) -> str:
+        """이 샤드가 소유하는 새 세션 ID를 만듭니다 (평균 N회 uuid4 생성)."""
+        if not self.enabled or self.shard_id not in self.nodes:
+            return str(uuid.uuid4())
+        while True:
+            session_id = str(uuid.uuid4())
+            if self.ring.owner(session_id) == self.shard_id:
+                return session_id
+
+    def update(self, nodes: Dict[str, str]):
+        """노드 구성을 바꿉니다. 바뀐 노드만 링에 추가/제거합니다."""
+        for node in list(self.nodes):
+            if node not in nodes:
+                self.ring.remove_node(node)
+        for node in nodes:
+            if node not in self.nodes:
+                self.ring.add_node(node)
+        self.nodes = dict(nodes)
+
+    def get_status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "shard_id": self.shard_id or None,
+            "nodes": self.nodes,
+        }
+
+
+# 전역 샤드 구성 인스턴스
+shard_map = ShardMap.from_env()
@@ -0,0 +1,229 @@
+import json
+import os
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+import anyio
+from fastapi.responses import StreamingResponse
+
+from .metrics import metrics, sse_send_seconds, METRICS_SAMPLE_EVERY
+from .outbound import ControlFrame, OutboundQueue, SSE_OVERFLOW_POLICY
+from .stream_registry import stream_registry
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json으로 동작
+    orjson = None
+
+_stdlib_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+_DATA = b"data: "
+_EVENT = b"event: "
+_ID = b"id: "
+_RETRY = b"retry: "
+_LINE_END = b"\n"
+_FRAME_END = b"\n\n"
+
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))  # 초, 0이면 heartbeat 끔
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # 프록시가 스트림을 버퍼링하지 않도록
+}
+
+
+def _stdlib_dumps(data: Any) -> bytes:
+    return _stdlib_encoder.encode(data).encode()
+
+
+def dumps(data: Any) -> bytes:
+    """JSON을 bytes로 직렬화합니다. orjson이 있으면 orjson을 사용합니다."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return _stdlib_dumps(data)
+
+
+def encode_event(
+    data: Any,
+    event: Optional[str] = None,
+    id: Optional[Any] = None,
+    retry: Optional[int] = None,
+) -> bytes:
+    """SSE 프레임 하나를 bytes로 인코딩합니다.
+
+    data가 bytes면 이미 직렬화된 payload로 보고 그대로 사용합니다.
+    """
+    payload = data if isinstance(data, bytes) else dumps(data)
+    if event is None and id is None and retry is None:
+        return _DATA + payload + _FRAME_END
+
+    parts = []
+    if event is not None:
+        parts.append(_EVENT + event.encode() + _LINE_END)
+    if id is not None:
+        parts.append(_ID + str(id).encode() + _LINE_END)
+    if retry is not None:
+        parts.append(_RETRY + str(int(retry)).encode() + _LINE_END)
+    if _LINE_END in payload:
+        # payload에 줄바꿈이 있으면 data: 줄을 나눠야 한다 (JSON 직렬화 결과에는 없음)
+        parts.extend(_DATA + line + _LINE_END for line in payload.split(_LINE_END))
+        parts.append(_LINE_END)
+    else:
+        parts.append(_DATA + payload + _FRAME_END)
+    return b"".join(parts)
+
+
+def event_payloads(frames: bytes) -> List[bytes]:
+    """인코딩된 SSE 프레임(여러 개 이어 붙인 것 포함)에서 data payload만 꺼냅니다.
+
+    message_log에 SSE 프레임으로 보관된 메시지를 다른 전송 방식으로 다시 보낼 때 사용합니다.
+    """
+    payloads = []
+    for frame in frames.split(_FRAME_END):
+        lines = [line[len(_DATA):] for line in frame.split(_LINE_END) if line.startswith(_DATA)]
+        if lines:
+            payloads.append(_LINE_END.join(lines))
+    return payloads
+
+
+def encode_comment(text: str = "") -> bytes:
+    """클라이언트가 무시하는 SSE 주석 프레임을 인코딩합니다."""
+    return b": " + text.encode() + _FRAME_END
+
+
+class FrameTemplate:
+    """timestamp만 바뀌는 프레임의 정적 부분을 미리 인코딩해 둡니다.
+
+    예: ping_required, session_disconnected 처럼 본문이 고정된 이벤트.
+    이런 이벤트는 제어 프레임이므로 ControlFrame을 반환해 overflow 정책으로 버려지지 않게 합니다.
+    """
+
+    __slots__ = ("_head", "_payload_head")
+
+    def __init__(self, static_fields: dict):
+        if not static_fields:
+            raise ValueError("static_fields must not be empty")
+        body = dumps(static_fields)
+        self._payload_head = body[:-1] + b',"timestamp":'
+        self._head = _DATA + self._payload_head
+
+    def render(self, timestamp: Optional[float] = None) -> ControlFrame:
+        """현재 시간(또는 주어진 timestamp)으로 프레임을 완성합니다."""
+        if timestamp is None:
+            timestamp = time.time()
+        return ControlFrame(self._head + repr(timestamp).encode() + b"}" + _FRAME_END)
+
+    def render_payload(self, timestamp: Optional[float] = None) -> ControlFrame:
+        """SSE 줄 구분 없이 JSON payload만 완성합니다 (WebSocket 프레임용)."""
+        if timestamp is None:
+            timestamp = time.time()
+        return ControlFrame(self._payload_head + repr(timestamp).encode() + b"}")
+
+
+_KEEPALIVE = encode_comment("keepalive")
+
+
+class SSEResponse(StreamingResponse):
+    """연결 종료를 능동적으로 감지하고 느린 클라이언트를 격리하는 SSE 응답입니다.
+
+    - 프레임 생성(producer)과 소켓 쓰기(writer)를 분리하고 그 사이에 크기가 제한된
+      OutboundQueue를 둡니다. 클라이언트가 느려 큐가 넘치면 overflow 정책
+      (drop_oldest, coalesce, disconnect)을 적용합니다. ControlFrame은 버리지 않습니다.
+    - http.disconnect를 함께 기다리다가 받으면 즉시 전송을 멈추고 제너레이터를 닫습니다.
+      제너레이터의 finally(구독 해제, DB 세션 반환)가 바로 실행됩니다.
+    - heartbeat초 동안 보낸 것이 없으면 `: keepalive` 주석을 보내, 응답 없는(half-open)
+      연결이 쓰기 실패로 드러나게 합니다.
+    - 열린 동안 stream_registry에 등록됩니다.
+    """
+
+    def __init__(self, frames: AsyncIterator[bytes], kind: str, session_id: Optional[str] = None,
+                 heartbeat: float = SSE_HEARTBEAT_INTERVAL, overflow: str = SSE_OVERFLOW_POLICY):
+        super().__init__(frames, media_type="text/event-stream", headers=SSE_HEADERS)
+        self.kind = kind
+        self.session_id = session_id
+        self.heartbeat = heartbeat
+        self.overflow = overflow
+
+    async def __call__(self, scope, receive, send) -> None:
+        client = scope.get("client")
+        queue = OutboundQueue(self.overflow)
+        handle = stream_registry.open(self.kind, self.session_id,
+                                      f"{client[0]}:{client[1]}" if client else None, queue)
+        reason = "completed"
+        # 쓰기 시간은 스트림별로 sample_every번에 한 번만 잰다 (0이면 재지 않음)
+        sample_every = METRICS_SAMPLE_EVERY if metrics.enabled else 0
+        writes = 0
+
+        async def watch_disconnect(task_group):
+            nonlocal reason
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    reason = "client_disconnect"
+                    task_group.cancel_scope.cancel()
+                    return
+
+        async def produce(task_group):
+            nonlocal reason
+            async for chunk in self.body_iterator:
+                if not queue.put(chunk):
+                    # disconnect 정책: 따라오지 못하는 클라이언트는 끊는다
+                    reason = "slow_consumer"
+                    task_group.cancel_scope.cancel()
+                    return
+            queue.close()
+
+        async def keepalive():
+            while True:
+                await anyio.sleep(max(handle.last_write + self.heartbeat - time.monotonic(), 0))
+                if not len(queue) and time.monotonic() - handle.last_write >= self.heartbeat:
+                    queue.put(_KEEPALIVE)
+
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(watch_disconnect, task_group)
+                task_group.start_soon(produce, task_group)
+                if self.heartbeat > 0:
+                    task_group.start_soon(keepalive)
+                try:
+                    await send({"type": "http.response.start", "status": self.status_code,
+                                "headers": self.raw_headers})
+                    while True:
+                        chunks = await queue.get_many()
+                        if chunks is None:
+                            break
+                        chunk = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+                        # keepalive 주석은 SSE 전송량(frames, bytes_sent)에 넣지 않는다
+                        heartbeats = sum(1 for item in chunks if item is _KEEPALIVE)
+                        writes += 1
+                        if sample_every and not writes % sample_every:
+                            started = time.perf_counter()
+                            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                            sse_send_seconds.observe(time.perf_counter() - started)
+                        else:
+                            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                        handle.wrote(len(chunk) - heartbeats * len(_KEEPALIVE), len(chunks) - heartbeats, heartbeats)
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                except OSError:
+                    # 쓰기 실패 (연결이 이미 끊김)
+                    reason = "write_failed"
+                task_group.cancel_scope.cancel()
+        except BaseException as e:
+            if reason == "completed":
+                reason = "cancelled" if isinstance(e, anyio.get_cancelled_exc_class()) else "error"
+            raise
+        finally:
+            queue.discard()
+            # 프레임 사이(yield 지점)에서 멈춘 제너레이터도 finally가 바로 실행되도록 닫는다
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                with anyio.CancelScope(shield=True):
+                    await aclose()
+            stream_registry.close(handle, reason)
+
+
+def sse_response(frames: AsyncIterator[bytes], kind: str = "stream", session_id: Optional[str] = None,
+                 overflow: str = SSE_OVERFLOW_POLICY) -> SSEResponse:
+    """bytes 프레임 제너레이터를 text/event-stream 응답으로 감쌉니다."""
+    return SSEResponse(frames, kind, session_id, overflow=overflow)
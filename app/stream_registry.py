@@ -0,0 +1,145 @@
+import itertools
+import time
+from typing import Dict, Optional
+
+from .outbound import OutboundQueue, buffer_budget
+
+
+class StreamHandle:
+    """열린 SSE 스트림 하나의 상태입니다."""
+
+    __slots__ = ("id", "kind", "session_id", "client", "queue", "opened_at", "last_write",
+                 "frames", "bytes_sent", "heartbeats")
+
+    def __init__(self, stream_id: int, kind: str, session_id: Optional[str], client: Optional[str],
+                 queue: Optional[OutboundQueue] = None):
+        now = time.monotonic()
+        self.id = stream_id
+        self.kind = kind
+        self.session_id = session_id
+        self.client = client
+        self.queue = queue
+        self.opened_at = now
+        self.last_write = now
+        self.frames = 0
+        self.bytes_sent = 0
+        self.heartbeats = 0
+
+    def wrote(self, size: int, frames: int = 1, heartbeats: int = 0):
+        """소켓 쓰기 한 번을 기록합니다. size와 frames에는 heartbeat 주석이 들어가지 않습니다.
+
+        heartbeat는 heartbeats로만 세므로 frames/bytes_sent(/metrics의 SSE 전송량)를 늘리지 않습니다.
+        """
+        self.last_write = time.monotonic()
+        self.bytes_sent += size
+        self.frames += frames
+        self.heartbeats += heartbeats
+
+    def as_dict(self, now: float) -> dict:
+        queue = self.queue
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "session_id": self.session_id,
+            "client": self.client,
+            "age": now - self.opened_at,
+            "idle": now - self.last_write,
+            "frames": self.frames,
+            "bytes_sent": self.bytes_sent,
+            "heartbeats": self.heartbeats,
+            "overflow": queue.policy if queue is not None else None,
+            "queued_frames": len(queue) if queue is not None else 0,
+            "queued_bytes": queue.queued_bytes if queue is not None else 0,
+            "lag": queue.lag(now) if queue is not None else 0.0,
+            "max_lag": queue.max_lag if queue is not None else 0.0,
+            "dropped": queue.dropped if queue is not None else 0,
+            "coalesced": queue.coalesced if queue is not None else 0,
+        }
+
+
+class StreamRegistry:
+    """프로세스에 열려 있는 SSE 스트림 목록과 종료 사유별 통계입니다."""
+
+    def __init__(self):
+        self._streams: Dict[int, StreamHandle] = {}
+        self._ids = itertools.count(1)
+        self.opened = 0
+        self.closed: Dict[str, int] = {}  # 종료 사유 -> 수
+        self.total_duration = 0.0
+        # 닫힌 스트림의 큐/전송 통계 누적
+        self.dropped = 0
+        self.coalesced = 0
+        self.sent: Dict[str, list] = {}  # 종류 -> [frames, bytes]
+
+    def open(self, kind: str, session_id: Optional[str] = None, client: Optional[str] = None,
+             queue: Optional[OutboundQueue] = None) -> StreamHandle:
+        handle = StreamHandle(next(self._ids), kind, session_id, client, queue)
+        self._streams[handle.id] = handle
+        self.opened += 1
+        return handle
+
+    def close(self, handle: StreamHandle, reason: str):
+        if self._streams.pop(handle.id, None) is None:
+            return
+        self.closed[reason] = self.closed.get(reason, 0) + 1
+        self.total_duration += time.monotonic() - handle.opened_at
+        if handle.queue is not None:
+            self.dropped += handle.queue.dropped
+            self.coalesced += handle.queue.coalesced
+        sent = self.sent.setdefault(handle.kind, [0, 0])
+        sent[0] += handle.frames
+        sent[1] += handle.bytes_sent
+
+    def count(self, session_id: Optional[str] = None) -> int:
+        if session_id is None:
+            return len(self._streams)
+        return sum(1 for handle in self._streams.values() if handle.session_id == session_id)
+
+    def sent_totals(self) -> Dict[str, list]:
+        """종류별 누적 전송 [frames, bytes] (열린 스트림 포함)"""
+        totals = {kind: list(sent) for kind, sent in self.sent.items()}
+        for handle in self._streams.values():
+            sent = totals.setdefault(handle.kind, [0, 0])
+            sent[0] += handle.frames
+            sent[1] += handle.bytes_sent
+        return totals
+
+    def by_kind(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for handle in self._streams.values():
+            counts[handle.kind] = counts.get(handle.kind, 0) + 1
+        return counts
+
+    def get_status(self, limit: int = 20) -> dict:
+        now = time.monotonic()
+        by_kind = self.by_kind()
+        ages = [now - handle.opened_at for handle in self._streams.values()]
+        queues = [handle.queue for handle in self._streams.values() if handle.queue is not None]
+        lags = [queue.lag(now) for queue in queues]
+        closed_total = sum(self.closed.values())
+        # dict는 열린 순서를 유지하므로 앞쪽이 가장 오래된 스트림
+        oldest = itertools.islice(self._streams.values(), limit)
+        # 가장 밀린 스트림
+        lagging = sorted((handle for handle in self._streams.values() if handle.queue is not None and len(handle.queue)),
+                         key=lambda handle: handle.queue.lag(now), reverse=True)[:limit]
+        return {
+            "open": len(self._streams),
+            "by_kind": by_kind,
+            "opened": self.opened,
+            "closed": dict(self.closed),
+            "oldest_age": max(ages, default=0.0),
+            "average_age": sum(ages) / len(ages) if ages else 0.0,
+            "average_closed_duration": self.total_duration / closed_total if closed_total else 0.0,
+            "lagging": sum(1 for lag in lags if lag > 0),
+            "max_lag": max(lags, default=0.0),
+            "queued_bytes": sum(queue.queued_bytes for queue in queues),
+            "dropped": self.dropped + sum(queue.dropped for queue in queues),
+            "coalesced": self.coalesced + sum(queue.coalesced for queue in queues),
+            "buffer": buffer_budget.get_status(),
+            "streams": [handle.as_dict(now) for handle in oldest],
+            "slowest": [handle.as_dict(now) for handle in lagging],
+        }
+
+
+# 전역 스트림 레지스트리 인스턴스
+stream_registry = StreamRegistry()
@@ -0,0 +1,148 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import User
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))  # 최대 캐시 유저 수 (0이면 캐시 끔)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))  # 초
+UPSERT_CHUNK = 500  # multi-row upsert 한 번에 포함할 최대 유저 수
+
+
+class UserCache:
+    """username -> user_id LRU + TTL 캐시입니다.
+
+    유저는 삭제되지 않으므로 TTL은 외부에서 바뀐 값을 언젠가 다시 읽기 위한 안전장치입니다.
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # username -> (user_id, expires_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, username: str) -> Optional[int]:
+        entry = self._entries.get(username)
+        if entry is None:
+            self.misses += 1
+            return None
+        user_id, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[username]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(username)
+        self.hits += 1
+        return user_id
+
+    def put(self, username: str, user_id: int):
+        if not self.enabled:
+            return
+        self._entries[username] = (user_id, time.monotonic() + self.ttl)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_status(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+
+async def upsert_user(db: AsyncSession, username: str) -> int:
+    """유저를 INSERT하거나 이미 있으면 기존 id를 반환합니다 (DB 왕복 1회).
+
+    동시에 같은 username으로 만들어도 unique 제약 오류가 나지 않습니다.
+    """
+    values = {"username": username, "email": f"{username}@example.com", "is_active": True}
+    dialect = db.bind.dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        # 중복이면 LAST_INSERT_ID(id)로 기존 id를 lastrowid에 싣는다
+        stmt = mysql_insert(User).values(**values).on_duplicate_key_update(id=func.last_insert_id(User.id))
+        result = await db.execute(stmt)
+        return result.lastrowid
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(User).values(**values)
+        # DO NOTHING은 기존 행을 RETURNING하지 않으므로 no-op UPDATE를 쓴다
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.username], set_={"username": stmt.excluded.username}
+        ).returning(User.id)
+        return (await db.execute(stmt)).scalar_one()
+
+    # 그 밖의 DB: 조회 후 INSERT (경쟁 시 unique 오류가 날 수 있음)
+    user_id = (await db.execute(select(User.id).where(User.username == username))).scalar_one_or_none()
+    if user_id is None:
+        result = await db.execute(insert(User).values(**values))
+        user_id = result.inserted_primary_key[0]
+    return user_id
+
+
+async def upsert_users(db: AsyncSession, usernames: List[str]) -> Dict[str, int]:
+    """여러 유저를 multi-row upsert로 찾거나 만들고 {username: user_id}를 반환합니다."""
+    dialect = db.bind.dialect.name
+    user_ids: Dict[str, int] = {}
+    for start in range(0, len(usernames), UPSERT_CHUNK):
+        chunk = usernames[start:start + UPSERT_CHUNK]
+        values = [{"username": name, "email": f"{name}@example.com", "is_active": True} for name in chunk]
+
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(User).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.username], set_={"username": stmt.excluded.username}
+            ).returning(User.id, User.username)
+            rows = (await db.execute(stmt)).all()
+        else:
+            if dialect == "mysql":
+                from sqlalchemy.dialects.mysql import insert as mysql_insert
+                # 행별 id를 돌려받을 수 없으므로 no-op upsert 후 한 번에 조회
+                await db.execute(mysql_insert(User).values(values).on_duplicate_key_update(id=User.id))
+            else:
+                existing = set((await db.execute(select(User.username).where(User.username.in_(chunk)))).scalars())
+                missing = [value for value in values if value["username"] not in existing]
+                if missing:
+                    await db.execute(insert(User).values(missing))
+            rows = (await db.execute(select(User.id, User.username).where(User.username.in_(chunk)))).all()
+
+        for user_id, username in rows:
+            user_ids[username] = user_id
+    return user_ids
+
+
+# 전역 유저 캐시 인스턴스
+user_cache = UserCache()
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict
+from sqlalchemy import insert, update, case
+
+from .database import AsyncSessionLocal
+from .metrics import db_commit_seconds
+from .models import UserMessage, UserSession
+from .session_record import mono_to_datetime
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_WRITE_BEHIND = os.getenv("MESSAGE_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+MESSAGE_FLUSH_SIZE = int(os.getenv("MESSAGE_FLUSH_SIZE", "500"))  # 한 번에 INSERT할 최대 행 수
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_INTERVAL", "0.5"))  # 초
+MESSAGE_BUFFER_MAX = int(os.getenv("MESSAGE_BUFFER_MAX", "50000"))  # 메모리에 쌓아둘 최대 행 수
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "5"))  # 초, 0이면 요청마다 즉시 UPDATE
+ACTIVITY_FLUSH_CHUNK = 1000  # UPDATE 한 번에 포함할 최대 세션 수
+
+
+class MessageWriteBuffer:
+    """UserMessage 행을 모아 multi-row INSERT로 저장하는 write-behind 버퍼입니다.
+
+    크기(flush_size) 또는 시간(flush_interval) 임계치에 도달하면 flush합니다.
+    버퍼가 max_pending에 도달하면 enqueue()가 flush될 때까지 대기합니다 (backpressure).
+    """
+
+    def __init__(self, enabled: bool, flush_size: int, flush_interval: float, max_pending: int):
+        self.enabled = enabled
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: deque = deque()
+        self._in_flight = 0
+        self._flush_requested = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self._running = False
+
+        # 통계
+        self.enqueued = 0
+        self.flushed_rows = 0
+        self.commits = 0
+        self.failed_flushes = 0
+        self.backpressure_waits = 0
+
+    async def start(self):
+        """flush 백그라운드 태스크를 시작합니다."""
+        if not self.enabled or self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info("Message write-behind buffer started")
+
+    async def stop(self):
+        """flush 태스크를 중지하고 남은 메시지를 모두 저장합니다."""
+        self._running = False
+        if self._task:
+            # 진행 중인 flush는 끝까지 마치도록 깨우기만 한다
+            self._flush_requested.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._pending:
+            if not await self.flush():
+                logger.error(f"Dropping {len(self._pending)} buffered messages on shutdown")
+                break
+        if self.enabled:
+            logger.info("Message write-behind buffer stopped")
+
+    async def enqueue(self, session_id: str, message_counter: int, message_content: str):
+        """메시지를 버퍼에 추가합니다. 버퍼가 가득 차 있으면 공간이 생길 때까지 대기합니다."""
+        while len(self._pending) + self._in_flight >= self.max_pending:
+            self.backpressure_waits += 1
+            self._space_available.clear()
+            self._flush_requested.set()
+            await self._space_available.wait()
+
+        self._pending.append({
+            "session_id": session_id,
+            "message_counter": message_counter,
+            "message_content": message_content,
+            "created_at": datetime.now(),
+        })
+        self.enqueued += 1
+
+        if len(self._pending) >= self.flush_size:
+            self._flush_requested.set()
+
+    async def flush(self) -> bool:
+        """버퍼의 메시지를 flush_size 단위의 multi-row INSERT로 저장합니다."""
+        async with self._flush_lock:
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.flush_size, len(self._pending)))]
+                self._in_flight = len(batch)
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await db.execute(insert(UserMessage).values(batch))
+                        started = time.perf_counter()
+                        await db.commit()
+                        db_commit_seconds.observe(time.perf_counter() - started, ("write_behind_flush",))
+                except asyncio.CancelledError:
+                    self._pending.extendleft(reversed(batch))
+                    raise
+                except Exception as e:
+                    # 실패한 배치는 순서를 유지한 채 버퍼 앞에 되돌려 놓는다
+                    self._pending.extendleft(reversed(batch))
+                    self.failed_flushes += 1
+                    logger.error(f"Failed to flush {len(batch)} buffered messages: {e}")
+                    return False
+                finally:
+                    self._in_flight = 0
+                    if len(self._pending) < self.max_pending:
+                        self._space_available.set()
+
+                self.flushed_rows += len(batch)
+                self.commits += 1
+        return True
+
+    async def _flush_loop(self):
+        """크기 또는 시간 임계치마다 버퍼를 flush하는 루프입니다."""
+        while self._running:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            if not await self.flush():
+                await asyncio.sleep(1)  # DB가 밀리는 동안에는 버퍼가 backpressure를 건다
+
+    def get_status(self) -> dict:
+        """버퍼 상태와 통계를 반환합니다."""
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending) + self._in_flight,
+            "max_pending": self.max_pending,
+            "flush_size": self.flush_size,
+            "flush_interval": self.flush_interval,
+            "enqueued": self.enqueued,
+            "flushed_rows": self.flushed_rows,
+            "commits": self.commits,
+            "failed_flushes": self.failed_flushes,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+
+class ActivityFlusher:
+    """세션 last_activity 갱신을 모아 주기적으로 일괄 UPDATE합니다.
+
+    메모리의 타임스탬프가 기준값이며, DB에는 flush_interval마다
+    변경된(dirty) 세션의 마지막 값만 CASE UPDATE 한 번으로 기록합니다.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._dirty: Dict[str, float] = {}  # session_id -> last_activity (monotonic)
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self._running = False
+
+        # 통계
+        self.updates_requested = 0
+        self.rows_written = 0
+        self.statements = 0
+        self.failed_flushes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+    async def start(self):
+        """flush 백그라운드 태스크를 시작합니다."""
+        if not self.enabled or self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info("Session activity flusher started")
+
+    async def stop(self):
+        """flush 태스크를 중지하고 남은 활동 시간을 저장합니다."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        if self.enabled:
+            logger.info("Session activity flusher stopped")
+
+    def mark(self, session_id: str, last_activity: float):
+        """세션의 활동 시간(monotonic)을 dirty로 표시합니다. O(1)"""
+        self._dirty[session_id] = last_activity
+        self.updates_requested += 1
+
+    def discard(self, session_id: str):
+        """세션의 저장 대기 중인 활동 시간을 버립니다."""
+        self._dirty.pop(session_id, None)
+
+    async def flush(self) -> bool:
+        """dirty 세션들의 last_activity를 일괄 UPDATE합니다."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return True
+
+            dirty, self._dirty = self._dirty, {}
+            session_ids = list(dirty)
+            try:
+                async with AsyncSessionLocal() as db:
+                    for start in range(0, len(session_ids), ACTIVITY_FLUSH_CHUNK):
+                        # datetime 변환은 flush 시점에 세션당 한 번만
+                        chunk = {
+                            sid: mono_to_datetime(dirty[sid])
+                            for sid in session_ids[start:start + ACTIVITY_FLUSH_CHUNK]
+                        }
+                        await db.execute(
+                            update(UserSession)
+                            .where(UserSession.session_id.in_(list(chunk)))
+                            .values(last_activity=case(chunk, value=UserSession.session_id))
+                        )
+                        self.statements += 1
+                    started = time.perf_counter()
+                    await db.commit()
+                    db_commit_seconds.observe(time.perf_counter() - started, ("activity_flush",))
+            except BaseException as e:
+                # flush 중 새로 기록된 값이 더 최신이므로 그 값을 우선한다
+                for session_id, last_activity in dirty.items():
+                    self._dirty.setdefault(session_id, last_activity)
+                if not isinstance(e, Exception):
+                    raise
+                self.failed_flushes += 1
+                logger.error(f"Failed to flush activity for {len(dirty)} sessions: {e}")
+                return False
+
+            self.rows_written += len(dirty)
+        return True
+
+    async def _flush_loop(self):
+        """flush_interval마다 dirty 세션들을 저장하는 루프입니다."""
+        while self._running:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def get_status(self) -> dict:
+        """flusher 상태와 통계를 반환합니다."""
+        return {
+            "enabled": self.enabled,
+            "flush_interval": self.flush_interval,
+            "dirty_sessions": len(self._dirty),
+            "updates_requested": self.updates_requested,
+            "rows_written": self.rows_written,
+            "statements": self.statements,
+            "writes_saved": max(self.updates_requested - self.rows_written - len(self._dirty), 0),
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+# 전역 메시지 write-behind 버퍼 인스턴스
+message_write_buffer = MessageWriteBuffer(
+    enabled=MESSAGE_WRITE_BEHIND,
+    flush_size=MESSAGE_FLUSH_SIZE,
+    flush_interval=MESSAGE_FLUSH_INTERVAL,
+    max_pending=MESSAGE_BUFFER_MAX,
+)
+
+# 전역 세션 활동 flusher 인스턴스
+activity_flusher = ActivityFlusher(flush_interval=ACTIVITY_FLUSH_INTERVAL)
@@ -0,0 +1,101 @@
+from typing import AsyncIterator, Callable, Optional
+
+import anyio
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from .metrics import metrics
+from .outbound import OutboundQueue, SSE_OVERFLOW_POLICY
+from .stream_registry import stream_registry
+
+# 클라이언트 -> 서버 명령: 텍스트 프레임 하나에 한 글자
+COMMAND_PONG = "p"  # ping_required에 대한 응답 (POST /api/session/{id}/pong)
+COMMAND_MESSAGE = "m"  # 메시지 하나 요청 (GET /api/session/{id}/message)
+COMMANDS = frozenset((COMMAND_PONG, COMMAND_MESSAGE))
+
+# 서버가 닫을 때 쓰는 close 코드 (4000-4999는 애플리케이션 정의 영역)
+CLOSE_SESSION_NOT_FOUND = 4404
+CLOSE_SESSION_DISCONNECTED = 4410
+CLOSE_SESSION_MOVED = 4307
+CLOSE_SLOW_CONSUMER = 4408
+
+ws_commands_total = metrics.counter(
+    "ws_commands_total", "WebSocket으로 받은 클라이언트 명령 수", ("command",))
+
+
+async def serve_websocket(websocket: WebSocket, frames: AsyncIterator[bytes], on_command: Callable[[str], None],
+                          session_id: Optional[str] = None, overflow: str = SSE_OVERFLOW_POLICY,
+                          close_code: Callable[[], int] = lambda: 1000):
+    """수락된 WebSocket 하나로 frames를 보내고 클라이언트 명령을 on_command로 넘깁니다.
+
+    SSEResponse와 같은 구조입니다. frames를 만드는 producer와 소켓 쓰기(writer)를
+    OutboundQueue로 분리하고 overflow 정책을 적용하며, 열린 동안 stream_registry에
+    kind="websocket"으로 등록됩니다. frames의 항목 하나가 텍스트 메시지 하나입니다.
+    연결 유지 확인은 서버(uvicorn)의 WebSocket ping 프레임이 맡으므로 keepalive 태스크는 없습니다.
+    frames가 끝나면 close_code()로 연결을 닫습니다.
+    """
+    client = websocket.client
+    queue = OutboundQueue(overflow)
+    handle = stream_registry.open("websocket", session_id,
+                                  f"{client.host}:{client.port}" if client else None, queue)
+    reason = "completed"
+
+    async def receive_commands(task_group):
+        nonlocal reason
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                reason = "client_disconnect"
+                task_group.cancel_scope.cancel()
+                return
+            command = message.get("text")
+            if command is None and message.get("bytes") is not None:
+                command = message["bytes"].decode(errors="replace")
+            if command in COMMANDS:
+                ws_commands_total.inc((command,))
+                on_command(command)
+            else:
+                ws_commands_total.inc(("unknown",))
+
+    async def produce(task_group):
+        nonlocal reason
+        async for chunk in frames:
+            if not queue.put(chunk):
+                reason = "slow_consumer"
+                task_group.cancel_scope.cancel()
+                return
+        queue.close()
+
+    try:
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(receive_commands, task_group)
+            task_group.start_soon(produce, task_group)
+            try:
+                while True:
+                    chunks = await queue.get_many()
+                    if chunks is None:
+                        break
+                    for chunk in chunks:
+                        await websocket.send({"type": "websocket.send", "text": chunk.decode()})
+                        handle.wrote(len(chunk))
+                await websocket.close(close_code())
+            except (WebSocketDisconnect, OSError):
+                # 쓰기 실패 (연결이 이미 끊김). Starlette 0.27은 OSError(ClientDisconnected)를 낸다
+                reason = "write_failed"
+            task_group.cancel_scope.cancel()
+        if reason == "slow_consumer":
+            with anyio.CancelScope(shield=True):
+                try:
+                    await websocket.close(CLOSE_SLOW_CONSUMER)
+                except (WebSocketDisconnect, OSError, RuntimeError):
+                    pass
+    except BaseException as e:
+        if reason == "completed":
+            reason = "cancelled" if isinstance(e, anyio.get_cancelled_exc_class()) else "error"
+        raise
+    finally:
+        queue.discard()
+        aclose = getattr(frames, "aclose", None)
+        if aclose is not None:
+            with anyio.CancelScope(shield=True):
+                await aclose()
+        stream_registry.close(handle, reason)
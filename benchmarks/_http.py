@@ -0,0 +1,111 @@
+"""벤치마크용 최소 HTTP/1.1 클라이언트
+
+keep-alive 연결 하나로 요청을 순서대로 보냅니다. 외부 의존성 없이
+asyncio 스트림만 사용하므로 부하 생성 비용이 낮습니다.
+"""
+import asyncio
+import json
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+
+class HttpClient:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8001):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+            self._writer = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        if self._writer is None:
+            await self.connect()
+        await self._send_head(method, path, body, headers)
+        status, response_headers = await self._read_head()
+        return status, response_headers, await self._read_body(response_headers)
+
+    async def get_json(self, path: str):
+        status, _, body = await self.request("GET", path)
+        return status, (json.loads(body) if body else None)
+
+    async def post_form(self, path: str, fields: Dict[str, str]):
+        body = urlencode(fields).encode()
+        status, _, response = await self.request(
+            "POST", path, body, {"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        return status, (json.loads(response) if response else None)
+
+    async def post_json(self, path: str, payload):
+        status, _, response = await self.request(
+            "POST", path, json.dumps(payload).encode(), {"Content-Type": "application/json"}
+        )
+        return status, (json.loads(response) if response else None)
+
+    async def open_stream(self, path: str, headers: Optional[Dict[str, str]] = None) -> int:
+        """SSE 등 끝나지 않는 응답을 열고 상태 코드를 반환합니다. 이후 read_chunk()로 읽습니다."""
+        if self._writer is None:
+            await self.connect()
+        await self._send_head("GET", path, b"", headers)
+        status, self._stream_headers = await self._read_head()
+        return status
+
+    async def read_chunk(self) -> bytes:
+        """chunked 응답의 다음 청크를 읽습니다. 스트림이 끝나면 b""를 반환합니다."""
+        size_line = await self._reader.readline()
+        if not size_line:
+            return b""
+        size = int(size_line.strip().split(b";")[0], 16)
+        data = await self._reader.readexactly(size + 2)
+        return data[:-2]
+
+    async def _send_head(self, method, path, body, headers):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        if body or method in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(body)}")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await self._writer.drain()
+
+    async def _read_head(self):
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    async def _read_body(self, headers) -> bytes:
+        if "content-length" in headers:
+            return await self._reader.readexactly(int(headers["content-length"]))
+        if headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                chunk = await self.read_chunk()
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+        return b""
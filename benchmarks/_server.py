@@ -0,0 +1,90 @@
+"""벤치마크용 앱/데몬 프로세스 실행 도우미
+
+앱은 SQLite(aiosqlite) 파일 DB로 띄웁니다. main.py가 작업 디렉터리 기준으로
+static/, templates/를 찾으므로 임시 디렉터리에 만들어 두고 그곳에서 실행합니다.
+"""
+import asyncio
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_workdir() -> str:
+    workdir = tempfile.mkdtemp(prefix="subtree-bench-")
+    os.makedirs(os.path.join(workdir, "static"), exist_ok=True)
+    os.symlink(os.path.join(REPO_ROOT, "templates"), os.path.join(workdir, "templates"))
+    return workdir
+
+
+def base_env(workdir: str, **overrides) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}")
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def init_database(env: dict):
+    """워커들이 동시에 테이블을 만들지 않도록 미리 스키마를 생성합니다."""
+    code = "import asyncio, app.models; from app.database import init_db; asyncio.run(init_db())"
+    subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def start_process(args: list, env: dict, workdir: str, log_name: str) -> subprocess.Popen:
+    log = open(os.path.join(workdir, log_name), "wb")
+    return subprocess.Popen(args, env=env, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_process(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def wait_for_port(port: int, timeout: float = 30.0, host: str = "127.0.0.1"):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"port {port} did not open within {timeout}s")
+
+
+async def wait_for_socket(path: str, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(path):
+            return
+        await asyncio.sleep(0.1)
+    raise TimeoutError(f"socket {path} did not appear within {timeout}s")
+
+
+@contextlib.asynccontextmanager
+async def run_app(port: int, workers: int = 1, workdir: str = None, **env_overrides):
+    """uvicorn으로 앱을 띄우고 (workdir, env, process)를 넘겨줍니다."""
+    workdir = workdir or make_workdir()
+    env = base_env(workdir, **env_overrides)
+    init_database(env)
+    process = start_process(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", REPO_ROOT,
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        env, workdir, f"uvicorn-{port}.log",
+    )
+    try:
+        await wait_for_port(port)
+        yield workdir, env, process
+    finally:
+        stop_process(process)
@@ -0,0 +1,115 @@
+"""전역 /stream tick 비용 벤치마크
+
+연결마다 프레임을 직렬화하던 기존 방식과 BroadcastHub 방식에서
+구독자 전원이 한 tick을 받는 데 걸리는 시간을 비교합니다.
+
+    python -m benchmarks.bench_broadcast          # 10k 구독자
+    python -m benchmarks.bench_broadcast 1000 10000 50000
+"""
+import asyncio
+import json
+import sys
+import time
+
+from app.broadcast import BroadcastHub
+
+TICKS = 20
+
+
+class TickBarrier:
+    """모든 구독자가 tick을 처리했는지 세는 카운터"""
+
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.count = 0
+        self.done = asyncio.Event()
+
+    def hit(self):
+        self.count += 1
+        if self.count == self.expected:
+            self.done.set()
+
+    def reset(self):
+        self.count = 0
+        self.done.clear()
+
+
+async def legacy_tick_cost(subscribers: int) -> float:
+    """구독자마다 dict 생성 + json.dumps + str 인코딩 (Starlette가 하던 encode 포함)"""
+    barrier = TickBarrier(subscribers)
+    ticks = [asyncio.Event() for _ in range(TICKS)]  # 각 연결의 sleep(2) 만료에 해당
+    sent_bytes = 0
+
+    async def legacy_generator():
+        nonlocal sent_bytes
+        for counter, tick in enumerate(ticks):
+            await tick.wait()
+            data = {
+                "timestamp": time.time(),
+                "counter": counter,
+                "message": f"Server message #{counter}"
+            }
+            chunk = f"data: {json.dumps(data)}\n\n".encode("utf-8")
+            sent_bytes += len(chunk)
+            barrier.hit()
+
+    tasks = [asyncio.create_task(legacy_generator()) for _ in range(subscribers)]
+    await asyncio.sleep(0)
+
+    best = float("inf")
+    for tick in ticks:
+        barrier.reset()
+        started = time.perf_counter()
+        tick.set()
+        await barrier.done.wait()
+        best = min(best, time.perf_counter() - started)
+
+    await asyncio.gather(*tasks)
+    return best
+
+
+async def hub_tick_cost(subscribers: int) -> float:
+    """프레임은 한 번만 만들고 구독자 큐에 같은 bytes를 전달"""
+    hub = BroadcastHub(interval=3600)  # producer 루프 대신 직접 publish
+    barrier = TickBarrier(subscribers)
+    subscriptions = [hub.subscribe() for _ in range(subscribers)]
+    sent_bytes = 0
+
+    async def consumer(subscription):
+        nonlocal sent_bytes
+        while True:
+            frames = await subscription.get_many()
+            if frames is None:
+                return
+            sent_bytes += len(b"".join(frames))
+            barrier.hit()
+
+    # subscribe()가 띄운 producer가 보낸 첫 프레임은 소비한 뒤 측정한다
+    tasks = [asyncio.create_task(consumer(subscription)) for subscription in subscriptions]
+    await barrier.done.wait()
+
+    best = float("inf")
+    for counter in range(TICKS):
+        barrier.reset()
+        started = time.perf_counter()
+        hub.publish(hub.build_frame(counter))
+        await barrier.done.wait()
+        best = min(best, time.perf_counter() - started)
+
+    for subscription in subscriptions:
+        hub.unsubscribe(subscription)
+    await asyncio.gather(*tasks)
+    return best
+
+
+async def main(sizes: list):
+    print(f"{'subscribers':>12} {'legacy tick (ms)':>18} {'hub tick (ms)':>15} {'speedup':>8}")
+    for size in sizes:
+        legacy = await legacy_tick_cost(size)
+        hub = await hub_tick_cost(size)
+        print(f"{size:>12} {legacy * 1000:>18.2f} {hub * 1000:>15.2f} {legacy / hub:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000]
+    asyncio.run(main(sizes))
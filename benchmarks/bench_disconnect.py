@@ -0,0 +1,98 @@
+"""SSE 연결 종료 감지/회수 벤치마크
+
+세션 스트림과 전역 스트림을 여러 개 연 뒤 클라이언트 소켓을 한꺼번에 끊고,
+/api/system/streams의 열린 스트림 수가 0이 될 때까지의 시간과 그 뒤에도
+user_messages에 행이 더 쌓이는지(끊긴 클라이언트를 위한 작업)를 확인합니다.
+keepalive 주석이 전송되는지도 확인합니다.
+
+    python -m benchmarks.bench_disconnect
+    python -m benchmarks.bench_disconnect --sessions 500 --broadcast 200
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+from benchmarks._http import HttpClient
+from benchmarks._server import make_workdir, run_app
+
+
+def message_rows(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM user_messages").fetchone()[0]
+    conn.close()
+    return count
+
+
+async def open_stream(port: int, path: str) -> HttpClient:
+    client = HttpClient(port=port)
+    assert await client.open_stream(path) == 200
+    await client.read_chunk()
+    return client
+
+
+async def open_streams(port: int) -> dict:
+    _, status = await HttpClient(port=port).get_json("/api/system/streams?limit=0")
+    return status
+
+
+async def check_keepalive(port: int) -> bool:
+    client = await open_stream(port, "/stream")
+    deadline = time.monotonic() + 5
+    seen = False
+    while time.monotonic() < deadline and not seen:
+        seen = (await client.read_chunk()).startswith(b": keepalive")
+    await client.close()
+    return seen
+
+
+async def main(options) -> int:
+    workdir = make_workdir()
+    db_path = os.path.join(workdir, "bench.db")
+    async with run_app(options.port, 1, workdir, SSE_HEARTBEAT_INTERVAL=options.heartbeat):
+        client = HttpClient(port=options.port)
+        _, created = await client.post_json("/api/session/batch", {"count": options.sessions})
+        await client.close()
+        session_ids = [item["session_id"] for item in created["sessions"]]
+
+        clients = await asyncio.gather(
+            *(open_stream(options.port, f"/stream/{sid}") for sid in session_ids),
+            *(open_stream(options.port, "/stream") for _ in range(options.broadcast)),
+        )
+        status = await open_streams(options.port)
+        print(f"open streams: {status['open']} {status['by_kind']}")
+
+        # 클라이언트를 정리 절차 없이 끊는다
+        for stream in clients:
+            stream._writer.transport.abort()
+        started = time.monotonic()
+        while (await open_streams(options.port))["open"] > 0:
+            if time.monotonic() - started > 30:
+                break
+            await asyncio.sleep(0.01)
+        reclaimed = time.monotonic() - started
+        status = await open_streams(options.port)
+
+        rows_after = message_rows(db_path)
+        await asyncio.sleep(options.settle)
+        extra_rows = message_rows(db_path) - rows_after
+
+        keepalive = await check_keepalive(options.port)
+
+    ok = status["open"] == 0 and extra_rows == 0 and keepalive
+    print(f"reclaimed {len(clients)} streams in {reclaimed * 1000:.0f}ms  closed={status['closed']}")
+    print(f"user_messages rows written after reclaim ({options.settle:.0f}s): {extra_rows}")
+    print(f"keepalive comment on idle stream: {'ok' if keepalive else 'MISSING'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--broadcast", type=int, default=100)
+    parser.add_argument("--heartbeat", type=float, default=0.5, help="SSE_HEARTBEAT_INTERVAL (초)")
+    parser.add_argument("--settle", type=float, default=3.0, help="회수 후 DB 쓰기를 지켜볼 시간 (초)")
+    parser.add_argument("--port", type=int, default=8541)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,94 @@
+"""워커 간 이벤트 릴레이 지연/처리량 벤치마크
+
+릴레이 허브 데몬을 띄우고, 두 워커 역할의 SessionEventHub를 각각 허브에 연결합니다.
+워커 A가 publish한 세션 이벤트가 워커 B의 스트림 구독에 도착하기까지의 지연과
+버스트 전송 시 배치 효과를 측정합니다.
+
+    python -m benchmarks.bench_event_relay
+    python -m benchmarks.bench_event_relay --events 2000 --burst 10000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from app.event_relay import EventRelayClient
+from app.session_events import SessionEventHub
+from benchmarks._server import make_workdir, base_env, start_process, stop_process, wait_for_socket
+
+
+async def measure_latency(sender: SessionEventHub, receiver: SessionEventHub, events: int) -> list:
+    subscription = receiver.subscribe("bench-session")
+    await asyncio.sleep(0.1)  # sub 메시지가 허브에 반영될 때까지
+    latencies = []
+    for i in range(events):
+        started = time.perf_counter()
+        sender.publish("bench-session", "pong_received", {"seq": i})
+        received = await subscription.get_many()
+        latencies.append(time.perf_counter() - started)
+        assert received[-1][2]["seq"] == i
+    receiver.unsubscribe("bench-session", subscription)
+    return latencies
+
+
+async def measure_burst(sender: SessionEventHub, receiver: SessionEventHub, count: int, sessions: int = 100):
+    subscriptions = [receiver.subscribe(f"burst-{i}") for i in range(sessions)]
+    await asyncio.sleep(0.1)
+    batches_before = sender.relay.get_status()["batches_sent"]
+    started = time.perf_counter()
+    for i in range(count):
+        sender.publish(f"burst-{i % sessions}", "ping_required")
+    received = 0
+    while received < count:
+        for subscription in subscriptions:
+            if subscription._items:
+                received += len(await subscription.get_many())
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    batches = sender.relay.get_status()["batches_sent"] - batches_before
+    for i, subscription in enumerate(subscriptions):
+        receiver.unsubscribe(f"burst-{i}", subscription)
+    return elapsed, batches
+
+
+async def main(options) -> int:
+    workdir = make_workdir()
+    socket_path = os.path.join(workdir, "events.sock")
+    hub_process = start_process([sys.executable, "-m", "app.event_relay", "--socket", socket_path],
+                                base_env(workdir), workdir, "event-relay.log")
+    try:
+        await wait_for_socket(socket_path)
+        sender = SessionEventHub(EventRelayClient(socket_path))
+        receiver = SessionEventHub(EventRelayClient(socket_path))
+        await sender.start()
+        await receiver.start()
+
+        latencies = await measure_latency(sender, receiver, options.events)
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f"cross-worker latency  p50={p50:.3f}ms  p99={p99:.3f}ms  ({options.events} events)")
+
+        elapsed, batches = await measure_burst(sender, receiver, options.burst)
+        print(f"burst {options.burst} events: {options.burst / elapsed:,.0f} events/s, "
+              f"{batches} batch writes ({options.burst / max(batches, 1):.0f} events/write)")
+
+        hub_stats = await receiver.relay.hub_stats()
+        print(f"hub throughput: {hub_stats['throughput']}")
+
+        await sender.stop()
+        await receiver.stop()
+    finally:
+        stop_process(hub_process)
+
+    return 0 if p50 < options.max_p50_ms else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--burst", type=int, default=20000)
+    parser.add_argument("--max-p50-ms", type=float, default=1.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,98 @@
+"""ping/cleanup 주기 체크 비용 벤치마크
+
+전체 세션을 훑던 기존 방식과 데드라인 인덱스 방식의 tick 비용을 비교합니다.
+세션 수가 늘어도 만료 후보 수가 같다면 새 방식의 tick 비용은 거의 일정해야 합니다.
+
+    python -m benchmarks.bench_liveness            # 1k, 10k, 100k, 1M
+    python -m benchmarks.bench_liveness 1000 10000
+"""
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from app.session_manager import SessionManager
+
+DUE_PER_TICK = 100  # tick마다 데드라인이 지나 있는 세션 수
+ROUNDS = 5
+
+
+def legacy_session(now: datetime) -> dict:
+    """기존 dict 형태의 세션 (비교용)"""
+    return {
+        "user_id": None,
+        "username": None,
+        "message_counter": 0,
+        "connected_at": now,
+        "last_activity": now,
+        "last_ping": now,
+        "ping_pending": False,
+        "ping_miss_count": 0
+    }
+
+
+def legacy_full_scan(manager: SessionManager, sessions: dict) -> int:
+    """기존 get_sessions_needing_ping + check_inactive_sessions의 전체 순회"""
+    now = datetime.now()
+    found = 0
+    for session in sessions.values():
+        if not session["ping_pending"]:
+            if (now - session["last_ping"]).total_seconds() >= manager.ping_interval:
+                found += 1
+        if session["ping_pending"]:
+            if (now - session["last_ping"]).total_seconds() > manager.ping_timeout:
+                found += 1
+        if (now - session["last_activity"]).total_seconds() > manager.ping_timeout * 2:
+            found += 1
+    return found
+
+
+async def indexed_tick(manager: SessionManager, due_ids: list) -> int:
+    """데드라인 인덱스 기반 tick: ping 대상 확인 + 전송 + 만료 체크"""
+    for session_id in due_ids:
+        manager.store._ping_schedule.schedule(session_id, 0.0)
+    needing_ping = await manager.get_sessions_needing_ping()
+    for info in needing_ping:
+        await manager.send_ping(info["session_id"])
+    # pong을 받아 다음 라운드에 다시 ping 대상이 될 수 있도록 한다
+    for session_id in due_ids:
+        await manager.handle_pong(session_id)
+    await manager.check_inactive_sessions(db=None)  # 만료 대상이 없으므로 DB는 쓰지 않음
+    return len(needing_ping)
+
+
+async def run(size: int) -> tuple:
+    manager = SessionManager()
+    session_ids = [str(uuid.uuid4()) for _ in range(size)]
+    for session_id in session_ids:
+        await manager.register_session(session_id, None, None)
+    due_ids = session_ids[:DUE_PER_TICK]
+    now = datetime.now()
+    legacy_sessions = {session_id: legacy_session(now) for session_id in session_ids}
+
+    legacy_best = float("inf")
+    indexed_best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        legacy_full_scan(manager, legacy_sessions)
+        legacy_best = min(legacy_best, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        handled = await indexed_tick(manager, due_ids)
+        indexed_best = min(indexed_best, time.perf_counter() - started)
+        assert handled == len(due_ids)
+
+    return legacy_best, indexed_best
+
+
+async def main(sizes: list):
+    print(f"{'sessions':>10} {'full scan (ms)':>16} {'indexed tick (ms)':>18}")
+    for size in sizes:
+        legacy, indexed = await run(size)
+        print(f"{size:>10} {legacy * 1000:>16.3f} {indexed * 1000:>18.3f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000]
+    asyncio.run(main(sizes))
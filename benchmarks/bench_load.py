@@ -0,0 +1,448 @@
+"""세션/스트림/ping-pong 종단 간 부하 테스트 하네스
+
+앱을 로컬 DB(기본 SQLite, --database-url로 MySQL 등 지정 가능)로 띄우고
+templates/index.html과 같은 동작을 하는 클라이언트 N개를 동시에 실행합니다.
+
+- sse 클라이언트: 세션 생성 -> /stream/{id} 구독 -> ping_required를 받으면 pong
+- polling 클라이언트: 세션 생성 -> /message를 주기적으로 조회 -> /ping 확인 후 필요하면 pong
+- websocket 클라이언트: 세션 생성 -> /ws/{id} 연결 -> ping_required를 받으면 같은 소켓으로 `p`
+  (websockets 패키지 필요)
+
+요청/초(클라이언트당 분당 HTTP 요청 수 포함), 엔드포인트별 지연,
+스트림 프레임 지연(SSE/WebSocket 프레임 timestamp부터 수신까지) 백분위,
+1k 세션당 RSS, DB commit/초와 메시지 행/초를 측정해 JSON으로 저장합니다.
+--compare로 이전 결과와 비교해 커밋 간 회귀를 확인할 수 있습니다.
+
+    python -m benchmarks.bench_load --clients 500 --duration 30
+    python -m benchmarks.bench_load --polling 0 --websocket 1   # WebSocket 클라이언트만
+    python -m benchmarks.bench_load --compare benchmarks/results/load-abc1234-20261016-120000.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+try:
+    import websockets
+except ImportError:  # --websocket을 쓸 때만 필요
+    websockets = None
+
+from benchmarks._http import HttpClient
+from benchmarks._server import REPO_ROOT, make_workdir, run_app
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    values = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(values[min(int(len(values) * q), len(values) - 1)] * 1000, 3)
+
+    return {"count": len(values), "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99),
+            "max": round(values[-1] * 1000, 3)}
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """pid와 자식 프로세스(uvicorn 워커)의 RSS 합계 (바이트). /proc이 없으면 None"""
+    def rss(p: int) -> int:
+        with open(f"/proc/{p}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    try:
+        total = rss(pid)
+    except OSError:
+        return None
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            if ppid == pid:
+                total += rss(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_commits(metrics_text: str) -> float:
+    """/metrics의 db_commit_duration_seconds_count 합계"""
+    return sum(float(line.rsplit(" ", 1)[1]) for line in metrics_text.splitlines()
+               if line.startswith("db_commit_duration_seconds_count"))
+
+
+async def scrape_metrics(port: int) -> str:
+    # 측정 중에는 연결이 오래 쉬므로 keep-alive가 끊기지 않게 매번 새로 연결한다
+    client = HttpClient(port=port)
+    _, _, body = await client.request("GET", "/metrics")
+    await client.close()
+    return body.decode()
+
+
+def message_rows(database_url: str) -> Optional[int]:
+    if not database_url.startswith("sqlite"):
+        return None
+    conn = sqlite3.connect(database_url.split(":///", 1)[1])
+    try:
+        return conn.execute("SELECT COUNT(*) FROM user_messages").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.frame_latencies: List[float] = []
+        self.frames = 0
+        self.pings = 0
+        self.pongs = 0
+        self.pong_latencies: List[float] = []  # ping 프레임 timestamp부터 pong 응답까지
+        self.sessions = 0
+        self.stream_errors = 0
+
+    async def call(self, client: HttpClient, name: str, method: str, path: str, body: bytes = b"",
+                   headers: Optional[dict] = None):
+        for attempt in range(2):
+            started = time.perf_counter()
+            try:
+                status, _, response = await client.request(method, path, body, headers)
+                break
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                await client.close()
+                if attempt:
+                    self.errors[f"{name} connection"] += 1
+                    return None, None
+                # 브라우저처럼 keep-alive가 끊긴 유휴 연결이면 새로 연결해 한 번 더 보낸다
+        self.latencies[name].append(time.perf_counter() - started)
+        if status >= 400:
+            self.errors[f"{name} {status}"] += 1
+        return status, (json.loads(response) if response else None)
+
+
+async def create_session(stats: LoadStats, client: HttpClient, index: int) -> Optional[str]:
+    _, body = await stats.call(client, "create", "POST", "/api/session/create",
+                               f"username=load_{index}".encode(),
+                               {"Content-Type": "application/x-www-form-urlencoded"})
+    if not body or "session_id" not in body:
+        return None
+    stats.sessions += 1
+    return body["session_id"]
+
+
+async def pong(stats: LoadStats, client: HttpClient, lock: asyncio.Lock, session_id: str,
+               ping_timestamp: Optional[float] = None):
+    async with lock:
+        status, _ = await stats.call(client, "pong", "POST", f"/api/session/{session_id}/pong")
+    if status == 200:
+        stats.pongs += 1
+        if ping_timestamp is not None:
+            stats.pong_latencies.append(time.time() - ping_timestamp)
+
+
+async def sse_client(stats: LoadStats, port: int, index: int, deadline: float, ready: asyncio.Event):
+    control = HttpClient(port=port)
+    session_id = await create_session(stats, control, index)
+    if session_id is None:
+        return
+    lock = asyncio.Lock()
+    stream = HttpClient(port=port)
+    pongs = set()
+    try:
+        if await stream.open_stream(f"/stream/{session_id}") != 200:
+            stats.stream_errors += 1
+            return
+        await ready.wait()
+        buffer = b""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(stream.read_chunk(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                stats.stream_errors += 1
+                break
+            received = time.time()
+            buffer += chunk
+            *frames, buffer = buffer.split(b"\n\n")
+            for frame in frames:
+                for line in frame.split(b"\n"):
+                    if not line.startswith(b"data: "):
+                        continue
+                    data = json.loads(line[6:])
+                    stats.frames += 1
+                    if "timestamp" in data:
+                        stats.frame_latencies.append(received - data["timestamp"])
+                    if data.get("type") == "ping_required":
+                        # index.html처럼 스트림을 계속 읽으면서 pong을 보낸다
+                        stats.pings += 1
+                        task = asyncio.create_task(pong(stats, control, lock, session_id, data.get("timestamp")))
+                        pongs.add(task)
+                        task.add_done_callback(pongs.discard)
+                    elif data.get("type") == "session_disconnected":
+                        return
+    except (OSError, ConnectionError, asyncio.IncompleteReadError):
+        stats.stream_errors += 1
+    finally:
+        await stream.close()
+        if pongs:
+            await asyncio.gather(*pongs, return_exceptions=True)
+        async with lock:
+            await stats.call(control, "disconnect", "DELETE", f"/api/session/{session_id}")
+        await control.close()
+
+
+async def websocket_client(stats: LoadStats, port: int, index: int, deadline: float, ready: asyncio.Event):
+    control = HttpClient(port=port)
+    session_id = await create_session(stats, control, index)
+    if session_id is None:
+        return
+    ping_timestamp = None
+    try:
+        async with websockets.connect(f"ws://127.0.0.1:{port}/ws/{session_id}") as socket:
+            await ready.wait()
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(socket.recv(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                received = time.time()
+                data = json.loads(message)
+                stats.frames += 1
+                if "timestamp" in data:
+                    stats.frame_latencies.append(received - data["timestamp"])
+                if data.get("type") == "ping_required":
+                    stats.pings += 1
+                    ping_timestamp = data.get("timestamp")
+                    await socket.send("p")
+                elif data.get("type") == "pong_received":
+                    # 서버가 pong을 처리하면 pong_received 이벤트가 돌아온다
+                    stats.pongs += 1
+                    if ping_timestamp is not None:
+                        stats.pong_latencies.append(received - ping_timestamp)
+                        ping_timestamp = None
+                elif data.get("type") == "session_disconnected":
+                    return
+    except (OSError, websockets.ConnectionClosed):
+        stats.stream_errors += 1
+    finally:
+        await stats.call(control, "disconnect", "DELETE", f"/api/session/{session_id}")
+        await control.close()
+
+
+async def polling_client(stats: LoadStats, port: int, index: int, deadline: float, ready: asyncio.Event,
+                         poll_interval: float, ping_check_interval: float):
+    client = HttpClient(port=port)
+    session_id = await create_session(stats, client, index)
+    if session_id is None:
+        return
+    lock = asyncio.Lock()
+    try:
+        await ready.wait()
+        next_ping_check = time.monotonic() + random.uniform(0, ping_check_interval)
+        while time.monotonic() < deadline:
+            status, _ = await stats.call(client, "message", "GET", f"/api/session/{session_id}/message")
+            if status == 404:
+                return
+            if time.monotonic() >= next_ping_check:
+                next_ping_check += ping_check_interval
+                _, ping = await stats.call(client, "ping", "GET", f"/api/session/{session_id}/ping")
+                if ping and ping.get("requires_pong"):
+                    stats.pings += 1
+                    await pong(stats, client, lock, session_id)
+            await asyncio.sleep(min(poll_interval, max(deadline - time.monotonic(), 0)))
+    finally:
+        await stats.call(client, "disconnect", "DELETE", f"/api/session/{session_id}")
+        await client.close()
+
+
+async def run_load(options) -> dict:
+    workdir = make_workdir()
+    database_url = options.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    env = {"DATABASE_URL": database_url, "PING_INTERVAL": options.ping_interval,
+           "PING_TIMEOUT": options.ping_interval * 3, "LOOP_MONITOR_ENABLED": "false"}
+    stats = LoadStats()
+    async with run_app(options.port, options.workers, workdir, **env) as (_, _, process):
+        await asyncio.sleep(1)
+        rss_base = process_rss(process.pid)
+        ready = asyncio.Event()
+        deadline = time.monotonic() + options.ramp + options.duration
+        polling = int(options.clients * options.polling)
+        websocket = polling + int(options.clients * options.websocket)
+        clients = []
+        for index in range(options.clients):
+            if index < polling:
+                coro = polling_client(stats, options.port, index, deadline, ready,
+                                      options.poll_interval, options.ping_check_interval)
+            elif index < websocket:
+                coro = websocket_client(stats, options.port, index, deadline, ready)
+            else:
+                coro = sse_client(stats, options.port, index, deadline, ready)
+            clients.append(asyncio.create_task(coro))
+            await asyncio.sleep(options.ramp / options.clients)
+
+        # 램프업이 끝난 뒤부터 측정
+        ready.set()
+        before = await scrape_metrics(options.port)
+        rows_before = message_rows(database_url)
+        measure_started = time.monotonic()
+        request_counts = {name: len(values) for name, values in stats.latencies.items()}
+        frame_count, frame_latency_start = stats.frames, len(stats.frame_latencies)
+
+        rss_peak = rss_base or 0
+        while time.monotonic() < deadline:
+            await asyncio.sleep(1)
+            rss_peak = max(rss_peak, process_rss(process.pid) or 0)
+        elapsed = time.monotonic() - measure_started
+        rss_loaded = process_rss(process.pid)
+        after = await scrape_metrics(options.port)
+        rows_after = message_rows(database_url)
+        await asyncio.gather(*clients, return_exceptions=True)
+
+    requests = sum(len(values) - request_counts.get(name, 0) for name, values in stats.latencies.items())
+    commits = parse_commits(after) - parse_commits(before)
+    sessions = max(stats.sessions, 1)
+    return {
+        "measured_seconds": round(elapsed, 2),
+        "sessions": stats.sessions,
+        "requests_per_second": round(requests / elapsed, 1),
+        "requests_per_client_minute": round(requests / elapsed * 60 / sessions, 2),
+        "errors": dict(stats.errors),
+        "stream_errors": stats.stream_errors,
+        "latency_ms": {name: percentiles(values) for name, values in sorted(stats.latencies.items())},
+        "sse_frames_per_second": round((stats.frames - frame_count) / elapsed, 1),
+        "sse_frame_latency_ms": percentiles(stats.frame_latencies[frame_latency_start:]),
+        "pings": stats.pings,
+        "pongs": stats.pongs,
+        "pong_latency_ms": percentiles(stats.pong_latencies),
+        "rss_base_mb": round(rss_base / 1048576, 1) if rss_base else None,
+        "rss_loaded_mb": round(rss_loaded / 1048576, 1) if rss_loaded else None,
+        "rss_peak_mb": round(rss_peak / 1048576, 1) if rss_peak else None,
+        "rss_per_1k_sessions_mb": round((rss_loaded - rss_base) / sessions * 1000 / 1048576, 2)
+        if rss_base and rss_loaded else None,
+        "db_commits_per_second": round(commits / elapsed, 1) if options.workers == 1 else None,
+        "db_message_rows_per_second": round((rows_after - rows_before) / elapsed, 1)
+        if rows_before is not None else None,
+    }
+
+
+# --compare에서 비교할 지표 (이름, 값이 클수록 좋은지)
+COMPARED = (
+    ("requests_per_second", True),
+    ("requests_per_client_minute", False),
+    ("sse_frames_per_second", True),
+    ("sse_frame_latency_ms.p50", False),
+    ("sse_frame_latency_ms.p99", False),
+    ("pong_latency_ms.p99", False),
+    ("rss_per_1k_sessions_mb", False),
+    ("db_commits_per_second", None),
+    ("db_message_rows_per_second", True),
+)
+
+
+def lookup(results: dict, key: str):
+    for part in key.split("."):
+        results = results.get(part) if isinstance(results, dict) else None
+    return results
+
+
+def compare(previous: dict, current: dict):
+    print(f"\ncompared with {previous.get('commit')} ({previous.get('timestamp')}):")
+    changed = {key for key in set(previous.get("config", {})) | set(current["config"])
+               if previous.get("config", {}).get(key) != current["config"].get(key)}
+    if changed:
+        print(f"  note: config differs ({', '.join(sorted(changed))}), results are not directly comparable")
+    for key, higher_is_better in COMPARED:
+        old, new = lookup(previous["results"], key), lookup(current["results"], key)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        worse = higher_is_better is not None and (change < 0 if higher_is_better else change > 0)
+        flag = "  (worse)" if worse and abs(change) >= 5 else ""
+        print(f"  {key:<30} {old:>10} -> {new:<10} {change:+6.1f}%{flag}")
+
+
+def report(results: dict):
+    print(f"sessions {results['sessions']}, measured {results['measured_seconds']}s")
+    print(f"requests/s {results['requests_per_second']} ({results['requests_per_client_minute']}/client/min)  "
+          f"errors {results['errors']}  "
+          f"stream errors {results['stream_errors']}")
+    for name, latency in results["latency_ms"].items():
+        print(f"  {name:<10} n={latency['count']:<7} p50 {latency['p50']}ms  p99 {latency['p99']}ms")
+    frame = results["sse_frame_latency_ms"]
+    print(f"SSE frames/s {results['sse_frames_per_second']}  latency p50 {frame['p50']}ms "
+          f"p95 {frame['p95']}ms p99 {frame['p99']}ms")
+    print(f"ping/pong {results['pings']}/{results['pongs']}  pong latency p99 {results['pong_latency_ms']['p99']}ms")
+    print(f"RSS base {results['rss_base_mb']}MB loaded {results['rss_loaded_mb']}MB "
+          f"-> {results['rss_per_1k_sessions_mb']}MB per 1k sessions")
+    print(f"DB commits/s {results['db_commits_per_second']}  message rows/s {results['db_message_rows_per_second']}")
+
+
+async def main(options) -> int:
+    if options.websocket and websockets is None:
+        print("--websocket requires the websockets package")
+        return 1
+    results = await run_load(options)
+    report(results)
+    config = {key: value for key, value in vars(options).items() if key not in ("output", "compare")}
+    document = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": config, "results": results}
+    output = options.output or os.path.join(
+        RESULTS_DIR, f"load-{document['commit'] or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"saved {output}")
+    if options.compare:
+        with open(options.compare) as f:
+            compare(json.load(f), document)
+    ok = results["sessions"] == options.clients and not results["stream_errors"]
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--polling", type=float, default=0.5, help="polling 클라이언트 비율 (나머지는 SSE)")
+    parser.add_argument("--websocket", type=float, default=0.0, help="websocket 클라이언트 비율")
+    parser.add_argument("--duration", type=float, default=20, help="측정 시간 (초)")
+    parser.add_argument("--ramp", type=float, default=5, help="클라이언트를 나눠 시작하는 시간 (초)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="index.html의 /message 조회 간격 (초)")
+    parser.add_argument("--ping-check-interval", type=float, default=5.0, help="index.html의 /ping 확인 간격 (초)")
+    parser.add_argument("--ping-interval", type=float, default=5, help="서버 PING_INTERVAL (초)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--database-url", default=None, help="기본: 임시 디렉터리의 SQLite")
+    parser.add_argument("--output", default=None, help=f"결과 JSON 경로 (기본: {RESULTS_DIR}/load-<commit>-<time>.json)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--port", type=int, default=8544)
+    sys.exit(asyncio.run(main(parser.parse_args())))
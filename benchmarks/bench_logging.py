@@ -0,0 +1,74 @@
+"""로깅 비용 벤치마크 (이벤트 루프 스레드에서 치르는 비용)
+
+레코드를 호출 스레드에서 바로 파일에 쓰는 기존 방식(echo=True의 StreamHandler)과
+큐 기반 파이프라인(샘플링/초당 제한 포함)의 레코드당 비용을 비교합니다.
+
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging 200000
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from app.logging_config import LOG_FORMAT, LoggingPipeline, SamplingFilter
+
+
+def emit(logger: logging.Logger, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        logger.info("INSERT INTO user_messages (session_id, message_counter) VALUES (%s, %s)", "abcd", i)
+    return time.perf_counter() - started
+
+
+def main(count: int):
+    log_path = os.path.join(tempfile.mkdtemp(prefix="subtree-log-"), "out.log")
+    root = logging.getLogger()
+    logger = logging.getLogger("sqlalchemy.engine.Engine")
+
+    # 기존: 호출 스레드에서 포맷 + write
+    handler = logging.FileHandler(log_path)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    logger.setLevel(logging.INFO)
+    sync_elapsed = emit(logger, count)
+    root.removeHandler(handler)
+    handler.close()
+
+    # 큐 기반: 제한 없이 모두 통과 (포맷은 호출 스레드, 쓰기는 리스너 스레드)
+    sys.stderr = open(log_path, "a")
+    pipeline = LoggingPipeline()
+    pipeline.filter = SamplingFilter(rate_limit=0)
+    pipeline.start("INFO")
+    logger.setLevel(logging.INFO)
+    queued_elapsed = emit(logger, count)
+    dropped = pipeline.handler.dropped
+    pipeline.stop()
+
+    # 큐 기반 + 카테고리 샘플링 1% + 초당 100건 제한 (운영 설정 예시)
+    pipeline = LoggingPipeline()
+    pipeline.filter = SamplingFilter({"sqlalchemy.engine": 0.01}, rate_limit=100)
+    pipeline.start("INFO")
+    logger.setLevel(logging.INFO)
+    sampled_elapsed = emit(logger, count)
+    pipeline.stop()
+
+    # SQL_ECHO=false (기본값): 엔진 로거 레벨에서 바로 걸러진다
+    logger.setLevel(logging.WARNING)
+    off_elapsed = emit(logger, count)
+    sys.stderr = sys.__stderr__
+
+    print(f"{count} records, cost on the calling thread:")
+    for name, elapsed in (("sync FileHandler (echo=True)", sync_elapsed),
+                          ("queue handler", queued_elapsed),
+                          ("queue + 1% sample + 100/s", sampled_elapsed),
+                          ("SQL_ECHO=false", off_elapsed)):
+        print(f"  {name:<30} {elapsed / count * 1e6:7.2f} us/record")
+    if dropped:
+        print(f"  (queue handler dropped {dropped} records: queue full)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
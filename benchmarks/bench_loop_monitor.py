@@ -0,0 +1,116 @@
+"""이벤트 루프 모니터 확인 벤치마크
+
+1) 세션 N개가 모두 ping 데드라인을 넘긴 InMemorySessionStore에서 due_pings()를 실행해
+   루프를 오래 잡게 만들고, LoopMonitor가 그 시간과 스택(due_pings 프레임)을 기록하는지 봅니다.
+2) 모니터를 켠 채/끈 채로 asyncio.sleep(0) 왕복 처리량을 비교합니다.
+3) 앱을 띄워 SSE 스트림을 연 뒤 /api/system/loop, /api/system/tasks?detail=true를 조회합니다.
+
+    python -m benchmarks.bench_loop_monitor
+    python -m benchmarks.bench_loop_monitor --sessions 500000
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+from benchmarks._http import HttpClient
+from benchmarks._server import run_app
+
+
+async def detect_stall(options) -> bool:
+    from app.loop_monitor import LoopMonitor
+    from app.session_store import InMemorySessionStore
+
+    store = InMemorySessionStore(ping_interval=0, ping_timeout=3600)
+    await store.add_many([[str(uuid.uuid4()), None, None] for _ in range(options.sessions)])
+    monitor = LoopMonitor(interval=0.05, threshold_ms=options.threshold)
+    monitor.start()
+    await asyncio.sleep(0.2)
+
+    started = time.perf_counter()
+    due = await store.due_pings()  # 세션 수에 비례하는 작업, 중간에 양보하지 않는다
+    held = (time.perf_counter() - started) * 1000
+    await asyncio.sleep(0.2)
+    monitor.stop()
+
+    status = monitor.get_status()
+    print(f"due_pings over {len(due)} sessions held the loop {held:.0f}ms; "
+          f"lag max {status['lag_max_ms']:.0f}ms, slow callbacks {status['slow_callbacks']}")
+    found = False
+    for record in status["recent_slow"]:
+        print(f"  {record['duration_ms']}ms task={record['task']} coroutine={record['coroutine']}")
+        for line in record["stack"][:4]:
+            print(f"    {line}")
+        found = found or any("due_pings" in line for line in record["stack"])
+    print(f"stall attributed to due_pings: {'ok' if found else 'MISSING'}")
+    return found
+
+
+async def overhead(options):
+    from app.loop_monitor import LoopMonitor
+
+    async def spin() -> float:
+        started = time.perf_counter()
+        for _ in range(options.yields):
+            await asyncio.sleep(0)
+        return options.yields / (time.perf_counter() - started)
+
+    off, on = [], []
+    monitor = LoopMonitor()
+    for i in range(6):
+        # 순서에 따른 편향을 줄이려고 번갈아 실행한다
+        if i % 2:
+            monitor.start()
+            on.append(await spin())
+            monitor.stop()
+        else:
+            off.append(await spin())
+    off, on = max(off), max(on)
+    print(f"asyncio.sleep(0) x{options.yields} (best of 3): monitor off {off:,.0f}/s, on {on:,.0f}/s "
+          f"({(on - off) / off * 100:+.2f}%)")
+
+
+async def live(options) -> bool:
+    async with run_app(options.port, 1, LOOP_LAG_INTERVAL=0.1):
+        client = HttpClient(port=options.port)
+        _, created = await client.post_json("/api/session/batch", {"count": options.streams})
+        streams = []
+        for item in created["sessions"]:
+            stream = HttpClient(port=options.port)
+            assert await stream.open_stream(f"/stream/{item['session_id']}") == 200
+            await stream.read_chunk()
+            streams.append(stream)
+        await asyncio.sleep(0.5)
+        _, loop_status = await client.get_json("/api/system/loop")
+        _, tasks = await client.get_json("/api/system/tasks?detail=true&limit=6")
+        _, ping_status = await client.get_json("/api/system/ping-status")
+        for stream in streams:
+            await stream.close()
+        await client.close()
+
+    print(f"/api/system/loop: samples={loop_status['samples']} lag avg {loop_status['lag_avg_ms']}ms "
+          f"p99 {loop_status['lag_p99_ms']}ms; loop_monitor_active="
+          f"{ping_status['background_tasks']['loop_monitor_active']}")
+    print(f"/api/system/tasks: {tasks['total']} tasks in {tasks['groups']} groups")
+    for group in tasks["by_coroutine"]:
+        waiting = next(iter(group["waiting_at"]), "")
+        print(f"  {group['count']:5d}  {group['coroutine']:<55} {waiting[:70]}")
+    return loop_status["running"] and loop_status["samples"] > 0 and tasks["total"] >= options.streams
+
+
+async def main(options) -> int:
+    found = await detect_stall(options)
+    await overhead(options)
+    ok = await live(options)
+    return 0 if found and ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300_000)
+    parser.add_argument("--threshold", type=float, default=50, help="LOOP_SLOW_THRESHOLD_MS")
+    parser.add_argument("--yields", type=int, default=500_000)
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8543)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,115 @@
+"""지표 수집 오버헤드 벤치마크와 /metrics 확인
+
+1) SSEResponse 전송 루프를 가짜 ASGI send(즉시 반환)로 돌려, 지표를 끈 경우와 켠 경우
+   (METRICS_SAMPLE_EVERY 샘플링 + 카운터)의 청크당 시간을 비교합니다.
+2) 앱을 띄워 세션 메시지/스트림/pong 요청을 보낸 뒤 /metrics를 받아
+   필요한 지표가 모두 있는지 확인합니다.
+
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --chunks 500000 --repeat 7
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks._http import HttpClient
+from benchmarks._server import run_app
+
+EXPECTED = (
+    'http_request_duration_seconds_bucket{method="GET",route="/api/session/{session_id}/message"',
+    'http_requests_total{method="POST",route="/api/session/{session_id}/pong",status="200"}',
+    'db_commit_duration_seconds_count{operation="save_message"}',
+    'db_commit_duration_seconds_count{operation="update_session_activity"}',
+    "db_pool_checkout_wait_seconds_count",
+    "db_pool_checkout_waiting",
+    "db_pool_checked_out",
+    'sse_frames_sent_total{kind="session"}',
+    'sse_bytes_sent_total{kind="session"}',
+    "sse_send_duration_seconds_count",
+    'sse_open_streams{kind="session"}',
+    "sessions_active",
+    "sessions_ping_pending",
+)
+
+
+async def stream_loop(chunks: int, enabled: bool) -> float:
+    from app.metrics import metrics
+    from app.sse import SSEResponse
+
+    frame = b'data: {"type":"message","counter":1,"message":"Stream message #1"}\n\n'
+
+    async def frames():
+        for _ in range(chunks):
+            yield frame
+            await asyncio.sleep(0)  # 생성 쪽이 writer에 양보해 청크를 하나씩 보낸다
+
+    never = asyncio.Event()
+
+    async def receive():
+        await never.wait()
+
+    async def send(message):
+        pass
+
+    metrics.enabled = enabled
+    response = SSEResponse(frames(), kind="bench", heartbeat=0)
+    started = time.perf_counter()
+    await response({"type": "http", "client": None}, receive, send)
+    return (time.perf_counter() - started) / chunks
+
+
+async def overhead(options) -> float:
+    off, on = [], []
+    for i in range(options.repeat):
+        # 순서에 따른 편향을 줄이려고 번갈아 먼저 실행한다
+        for enabled in ((False, True) if i % 2 else (True, False)):
+            (on if enabled else off).append(await stream_loop(options.chunks, enabled))
+    off_ns, on_ns = statistics.median(off) * 1e9, statistics.median(on) * 1e9
+    change = (on_ns - off_ns) / off_ns * 100
+    print(f"SSE send loop ({options.chunks} chunks, median of {options.repeat}): "
+          f"metrics off {off_ns:.0f}ns/chunk, on {on_ns:.0f}ns/chunk ({change:+.2f}%)")
+    return change
+
+
+async def scrape(options) -> list:
+    async with run_app(options.port, 1, METRICS_SAMPLE_EVERY=1, ACTIVITY_FLUSH_INTERVAL=0):
+        client = HttpClient(port=options.port)
+        _, created = await client.post_form("/api/session/create", {"username": "metrics"})
+        session_id = created["session_id"]
+        for _ in range(5):
+            await client.get_json(f"/api/session/{session_id}/message")
+        await client.post_json(f"/api/session/{session_id}/pong", {})
+
+        stream = HttpClient(port=options.port)
+        assert await stream.open_stream(f"/stream/{session_id}") == 200
+        await stream.read_chunk()
+        await stream.read_chunk()
+        status, headers, body = await client.request("GET", "/metrics")
+        await stream.close()
+        await client.close()
+
+    text = body.decode()
+    print(f"/metrics: {status} {headers.get('content-type')} {len(text.splitlines())} lines")
+    return [name for name in EXPECTED if name not in text]
+
+
+async def main(options) -> int:
+    change = await overhead(options)
+    missing = await scrape(options)
+    for name in missing:
+        print(f"missing: {name}")
+    ok = not missing and change < options.max_overhead
+    print(f"overhead budget {options.max_overhead:.1f}%: {'ok' if change < options.max_overhead else 'EXCEEDED'}; "
+          f"metrics present: {'ok' if not missing else 'MISSING'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-overhead", type=float, default=1.0, help="허용 오버헤드 (%%)")
+    parser.add_argument("--port", type=int, default=8542)
+    sys.exit(asyncio.run(main(parser.parse_args())))
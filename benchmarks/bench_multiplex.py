@@ -0,0 +1,216 @@
+"""다중화 SSE 스트림 벤치마크
+
+세션 N개의 이벤트를 받는 두 방식을 앱을 새로 띄워 각각 측정합니다.
+
+1) 세션마다 /stream/{session_id} 연결 하나 (N개)
+2) /stream/multiplex 연결 하나에 POST /stream/multiplex/{stream_id}로 N개 세션을 추가
+
+서버 프로세스의 CPU 시간(메시지 1k개당), RSS 증가분, asyncio 태스크 수, 받은 메시지/초,
+스트림 쓰기(청크) 수를 비교합니다. 다중화 방식에서는 구독 중 세션 제거와 세션 종료 시
+session_disconnected 프레임이 해당 session_id로 오는지도 확인합니다.
+
+    python -m benchmarks.bench_multiplex
+    python -m benchmarks.bench_multiplex --sessions 2000 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from benchmarks._http import HttpClient
+from benchmarks._server import run_app
+from benchmarks.bench_load import process_rss
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def process_cpu(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+
+
+def parse_events(buffer: bytes):
+    *frames, rest = buffer.split(b"\n\n")
+    events = []
+    for frame in frames:
+        for line in frame.split(b"\n"):
+            if line.startswith(b"data: "):
+                events.append(json.loads(line[6:]))
+    return events, rest
+
+
+class StreamReader:
+    """열린 SSE 연결 하나를 계속 읽으며 session_id별 메시지 수를 셉니다."""
+
+    def __init__(self, client: HttpClient):
+        self.client = client
+        self.buffer = b""
+        self.messages = Counter()
+        self.events = []
+        self.task = None
+
+    async def next_events(self):
+        while True:
+            chunk = await self.client.read_chunk()
+            if not chunk:
+                raise ConnectionError("stream closed")
+            events, self.buffer = parse_events(self.buffer + chunk)
+            if events:
+                return events
+
+    async def run(self):
+        try:
+            while True:
+                for event in await self.next_events():
+                    if event.get("type") == "message":
+                        self.messages[event["session_id"]] += 1
+                    else:
+                        self.events.append(event)
+        except (ConnectionError, OSError, asyncio.CancelledError):
+            pass
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        await self.client.close()
+
+
+async def create_sessions(port: int, count: int) -> list:
+    client = HttpClient(port=port)
+    _, created = await client.post_json("/api/session/batch", {"usernames": [f"mux_{i}" for i in range(count)]})
+    await client.close()
+    return [item["session_id"] for item in created["sessions"]]
+
+
+async def system_status(port: int, path: str) -> dict:
+    client = HttpClient(port=port)
+    _, body = await client.get_json(path)
+    await client.close()
+    return body
+
+
+async def measure(port: int, process, readers: list, options) -> dict:
+    await asyncio.sleep(options.warmup)
+    before = sum(sum(reader.messages.values()) for reader in readers)
+    cpu_before, started = process_cpu(process.pid), time.monotonic()
+    await asyncio.sleep(options.duration)
+    cpu, elapsed = process_cpu(process.pid) - cpu_before, time.monotonic() - started
+    messages = sum(sum(reader.messages.values()) for reader in readers) - before
+    streams = await system_status(port, "/api/system/streams?limit=0")
+    tasks = await system_status(port, "/api/system/tasks")
+    return {
+        "messages_per_second": messages / elapsed,
+        "cpu_ms_per_1k_messages": cpu / max(messages, 1) * 1e6,
+        "cpu_percent": cpu / elapsed * 100,
+        "rss": process_rss(process.pid),
+        "tasks": tasks["total"],
+        "streams": streams["open"],
+    }
+
+
+async def run_per_session(options) -> dict:
+    async with run_app(options.port, 1, LOOP_MONITOR_ENABLED="false") as (_, _, process):
+        session_ids = await create_sessions(options.port, options.sessions)
+        rss_base = process_rss(process.pid)
+        readers = []
+        for session_id in session_ids:
+            client = HttpClient(port=options.port)
+            assert await client.open_stream(f"/stream/{session_id}") == 200
+            reader = StreamReader(client)
+            reader.start()
+            readers.append(reader)
+        result = await measure(options.port, process, readers, options)
+        for reader in readers:
+            await reader.stop()
+    result["rss_delta"] = result["rss"] - rss_base
+    return result
+
+
+async def run_multiplexed(options) -> tuple:
+    checks = {}
+    async with run_app(options.port, 1, LOOP_MONITOR_ENABLED="false",
+                       MULTIPLEX_MAX_SESSIONS=str(options.sessions)) as (_, _, process):
+        session_ids = await create_sessions(options.port, options.sessions)
+        rss_base = process_rss(process.pid)
+        client = HttpClient(port=options.port)
+        assert await client.open_stream("/stream/multiplex") == 200
+        reader = StreamReader(client)
+        opened = (await reader.next_events())[0]
+        stream_id = opened["stream_id"]
+        checks["open frame"] = opened["type"] == "multiplex_open" and opened["session_id"] is None
+        reader.start()
+
+        control = HttpClient(port=options.port)
+        for start in range(0, len(session_ids), options.chunk):
+            status, _ = await control.post_json(f"/stream/multiplex/{stream_id}",
+                                                {"add": session_ids[start:start + options.chunk] + ["missing"]})
+            assert status == 200, status
+        await control.close()
+        result = await measure(options.port, process, [reader], options)
+        result["rss_delta"] = result["rss"] - rss_base
+        status = await system_status(options.port, "/api/system/multiplex")
+        checks["all sessions subscribed"] = status["sessions"] == options.sessions
+        updated = [event for event in reader.events if event.get("type") == "multiplex_updated"]
+        checks["missing session rejected"] = all(event["rejected"] == ["missing"] for event in updated)
+
+        # 절반을 빼면 그 세션의 메시지가 멈춘다 (측정 중 keep-alive가 끊기므로 새 연결)
+        control = HttpClient(port=options.port)
+        removed = session_ids[: options.sessions // 2]
+        for start in range(0, len(removed), options.chunk):
+            await control.post_json(f"/stream/multiplex/{stream_id}", {"remove": removed[start:start + options.chunk]})
+        await asyncio.sleep(0.5)
+        counts = {session_id: reader.messages[session_id] for session_id in session_ids}
+        await asyncio.sleep(2.5)
+        checks["removed sessions stop"] = all(reader.messages[sid] == counts[sid] for sid in removed)
+        checks["kept sessions continue"] = all(reader.messages[sid] > counts[sid] for sid in session_ids[len(removed):])
+
+        # 세션 종료는 그 session_id로 알리고 구독에서 뺀다
+        victim = session_ids[-1]
+        await control.request("DELETE", f"/api/session/{victim}")
+        await asyncio.sleep(0.5)
+        checks["disconnect tagged"] = any(event.get("type") == "session_disconnected" and event["session_id"] == victim
+                                          for event in reader.events)
+        status = await system_status(options.port, "/api/system/multiplex")
+        checks["disconnected session dropped"] = status["sessions"] == options.sessions - len(removed) - 1
+        checks["every frame tagged"] = all("session_id" in event for event in reader.events)
+        streams = await system_status(options.port, "/api/system/streams?limit=1")
+        result["writes_per_second"] = streams["streams"][0]["frames"] / (streams["streams"][0]["age"] or 1)
+        await control.close()
+        await reader.stop()
+        await asyncio.sleep(0.5)
+        status = await system_status(options.port, "/api/system/multiplex")
+        checks["stream closed on disconnect"] = status["open"] == 0
+    return result, checks
+
+
+async def main(options) -> int:
+    per_session = await run_per_session(options)
+    multiplexed, checks = await run_multiplexed(options)
+    print(f"{options.sessions} sessions, measured {options.duration}s after {options.warmup}s warmup")
+    print(f"{'':<22}{'messages/s':>12}{'CPU ms/1k msg':>15}{'CPU %':>8}{'RSS +MB':>9}{'tasks':>7}{'streams':>9}")
+    for name, result in (("per-session streams", per_session), ("one multiplexed", multiplexed)):
+        print(f"{name:<22}{result['messages_per_second']:>12.1f}{result['cpu_ms_per_1k_messages']:>15.1f}"
+              f"{result['cpu_percent']:>8.1f}{result['rss_delta'] / 1048576:>9.1f}{result['tasks']:>7}"
+              f"{result['streams']:>9}")
+    print(f"multiplexed stream writes/s: {multiplexed['writes_per_second']:.1f} "
+          f"(vs ~{per_session['messages_per_second']:.0f} socket writes/s for per-session streams)")
+    for name, ok in checks.items():
+        print(f"  {name:<32} {'ok' if ok else 'FAILED'}")
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=8, help="측정 시간 (초)")
+    parser.add_argument("--warmup", type=float, default=3, help="연결 후 측정 전 대기 (초)")
+    parser.add_argument("--chunk", type=int, default=250, help="구독 변경 요청 하나의 세션 수")
+    parser.add_argument("--port", type=int, default=8545)
+    sys.exit(asyncio.run(main(parser.parse_args())))
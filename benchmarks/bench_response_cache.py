@@ -0,0 +1,101 @@
+"""/api/events 응답 캐시 벤치마크 (대시보드 폴링 시나리오)
+
+여러 클라이언트가 같은 페이지를 반복해서 조회할 때 캐시 끔(RESPONSE_CACHE_TTL=0)과
+캐시 켬, If-None-Match 조건부 요청의 처리량을 비교합니다. 콜드 상태에서 동시에 몰린
+요청이 조회 한 번으로 합쳐지는지, 쓰기 후 바로 새 ETag가 나오는지도 확인합니다.
+
+    python -m benchmarks.bench_response_cache
+    python -m benchmarks.bench_response_cache --clients 50 --requests 200 --rows 5000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+from benchmarks._http import HttpClient
+from benchmarks._server import make_workdir, run_app
+
+PAGE = "/api/events?limit=1000"
+
+
+def seed_events(db_path: str, rows: int):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM events")
+    conn.executemany(
+        "INSERT INTO events (id, title, content, event_type, is_active) VALUES (?, ?, ?, 'notice', 1)",
+        ((i, f"event {i}", "x" * 200) for i in range(1, rows + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def poll(port: int, requests: int, conditional: bool) -> int:
+    client = HttpClient(port=port)
+    etag = None
+    for _ in range(requests):
+        headers = {"If-None-Match": etag} if conditional and etag else None
+        status, response_headers, _ = await client.request("GET", PAGE, headers=headers)
+        assert status in (200, 304), status
+        etag = response_headers.get("etag", etag)
+    await client.close()
+    return requests
+
+
+async def measure(port: int, options, conditional: bool) -> float:
+    started = time.perf_counter()
+    done = sum(await asyncio.gather(*(
+        poll(port, options.requests, conditional) for _ in range(options.clients)
+    )))
+    return done / (time.perf_counter() - started)
+
+
+async def stampede(port: int, clients: int) -> dict:
+    """콜드 캐시에 같은 키로 동시에 요청해 DB 조회 수를 확인합니다."""
+    path = "/api/events?limit=999"
+    await asyncio.gather(*(HttpClient(port=port).request("GET", path) for _ in range(clients)))
+    _, status = await HttpClient(port=port).get_json("/api/system/response-cache")
+    return status["routes"]["/api/events"]
+
+
+async def invalidation(port: int) -> bool:
+    client = HttpClient(port=port)
+    _, before, _ = await client.request("GET", "/api/users")
+    status, _ = await client.post_form("/api/session/create", {"username": "bench_new_user"})
+    assert status == 200, status
+    _, after, _ = await client.request("GET", "/api/users", headers={"If-None-Match": before["etag"]})
+    await client.close()
+    return after["etag"] != before["etag"] and after["x-cache"] == "MISS"
+
+
+async def main(options) -> int:
+    results = {}
+    for index, (name, ttl, conditional) in enumerate([
+        ("no cache", 0, False),
+        ("cache", 60, False),
+        ("cache + If-None-Match", 60, True),
+    ]):
+        workdir = make_workdir()
+        port = options.port + index
+        async with run_app(port, 1, workdir, RESPONSE_CACHE_TTL=ttl):
+            seed_events(os.path.join(workdir, "bench.db"), options.rows)
+            if ttl:
+                coalesce = await stampede(port, options.clients)
+            results[name] = await measure(port, options, conditional)
+            if name == "cache":
+                invalidated = await invalidation(port)
+        print(f"{name:<24} {results[name]:8.0f} req/s")
+
+    print(f"stampede of {options.clients}: misses={coalesce['misses']} coalesced={coalesce['coalesced']}")
+    print(f"write invalidates cached /api/users: {'ok' if invalidated else 'FAILED'}")
+    return 0 if invalidated and coalesce["misses"] == 1 else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=100, help="클라이언트당 요청 수")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8521)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,103 @@
+"""user_messages 보관 기간 삭제 벤치마크
+
+만료된 행과 보관 기간 안의 행을 채운 뒤, 배치 삭제(MessageRetention)와
+한 번의 DELETE ... WHERE created_at < cutoff를 비교합니다. 배치 삭제는 전체 시간이
+조금 더 걸리더라도 트랜잭션 하나가 잠금을 잡는 시간(가장 긴 배치)이 짧아야 합니다.
+SQLite 파일 DB 사용.
+
+    python -m benchmarks.bench_retention
+    python -m benchmarks.bench_retention --expired 1000000 --batch 5000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_WORKDIR = tempfile.mkdtemp(prefix="subtree-retention-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_WORKDIR, 'bench.db')}")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.database import engine, init_db  # noqa: E402
+from app.retention import MessageRetention  # noqa: E402
+
+DB_PATH = os.path.join(_WORKDIR, "bench.db")
+
+
+def seed(expired: int, fresh: int):
+    old = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d %H:%M:%S")
+    new = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM user_messages")
+    conn.executemany(
+        "INSERT INTO user_messages (session_id, message_counter, message_content, created_at) VALUES (?, ?, 'x', ?)",
+        ((f"s{i % 500}", i, old if i < expired else new) for i in range(expired + fresh)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def remaining() -> int:
+    conn = sqlite3.connect(DB_PATH)
+    count = conn.execute("SELECT COUNT(*) FROM user_messages").fetchone()[0]
+    conn.close()
+    return count
+
+
+class TransactionTimer:
+    """DELETE 트랜잭션별 시간(잠금을 잡는 시간)을 잽니다."""
+
+    def __init__(self):
+        self.longest = 0.0
+        self._started = None
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "commit", self._commit)
+
+    def _before(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("DELETE") and self._started is None:
+            self._started = time.perf_counter()
+
+    def _commit(self, *args):
+        if self._started is not None:
+            self.longest = max(self.longest, time.perf_counter() - self._started)
+            self._started = None
+
+
+async def main(options) -> int:
+    await init_db()
+
+    seed(options.expired, options.fresh)
+    started = time.perf_counter()
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM user_messages WHERE created_at < ?",
+                 ((datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S"),))
+    conn.commit()
+    conn.close()
+    single = time.perf_counter() - started
+    print(f"single DELETE:  {options.expired} rows in {single:6.2f}s  (one transaction of {single * 1000:.0f}ms)")
+
+    seed(options.expired, options.fresh)
+    timer = TransactionTimer()
+    retention = MessageRetention(retention_days=7, batch_size=options.batch, pause=0)
+    started = time.perf_counter()
+    purged = await retention.run_once()
+    batched = time.perf_counter() - started
+    left = remaining()
+    status = retention.get_status()
+    print(f"batched purge:  {purged} rows in {batched:6.2f}s  ({status['batches']} batches, "
+          f"longest transaction {timer.longest * 1000:.1f}ms, {purged / batched:,.0f} rows/s)")
+    print(f"remaining rows: {left} (expected {options.fresh}), lag_seconds={status['lag_seconds']:.0f}")
+    await engine.dispose()
+    return 0 if purged == options.expired and left == options.fresh else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--expired", type=int, default=300_000)
+    parser.add_argument("--fresh", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,56 @@
+"""세션 일괄 생성 처리량 벤치마크
+
+단일 생성 API를 순서대로 N번 호출하는 경우와 POST /api/session/batch 한 번으로
+N개를 만드는 경우의 초당 생성 세션 수를 비교합니다 (uvicorn + SQLite).
+
+    python -m benchmarks.bench_session_batch
+    python -m benchmarks.bench_session_batch --sessions 5000 --users 200
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks._http import HttpClient
+from benchmarks._server import run_app
+
+
+async def main(options) -> int:
+    async with run_app(options.port):
+        client = HttpClient(port=options.port)
+        usernames = [f"device_{i % options.users}" for i in range(options.sessions)]
+
+        started = time.perf_counter()
+        for username in usernames:
+            status, _ = await client.post_form("/api/session/create", {"username": username})
+            assert status == 200, status
+        single = options.sessions / (time.perf_counter() - started)
+
+        batch_usernames = [f"fleet_{i % options.users}" for i in range(options.sessions)]
+        started = time.perf_counter()
+        status, body = await client.post_json("/api/session/batch", {"usernames": batch_usernames})
+        batch = options.sessions / (time.perf_counter() - started)
+        assert status == 200 and body["created"] == options.sessions, (status, body)
+        assert len({item["session_id"] for item in body["sessions"]}) == options.sessions
+
+        status, _ = await client.get_json(f"/api/session/{body['sessions'][-1]['session_id']}/info")
+        assert status == 200, status
+
+        # 최대 개수를 넘는 count는 목록을 만들기 전에 400
+        status, _ = await client.post_json("/api/session/batch", {"count": 10 ** 12})
+        assert status == 400, status
+        await client.close()
+
+    speedup = batch / single
+    print(f"single endpoint: {single:9.0f} sessions/s")
+    print(f"batch endpoint:  {batch:9.0f} sessions/s  ({speedup:.1f}x)")
+    return 0 if speedup >= options.min_speedup else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8401)
+    parser.add_argument("--min-speedup", type=float, default=20.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,276 @@
+"""SessionManager 규모별 마이크로벤치마크와 회귀 예산 검사
+
+DB는 가짜 AsyncSession(문장을 받기만 함)으로 대체하고, 세션 1k/10k/100k/1M개를 채운 상태에서
+다음 작업의 1회당 시간(µs)과 tracemalloc으로 잰 1회당 남는 메모리(bytes)를 측정합니다.
+
+- create_session, get_next_message_counter, send_ping, handle_pong: 임의 세션에 대해 --ops회
+- ping sweep (get_sessions_needing_ping + send_ping), cleanup sweep (check_inactive_sessions):
+  데드라인이 지난 세션 --due개를 두고 한 번 훑는 시간
+- populate: 세션 1개를 채우는 데 드는 메모리
+
+결과를 예산 파일(session_manager_budget.json)과 비교해 넘으면 종료 코드 1을 반환합니다.
+예산은 모든 크기에 적용되는 max_us / max_bytes와, 가장 큰 크기와 가장 작은 크기의
+시간 비율 max_scaling(세션 수에 비례하는 코드가 끼어들면 커짐)으로 구성됩니다.
+uuid와 무작위 선택은 --seed로 고정합니다.
+
+    python -m benchmarks.bench_session_manager
+    python -m benchmarks.bench_session_manager --sizes 1000 100000 --json out.json
+    python -m benchmarks.bench_session_manager --write-budget   # 현재 결과 x 여유 배수로 예산 갱신
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+from app.session_manager import SessionManager
+from app.session_store import InMemorySessionStore
+
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "session_manager_budget.json")
+OPERATIONS = ("create_session", "get_next_message_counter", "send_ping", "handle_pong",
+              "ping_sweep", "cleanup_sweep")
+
+
+class FakeResult:
+    def __init__(self, rowid: int):
+        self.lastrowid = rowid
+
+    def scalar_one(self):
+        return self.lastrowid
+
+
+class FakeDialect:
+    name = "mysql"  # upsert_user가 lastrowid 경로를 쓰도록
+
+
+class FakeBind:
+    dialect = FakeDialect()
+
+
+class FakeDB:
+    """AsyncSession 대신 쓰는 가짜 세션. 문장을 실행하지 않고 호출 수만 셉니다."""
+
+    bind = FakeBind()
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements += 1
+        return FakeResult(self.statements)
+
+    def add(self, instance):
+        self.statements += 1
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class Suite:
+    def __init__(self, size: int, options):
+        self.size = size
+        self.options = options
+        self.random = random.Random(options.seed)
+        # 채우는 데 걸리는 시간 동안 실제 데드라인이 지나지 않도록 간격을 길게 둔다
+        self.manager = SessionManager(InMemorySessionStore(ping_interval=3600, ping_timeout=3600))
+        self.db = FakeDB()
+        self.session_ids = []
+
+    def new_id(self) -> str:
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    async def populate(self) -> float:
+        """세션 size개를 등록하고 세션당 메모리(bytes)를 반환합니다."""
+        self.session_ids = [self.new_id() for _ in range(self.size)]
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for index, session_id in enumerate(self.session_ids):
+            await self.manager.register_session(session_id, index, f"user_{index % 1000}")
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return (after - before) / self.size
+
+    def sample(self, count: int) -> list:
+        return self.random.sample(self.session_ids, min(count, len(self.session_ids)))
+
+    def make_due(self, session_ids: list, schedule: str):
+        store = self.manager.store
+        for session_id in session_ids:
+            if schedule == "ping":
+                store._ping_schedule.schedule(session_id, 0.0)
+            else:
+                # collect_expired()가 마지막 활동 시각을 다시 확인하므로 활동 시각도 과거로 돌린다
+                store.sessions[session_id].last_activity_mono -= store.ping_timeout * 3
+                store._inactivity_schedule.schedule(session_id, 0.0)
+
+    async def run(self, operation: str):
+        """(준비, 측정할 코루틴 함수, 작업 수, 되돌리기)를 반환합니다."""
+        ops, due = self.options.ops, self.options.due
+        manager, db = self.manager, self.db
+        if operation == "create_session":
+            names = [f"user_{i % 1000}" for i in range(ops)]
+
+            async def body():
+                for name in names:
+                    await manager.create_session(db, name)
+            return None, body, ops, None
+        if operation in ("get_next_message_counter", "send_ping", "handle_pong"):
+            targets = self.sample(ops)
+            method = getattr(manager, operation)
+
+            async def body():
+                for session_id in targets:
+                    await method(session_id)
+            return None, body, ops, None
+        if operation == "ping_sweep":
+            targets = self.sample(due)
+
+            async def body():
+                for info in await manager.get_sessions_needing_ping():
+                    await manager.send_ping(info["session_id"])
+
+            async def restore():
+                for session_id in targets:
+                    await manager.handle_pong(session_id)
+            return (lambda: self.make_due(targets, "ping")), body, 1, restore
+        if operation == "cleanup_sweep":
+            targets = self.sample(due)
+
+            async def body():
+                removed = await manager.check_inactive_sessions(db)
+                assert len(removed) == len(targets), (len(removed), len(targets))
+
+            async def restore():
+                for session_id in targets:
+                    await manager.register_session(session_id, None, None)
+            return (lambda: self.make_due(targets, "expiry")), body, 1, restore
+        raise ValueError(operation)
+
+    async def measure(self, operation: str) -> dict:
+        best = float("inf")
+        retained = None
+        for repeat in range(self.options.repeat + 1):
+            prepare, body, count, restore = await self.run(operation)
+            if prepare:
+                prepare()
+            gc.collect()
+            trace = repeat == self.options.repeat  # 마지막 한 번은 tracemalloc으로 메모리만 잰다
+            if trace:
+                tracemalloc.start()
+                before = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            await body()
+            elapsed = time.perf_counter() - started
+            if trace:
+                retained = (tracemalloc.get_traced_memory()[0] - before) / count
+                tracemalloc.stop()
+            else:
+                best = min(best, elapsed / count)
+            if restore:
+                await restore()
+        return {"us": round(best * 1e6, 3), "bytes": round(retained, 1)}
+
+
+async def run_size(size: int, options) -> dict:
+    suite = Suite(size, options)
+    started = time.perf_counter()
+    results = {"populate": {"bytes": round(await suite.populate(), 1)}}
+    populate_seconds = time.perf_counter() - started
+    for operation in OPERATIONS:
+        results[operation] = await suite.measure(operation)
+    print(f"{size:>9,} sessions (populated in {populate_seconds:.1f}s, "
+          f"{results['populate']['bytes']:.0f} B/session)")
+    for operation in OPERATIONS:
+        result = results[operation]
+        unit = f"per sweep of {options.due}" if operation.endswith("sweep") else "per op"
+        print(f"    {operation:<26} {result['us']:>10.2f} µs {unit:<16} {result['bytes']:>8.1f} B retained")
+    return results
+
+
+def check_budget(results: dict, budget: dict) -> list:
+    failures = []
+    sizes = sorted(results, key=int)
+    for operation, limits in budget.get("operations", {}).items():
+        for size in sizes:
+            measured = results[size].get(operation)
+            if measured is None:
+                continue
+            if "max_us" in limits and measured.get("us", 0) > limits["max_us"]:
+                failures.append(f"{operation} @ {size}: {measured['us']}µs > {limits['max_us']}µs")
+            if "max_bytes" in limits and measured["bytes"] > limits["max_bytes"]:
+                failures.append(f"{operation} @ {size}: {measured['bytes']}B > {limits['max_bytes']}B")
+        if "max_scaling" in limits and len(sizes) > 1:
+            small, large = results[sizes[0]].get(operation), results[sizes[-1]].get(operation)
+            if small and large and small.get("us"):
+                scaling = large["us"] / small["us"]
+                if scaling > limits["max_scaling"]:
+                    failures.append(f"{operation}: {sizes[-1]}/{sizes[0]} time ratio {scaling:.1f}x "
+                                    f"> {limits['max_scaling']}x")
+    return failures
+
+
+def make_budget(results: dict, options) -> dict:
+    operations = {}
+    sizes = sorted(results, key=int)
+    for operation in ("populate",) + OPERATIONS:
+        values = [results[size][operation] for size in sizes]
+        limits = {"max_bytes": round(max(value["bytes"] for value in values) * options.memory_headroom + 64)}
+        if "us" in values[0]:
+            limits["max_us"] = round(max(value["us"] for value in values) * options.time_headroom, 1)
+            limits["max_scaling"] = round(max(values[-1]["us"] / values[0]["us"], 1.0) * options.time_headroom, 1)
+        operations[operation] = limits
+    return {"sizes": [int(size) for size in sizes], "operations": operations}
+
+
+async def main(options) -> int:
+    print(f"SessionManager microbenchmarks (ops={options.ops}, due={options.due}, "
+          f"best of {options.repeat}, seed={options.seed})")
+    results = {}
+    for size in options.sizes:
+        results[str(size)] = await run_size(size, options)
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if options.write_budget:
+        with open(options.budget, "w") as f:
+            json.dump(make_budget(results, options), f, indent=2)
+            f.write("\n")
+        print(f"budget written to {options.budget}")
+        return 0
+
+    with open(options.budget) as f:
+        budget = json.load(f)
+    failures = check_budget(results, budget)
+    for failure in failures:
+        print(f"BUDGET EXCEEDED: {failure}")
+    print(f"regression budget ({os.path.basename(options.budget)}): {'ok' if not failures else 'FAILED'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--ops", type=int, default=1000, help="작업별 측정 횟수")
+    parser.add_argument("--due", type=int, default=100, help="sweep마다 데드라인이 지난 세션 수")
+    parser.add_argument("--repeat", type=int, default=5, help="최솟값을 취할 반복 수")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--budget", default=BUDGET_PATH)
+    parser.add_argument("--write-budget", action="store_true", help="현재 결과로 예산 파일을 다시 씁니다")
+    parser.add_argument("--time-headroom", type=float, default=3.0, help="--write-budget 시간 여유 배수")
+    parser.add_argument("--memory-headroom", type=float, default=1.5, help="--write-budget 메모리 여유 배수")
+    parser.add_argument("--json", default=None, help="측정 결과를 저장할 경로")
+    sys.exit(asyncio.run(main(parser.parse_args())))
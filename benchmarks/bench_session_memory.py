@@ -0,0 +1,58 @@
+"""세션 레코드당 메모리 사용량 측정
+
+기존 dict(+datetime 3개) 형태와 SessionRecord(__slots__ + monotonic float)를
+tracemalloc으로 비교합니다. session_id 문자열은 두 방식에 공통이므로 제외합니다.
+
+    python -m benchmarks.bench_session_memory          # 100k
+    python -m benchmarks.bench_session_memory 1000000
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from app.session_record import SessionRecord
+
+
+def legacy_record(username: str) -> dict:
+    # 기존 create_session과 동일하게 datetime.now()를 필드마다 호출
+    return {
+        "user_id": 1,
+        "username": username,
+        "message_counter": 0,
+        "connected_at": datetime.now(),
+        "last_activity": datetime.now(),
+        "last_ping": datetime.now(),
+        "ping_pending": False,
+        "ping_miss_count": 0
+    }
+
+
+def slotted_record(username: str) -> SessionRecord:
+    return SessionRecord(1, username, time.monotonic())
+
+
+def measure(factory, count: int) -> float:
+    username = "john_doe"
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [factory(username) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # 리스트 자체의 포인터 배열(8바이트/항목)은 dict 저장소와 비슷하므로 제외
+    per_record = (after - before - sys.getsizeof(records)) / count
+    del records
+    return per_record
+
+
+def main(count: int):
+    legacy = measure(legacy_record, count)
+    slotted = measure(slotted_record, count)
+    print(f"sessions: {count:,}")
+    print(f"{'dict + datetime':<24} {legacy:>8.1f} bytes/session")
+    print(f"{'SessionRecord (slots)':<24} {slotted:>8.1f} bytes/session")
+    print(f"{'saved':<24} {legacy - slotted:>8.1f} bytes/session ({(1 - slotted / legacy) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,183 @@
+"""세션 샤딩(consistent hash) 벤치마크
+
+1) 링 재배치: 노드를 하나씩 추가할 때 주인이 바뀌는 키 비율을 이상값 1/(N+1)과 비교하고
+   노드별 부하 편차를 확인합니다 (프로세스 없이 계산만).
+2) 샤드 프로세스 N개 + 앞단 프록시를 띄워
+   - 모든 세션이 프록시를 통해 보이는지(404 없음)
+   - 세션 API 처리량이 샤드 수에 따라 늘어나는지
+   - 샤드를 하나 추가했을 때 옮겨진 세션 수와 이후에도 모든 세션이 보이는지 확인합니다.
+   - 관리 API가 토큰 없이 거부되고 프록시가 샤드 관리 경로를 전달하지 않는지 확인합니다.
+
+    python -m benchmarks.bench_sharding --shards 1 2 4 8 --duration 10
+    python -m benchmarks.bench_sharding --ring-only
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import uuid
+
+from app.sharding import HashRing, SHARD_ADMIN_HEADER
+from benchmarks._http import HttpClient
+from benchmarks._server import make_workdir, base_env, start_process, stop_process, wait_for_port, run_app
+from benchmarks.bench_workers import create_sessions, check_visibility, load_process
+
+
+def ring_movement(max_nodes: int, keys: int = 100_000):
+    session_ids = [str(uuid.uuid4()) for _ in range(keys)]
+    ring = HashRing(["shard-0"])
+    owners = [ring.owner(key) for key in session_ids]
+    print("nodes  moved    ideal    load max/mean")
+    for n in range(2, max_nodes + 1):
+        ring.add_node(f"shard-{n - 1}")
+        new_owners = [ring.owner(key) for key in session_ids]
+        moved = sum(1 for a, b in zip(owners, new_owners) if a != b) / keys
+        # 새 노드로 옮겨진 키만 있어야 한다 (기존 노드끼리 이동 없음)
+        assert all(a == b or b == f"shard-{n - 1}" for a, b in zip(owners, new_owners))
+        loads = [new_owners.count(node) for node in ring.nodes]
+        print(f"{n:<6} {moved:>6.1%}   {1 / n:>6.1%}   {max(loads) / statistics.mean(loads):.2f}")
+        owners = new_owners
+
+
+ADMIN_TOKEN = "bench-shard-admin"
+
+
+def shard_nodes(count: int, base_port: int) -> dict:
+    return {f"shard-{i}": f"127.0.0.1:{base_port + i}" for i in range(count)}
+
+
+@contextlib.asynccontextmanager
+async def run_cluster(shards: int, port: int, workdir: str):
+    """샤드 프로세스(각 워커 1개)와 프록시를 띄웁니다."""
+    nodes = shard_nodes(shards, port + 1)
+    spec = ",".join(f"{name}={address}" for name, address in nodes.items())
+    async with contextlib.AsyncExitStack() as stack:
+        for index, name in enumerate(nodes):
+            await stack.enter_async_context(run_app(
+                port + 1 + index, 1, workdir,
+                SHARD_ID=name, SHARD_NODES=spec, MESSAGE_WRITE_BEHIND="true", SHARD_ADMIN_TOKEN=ADMIN_TOKEN,
+            ))
+        proxy = start_process([sys.executable, "-m", "app.shard_proxy", "--host", "127.0.0.1",
+                               "--port", str(port), "--nodes", spec],
+                              base_env(workdir, SHARD_ADMIN_TOKEN=ADMIN_TOKEN), workdir, f"proxy-{port}.log")
+        try:
+            await wait_for_port(port)
+            yield nodes
+        finally:
+            stop_process(proxy)
+
+
+async def rebalance_check(port: int, workdir: str, shards: int, session_ids: list) -> dict:
+    """샤드 하나를 추가하고 세션 이동량과 가시성을 확인합니다."""
+    nodes = shard_nodes(shards + 1, port + 1)
+    new_name = f"shard-{shards}"
+    spec = ",".join(f"{name}={address}" for name, address in nodes.items())
+    async with run_app(port + 1 + shards, 1, workdir, SHARD_ID=new_name, SHARD_NODES=spec,
+                       MESSAGE_WRITE_BEHIND="true", SHARD_ADMIN_TOKEN=ADMIN_TOKEN):
+        client = HttpClient(port=port)
+        body = json.dumps({"nodes": nodes}).encode()
+        status, _, response = await client.request("POST", "/_shards", body, {"Content-Type": "application/json",
+                                                                              SHARD_ADMIN_HEADER: ADMIN_TOKEN})
+        await client.close()
+        assert status == 200, status
+        missing = await check_visibility(port, session_ids)
+    return {"moved": json.loads(response)["moved_count"], "missing": missing}
+
+
+async def admin_checks(port: int) -> dict:
+    """토큰 없는 관리 요청은 거부되고, 프록시는 샤드 관리 경로를 전달하지 않는다."""
+    client = HttpClient(port=port)
+    shard = HttpClient(port=port + 1)
+    checks = {
+        "proxy /_shards without token": (await client.post_json("/_shards", {"nodes": {}}))[0] == 403,
+        "proxy /_shards with wrong token": (await client.request(
+            "GET", "/_shards", headers={SHARD_ADMIN_HEADER: "wrong"}))[0] == 403,
+        "handover not proxied": (await client.post_json("/api/system/shard/handover", {"nodes": {}}))[0] == 404,
+        "encoded handover not proxied": (await client.post_json(
+            "/api/system/shard%2Fhandover", {"nodes": {}}))[0] == 404,
+        "shard handover without token": (await shard.post_json(
+            "/api/system/shard/handover", {"nodes": {}}))[0] == 403,
+        "shard adopt without token": (await shard.post_json("/api/system/shard/adopt", {"sessions": []}))[0] == 403,
+    }
+    await client.close()
+    await shard.close()
+    return checks
+
+
+async def run_for_shards(shards: int, port: int, options) -> dict:
+    workdir = make_workdir()
+    async with run_cluster(shards, port, workdir):
+        session_ids = await create_sessions(port, options.sessions)
+        missing = await check_visibility(port, session_ids)
+        admin = await admin_checks(port)
+
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=load_process,
+                args=(port, session_ids, options.connections, options.duration, queue),
+            )
+            for _ in range(options.client_processes)
+        ]
+        for process in processes:
+            process.start()
+        total = sum(queue.get() for _ in processes)
+        for process in processes:
+            process.join()
+
+        rebalance = await rebalance_check(port, workdir, shards, session_ids)
+
+    return {"shards": shards, "missing": missing, "rps": total / options.duration,
+            "moved": rebalance["moved"], "missing_after_rebalance": rebalance["missing"], "admin": admin}
+
+
+async def main(options) -> int:
+    ring_movement(max(max(options.shards), 8))
+    if options.ring_only:
+        return 0
+
+    results = []
+    for index, shards in enumerate(options.shards):
+        result = await run_for_shards(shards, options.port + index * 20, options)
+        results.append(result)
+        print(f"shards={shards:<3} rps={result['rps']:>9.0f}  404s={result['missing']}  "
+              f"add shard: moved {result['moved']}/{options.sessions} "
+              f"(ideal {options.sessions / (shards + 1):.0f}), 404s after={result['missing_after_rebalance']}")
+        for name, ok in result["admin"].items():
+            print(f"  {name:<32} {'ok' if ok else 'FAILED'}")
+
+    failed = any(result["missing"] or result["missing_after_rebalance"] or not all(result["admin"].values())
+                 for result in results)
+    base = results[0]
+    cpus = os.cpu_count() or 1
+    for result in results[1:]:
+        scaling = result["rps"] / base["rps"]
+        ideal = result["shards"] / base["shards"]
+        efficiency = scaling / ideal
+        print(f"{base['shards']} -> {result['shards']} shards: {scaling:.2f}x (efficiency {efficiency:.0%})")
+        # 샤드, 프록시, 부하 생성 프로세스가 코어를 나눠 쓸 수 있을 때만 판정
+        if cpus >= result["shards"] + 1 + options.client_processes:
+            if efficiency < options.min_efficiency:
+                print(f"  FAIL: efficiency below {options.min_efficiency:.0%}")
+                failed = True
+        else:
+            print(f"  scaling check skipped: {cpus} CPU(s) available")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--sessions", type=int, default=400)
+    parser.add_argument("--connections", type=int, default=32, help="부하 프로세스당 keep-alive 연결 수")
+    parser.add_argument("--client-processes", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8201)
+    parser.add_argument("--min-efficiency", type=float, default=0.7)
+    parser.add_argument("--ring-only", action="store_true", help="링 재배치 계산만 실행")
+    sys.exit(asyncio.run(main(parser.parse_args())))
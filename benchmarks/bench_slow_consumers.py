@@ -0,0 +1,119 @@
+"""느린 SSE 구독자의 버퍼 메모리 벤치마크
+
+구독자 중 일부가 대역폭이 낮은 클라이언트(보낸 바이트에 비례해 send가 오래 걸림)일 때,
+기존처럼 제너레이터에서 바로 send하는 방식(구독 큐가 무한히 쌓임)과
+SSEResponse의 제한된 전송 큐 + overflow 정책별로 최대 대기 바이트와
+정상 클라이언트가 받은 프레임 수를 비교합니다. 가짜 ASGI send/receive로 실행합니다.
+
+    python -m benchmarks.bench_slow_consumers
+    python -m benchmarks.bench_slow_consumers --clients 5000 --slow 0.5 --frames 1000
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from app.broadcast import BroadcastHub
+from app.outbound import BufferBudget, COALESCE, DISCONNECT, DROP_OLDEST
+from app.sse import SSEResponse, encode_event
+import app.outbound as outbound
+from app.stream_registry import stream_registry
+
+
+class FakeClient:
+    def __init__(self, bandwidth: float):
+        self.bandwidth = bandwidth  # 초당 바이트, 0이면 제한 없음
+        self.received = 0
+        self.never = asyncio.Event()
+
+    async def receive(self):
+        await self.never.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.body" and message["body"]:
+            if self.bandwidth:
+                await asyncio.sleep(len(message["body"]) / self.bandwidth)
+            self.received += message["body"].count(b"\n\n")
+
+
+def frames(hub: BroadcastHub):
+    async def generator():
+        subscription = hub.subscribe()
+        try:
+            while True:
+                items = await subscription.get_many()
+                if items is None:
+                    break
+                yield b"".join(items)
+        finally:
+            hub.unsubscribe(subscription)
+    return generator
+
+
+async def run(name: str, policy, options) -> None:
+    hub = BroadcastHub()
+    hub._task = asyncio.get_running_loop().create_future()  # 내장 producer 대신 직접 publish
+    clients = [FakeClient(options.bandwidth if i < options.clients * options.slow else 0.0)
+               for i in range(options.clients)]
+    budget = outbound.buffer_budget = BufferBudget(options.budget)
+    peak_legacy = 0
+
+    async def legacy(client: FakeClient):
+        async for chunk in frames(hub)():
+            await client.send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def bounded(client: FakeClient):
+        response = SSEResponse(frames(hub)(), kind="bench", heartbeat=0, overflow=policy)
+        await response({"type": "http", "client": None}, client.receive, client.send)
+
+    tasks = [asyncio.create_task(legacy(c) if policy is None else bounded(c)) for c in clients]
+    payload = {"message": "x" * options.frame_bytes}
+    started = time.perf_counter()
+    for counter in range(options.frames):
+        hub.publish(encode_event({"counter": counter, **payload}))
+        await asyncio.sleep(options.interval)
+        if policy is None:
+            queued = sum(len(frame) for sub in hub._subscribers for frame in sub._items)
+            peak_legacy = max(peak_legacy, queued)
+
+    await asyncio.sleep(options.interval * 10)  # 정상 클라이언트가 마지막 프레임을 받도록
+    elapsed = time.perf_counter() - started
+    status = stream_registry.get_status(0)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    fast = [c.received for c in clients if not c.bandwidth]
+    peak = peak_legacy if policy is None else budget.peak
+    extra = "" if policy is None else (
+        f"  dropped={status['dropped']} coalesced={status['coalesced']} "
+        f"slow_consumer_disconnects={stream_registry.closed.get('slow_consumer', 0)}"
+    )
+    print(f"{name:<22} peak buffered {peak / 1024 / 1024:7.1f}MB  "
+          f"fast clients got {min(fast)}/{options.frames} frames in {elapsed:4.1f}s{extra}")
+    stream_registry.closed.clear()
+    stream_registry.dropped = stream_registry.coalesced = 0
+
+
+async def main(options) -> int:
+    print(f"{options.clients} clients ({options.slow:.0%} at {options.bandwidth / 1024:.0f}KB/s), "
+          f"{options.frames} x {options.frame_bytes}B frames every {options.interval * 1000:.0f}ms, "
+          f"buffer cap {options.budget / 1024 / 1024:.0f}MB")
+    await run("inline send (legacy)", None, options)
+    await run("drop_oldest", DROP_OLDEST, options)
+    await run("coalesce", COALESCE, options)
+    await run("disconnect", DISCONNECT, options)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--slow", type=float, default=0.25, help="느린 클라이언트 비율")
+    parser.add_argument("--bandwidth", type=float, default=20 * 1024, help="느린 클라이언트의 대역폭 (바이트/초)")
+    parser.add_argument("--frame-bytes", type=int, default=1024)
+    parser.add_argument("--interval", type=float, default=0.01, help="프레임 발행 간격 (초)")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--budget", type=int, default=64 * 1024 * 1024, help="SSE_BUFFER_MAX_BYTES")
+    sys.exit(asyncio.run(main(parser.parse_args())))
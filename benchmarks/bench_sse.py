@@ -0,0 +1,87 @@
+"""SSE 프레임 인코딩 마이크로벤치마크 (단일 코어 frames/s)
+
+기존 json.dumps + f-string + str 인코딩 경로와 app.sse 인코더를 비교합니다.
+
+    python -m benchmarks.bench_sse
+"""
+import json
+import time
+import timeit
+
+from app import sse
+
+FRAMES = 200_000
+SESSION_ID = "550e8400-e29b-41d4-a716-446655440000"
+
+
+def stream_data(counter: int) -> dict:
+    return {
+        "type": "message",
+        "timestamp": time.time(),
+        "session_id": SESSION_ID,
+        "username": "john_doe",
+        "counter": counter,
+        "message": f"Stream message #{counter} for john_doe",
+        "ping_status": "ok",
+        "ping_miss_count": 0
+    }
+
+
+def legacy_message():
+    # Starlette가 str 청크를 다시 utf-8로 인코딩하던 비용까지 포함
+    return f"data: {json.dumps(stream_data(1))}\n\n".encode("utf-8")
+
+
+def encoder_message():
+    return sse.encode_event(stream_data(1))
+
+
+def stdlib_encoder_message():
+    return sse._DATA + sse._stdlib_dumps(stream_data(1)) + sse._FRAME_END
+
+
+def encoder_message_with_id():
+    return sse.encode_event(stream_data(1), id=1, retry=3000)
+
+
+def legacy_ping():
+    ping_data = {
+        "type": "ping_required",
+        "timestamp": time.time(),
+        "session_id": SESSION_ID,
+        "message": "Server is requesting pong response"
+    }
+    return f"data: {json.dumps(ping_data)}\n\n".encode("utf-8")
+
+
+_ping_template = sse.FrameTemplate({
+    "type": "ping_required",
+    "session_id": SESSION_ID,
+    "message": "Server is requesting pong response"
+})
+
+
+def template_ping():
+    return _ping_template.render()
+
+
+CASES = [
+    ("message: json.dumps + f-string (legacy)", legacy_message),
+    ("message: encode_event (stdlib json)", stdlib_encoder_message),
+    ("message: encode_event", encoder_message),
+    ("message: encode_event + id/retry", encoder_message_with_id),
+    ("ping: json.dumps + f-string (legacy)", legacy_ping),
+    ("ping: FrameTemplate.render", template_ping),
+]
+
+
+def main():
+    print(f"json backend: {'orjson' if sse.orjson is not None else 'stdlib'}")
+    print(f"{'case':<42} {'frames/s':>12}")
+    for name, func in CASES:
+        elapsed = min(timeit.repeat(func, number=FRAMES, repeat=3))
+        print(f"{name:<42} {FRAMES / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""세션 스트림 Last-Event-ID 재전송 벤치마크
+
+1. 앱을 띄워 세션 스트림에서 메시지 몇 개를 받은 뒤, 앞쪽 id로 재연결해
+   놓친 메시지가 빠짐없이 순서대로 다시 오는지 확인합니다. MESSAGE_LOG_SIZE=2로
+   링 버퍼를 작게 잡아 오래된 구간은 DB에서 읽히게 합니다.
+2. user_messages에 행을 채우고 재전송 범위 조회를 (session_id, message_counter)
+   인덱스 유무로 비교합니다. 인덱스가 있으면 테이블 크기와 무관해야 합니다.
+
+    python -m benchmarks.bench_stream_resume
+    python -m benchmarks.bench_stream_resume --rows 2000000 --frames 6
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+
+from benchmarks._http import HttpClient
+from benchmarks._server import make_workdir, run_app
+from app.models import UserMessage
+
+INDEX_NAME = "ix_user_messages_session_counter"
+
+
+async def read_messages(client: HttpClient, count: int) -> list:
+    """message 프레임만 골라 (id, counter)를 count개 모읍니다."""
+    messages = []
+    buffer = b""
+    while len(messages) < count:
+        buffer += await client.read_chunk()
+        *frames, buffer = buffer.split(b"\n\n")
+        for frame in frames:
+            fields = dict(line.split(b": ", 1) for line in frame.split(b"\n") if b": " in line)
+            data = json.loads(fields.get(b"data", b"{}"))
+            if data.get("type") == "message":
+                messages.append((int(fields[b"id"]), data["counter"]))
+    return messages[:count]
+
+
+async def check_resume(port: int, frames: int) -> bool:
+    client = HttpClient(port=port)
+    _, created = await client.post_form("/api/session/create", {"username": "resume_bench"})
+    session_id = created["session_id"]
+    await client.close()
+
+    stream = HttpClient(port=port)
+    assert await stream.open_stream(f"/stream/{session_id}") == 200
+    received = await read_messages(stream, frames)
+    await stream.close()
+    assert all(frame_id == counter for frame_id, counter in received), received
+
+    # 첫 메시지만 받았다고 가정하고 재연결
+    resumed = HttpClient(port=port)
+    started = time.perf_counter()
+    assert await resumed.open_stream(f"/stream/{session_id}", {"Last-Event-ID": "1"}) == 200
+    replayed = await read_messages(resumed, frames - 1)
+    elapsed = time.perf_counter() - started
+    await resumed.close()
+
+    _, status = await client.get_json("/api/system/message-log")
+    await client.close()
+    ok = [counter for _, counter in replayed] == list(range(2, frames + 1))
+    print(f"resume after id=1: replayed {[c for _, c in replayed]} in {elapsed * 1000:.1f}ms  "
+          f"(memory={status['replayed_from_memory']} db={status['replayed_from_db']})  "
+          f"{'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def range_query_sql() -> str:
+    stmt = (
+        select(UserMessage.message_counter, UserMessage.message_content, UserMessage.created_at)
+        .where(UserMessage.session_id == "target", UserMessage.message_counter > 100,
+               UserMessage.message_counter < 200)
+        .order_by(UserMessage.message_counter)
+        .limit(1000)
+    )
+    return str(stmt.compile(dialect=sqlite_dialect.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def check_index(rows: int, sessions: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="subtree-resume-"), "messages.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE user_messages (id INTEGER PRIMARY KEY, session_id VARCHAR(255) NOT NULL, "
+        "message_counter INTEGER NOT NULL, message_content TEXT NOT NULL, created_at DATETIME)"
+    )
+    per_session = rows // sessions
+    conn.executemany(
+        "INSERT INTO user_messages (session_id, message_counter, message_content) VALUES (?, ?, 'x')",
+        ((f"s{i % sessions}" if i % sessions else "target", i // sessions + 1) for i in range(rows)),
+    )
+    conn.commit()
+    sql = range_query_sql()
+
+    def timed() -> float:
+        started = time.perf_counter()
+        for _ in range(20):
+            conn.execute(sql).fetchall()
+        return (time.perf_counter() - started) / 20
+
+    without = timed()
+    conn.execute(f"CREATE INDEX {INDEX_NAME} ON user_messages (session_id, message_counter)")
+    plan = " / ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+    with_index = timed()
+    conn.close()
+    print(f"range query over {rows} rows ({per_session} per session): "
+          f"no index {without * 1000:.2f}ms, index {with_index * 1000:.3f}ms")
+    print(f"plan: {plan}")
+
+
+async def main(options) -> int:
+    workdir = make_workdir()
+    async with run_app(options.port, 1, workdir, MESSAGE_LOG_SIZE=2):
+        ok = await check_resume(options.port, options.frames)
+    check_index(options.rows, options.sessions)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=5, help="재연결 전에 받을 메시지 수 (2초 간격)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8531)
+    sys.exit(asyncio.run(main(parser.parse_args())))
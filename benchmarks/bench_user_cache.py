@@ -0,0 +1,87 @@
+"""세션 생성 시 유저 조회 비용 벤치마크 (재접속 폭주 시나리오)
+
+적은 수의 유저가 세션을 반복해서 새로 만드는 상황에서, 기존 방식
+(SELECT -> 미스 시 INSERT + commit + refresh -> 세션 INSERT + commit)과
+캐시 + upsert 방식의 SQL 문 수, commit 수, 소요 시간을 비교합니다. SQLite 파일 DB 사용.
+
+    python -m benchmarks.bench_user_cache
+    python -m benchmarks.bench_user_cache --users 100 --sessions 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, UserSession
+from app.session_manager import SessionManager
+from app.user_cache import user_cache
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._statement)
+        event.listen(engine.sync_engine, "commit", self._commit)
+
+    def _statement(self, *args):
+        self.statements += 1
+
+    def _commit(self, *args):
+        self.commits += 1
+
+
+async def legacy_create_session(db: AsyncSession, username: str):
+    """변경 전 create_session의 DB 작업"""
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if not user:
+        user = User(username=username, email=f"{username}@example.com", is_active=True)
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+    db.add(UserSession(session_id=os.urandom(16).hex(), user_id=user.id, is_connected=True))
+    await db.commit()
+
+
+async def run(name: str, create, options) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="subtree-users-"), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    counter = StatementCounter(engine)
+    Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    started = time.perf_counter()
+    async with Session() as db:
+        for i in range(options.sessions):
+            await create(db, f"user_{i % options.users}")
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    print(f"{name:<16} {counter.statements / options.sessions:5.2f} statements/create  "
+          f"{counter.commits / options.sessions:4.2f} commits/create  "
+          f"{elapsed / options.sessions * 1e6:7.0f} us/create")
+
+
+async def main(options):
+    manager = SessionManager()
+    user_cache.clear()
+    await run("legacy", legacy_create_session, options)
+    await run("cache + upsert", manager.create_session, options)
+    status = user_cache.get_status()
+    print(f"user cache: hit ratio {status['hit_ratio']:.1%} ({status['hits']} hits, {status['misses']} misses)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=2000)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,101 @@
+"""/api/users NDJSON 스트리밍 메모리/TTFB 벤치마크
+
+users 테이블에 행을 채우고 format=ndjson으로 전체를 받으면서 첫 바이트까지의 시간과
+서버 프로세스의 최대 RSS 증가량을 잽니다. 테이블이 커져도 RSS 증가량이 거의 같아야 합니다.
+keyset 페이지를 끝까지 넘기며 모든 행을 정확히 한 번씩 받는지도 확인합니다.
+
+    python -m benchmarks.bench_users_stream
+    python -m benchmarks.bench_users_stream --rows 1000 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from benchmarks._http import HttpClient
+from benchmarks._server import make_workdir, run_app
+
+
+def seed_users(db_path: str, rows: int):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM users")
+    conn.executemany(
+        "INSERT INTO users (id, username, email, is_active) VALUES (?, ?, ?, 1)",
+        ((i, f"user_{i:08d}", f"user_{i:08d}@example.com") for i in range(1, rows + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def peak_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def stream_all(port: int) -> tuple:
+    client = HttpClient(port=port)
+    started = time.perf_counter()
+    status = await client.open_stream("/api/users?format=ndjson")
+    assert status == 200, status
+    first_byte = None
+    lines = 0
+    while True:
+        chunk = await client.read_chunk()
+        if not chunk:
+            break
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        lines += chunk.count(b"\n")
+    await client.close()
+    return lines, first_byte or 0.0, time.perf_counter() - started
+
+
+async def walk_pages(port: int, limit: int) -> int:
+    client = HttpClient(port=port)
+    seen = 0
+    last_id = 0
+    path = f"/api/users?limit={limit}"
+    while path:
+        status, headers, body = await client.request("GET", path)
+        assert status == 200, status
+        for user in json.loads(body):
+            assert user["id"] > last_id
+            last_id = user["id"]
+            seen += 1
+        cursor = headers.get("x-next-cursor")
+        path = f"/api/users?limit={limit}&after={cursor}" if cursor else None
+    await client.close()
+    return seen
+
+
+async def main(options) -> int:
+    failed = False
+    for index, rows in enumerate(options.rows):
+        workdir = make_workdir()
+        port = options.port + index
+        async with run_app(port, 1, workdir) as (_, env, process):
+            seed_users(os.path.join(workdir, "bench.db"), rows)
+            baseline = peak_rss_kb(process.pid)
+            lines, ttfb, total = await stream_all(port)
+            growth = peak_rss_kb(process.pid) - baseline
+            pages = await walk_pages(port, options.page_size) if rows <= options.max_walk_rows else rows
+        ok = lines == rows and pages == rows
+        failed |= not ok
+        print(f"rows={rows:>9}  ttfb={ttfb * 1000:6.1f}ms  total={total:6.2f}s  "
+              f"peak RSS growth={growth / 1024:6.1f}MB  {'ok' if ok else 'MISMATCH'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 200_000])
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--max-walk-rows", type=int, default=200_000, help="이보다 큰 테이블은 페이지 순회 생략")
+    parser.add_argument("--port", type=int, default=8501)
+    sys.exit(asyncio.run(main(parser.parse_args())))
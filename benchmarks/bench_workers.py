@@ -0,0 +1,144 @@
+"""멀티 워커 세션 공유 및 처리량 스케일링 테스트 하네스
+
+워커 수별로 세션 스토어 데몬 + uvicorn --workers N 을 띄우고,
+1) 어느 워커에서 만든 세션이든 모든 워커에서 보이는지(404 없음) 확인하고
+2) 세션 API(/info, /pong, /message) 처리량이 워커 수에 따라 늘어나는지 측정합니다.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --duration 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from benchmarks._http import HttpClient
+from benchmarks._server import make_workdir, base_env, start_process, stop_process, wait_for_socket, run_app
+
+
+async def create_sessions(port: int, count: int) -> list:
+    session_ids = []
+
+    async def creator(n):
+        client = HttpClient(port=port)
+        for i in range(n):
+            status, body = await client.post_form("/api/session/create", {"username": f"bench_{random.random():.8f}"})
+            assert status == 200, status
+            session_ids.append(body["session_id"])
+            # 연결을 새로 열어 여러 워커에 골고루 분산되도록 한다
+            await client.close()
+        await client.close()
+
+    await asyncio.gather(*(creator(count // 8) for _ in range(8)))
+    return session_ids
+
+
+async def check_visibility(port: int, session_ids: list) -> int:
+    """새 연결(=임의의 워커)로 각 세션을 조회해 404 수를 센다."""
+    missing = 0
+    for session_id in session_ids:
+        client = HttpClient(port=port)
+        status, _ = await client.get_json(f"/api/session/{session_id}/info")
+        await client.close()
+        if status != 200:
+            missing += 1
+    return missing
+
+
+async def load_client(port: int, session_ids: list, duration: float) -> int:
+    client = HttpClient(port=port)
+    deadline = time.monotonic() + duration
+    done = 0
+    while time.monotonic() < deadline:
+        session_id = random.choice(session_ids)
+        op = done % 3
+        if op == 0:
+            status, _, _ = await client.request("GET", f"/api/session/{session_id}/info")
+        elif op == 1:
+            status, _, _ = await client.request("POST", f"/api/session/{session_id}/pong")
+        else:
+            status, _, _ = await client.request("GET", f"/api/session/{session_id}/message")
+        if status != 200:
+            raise RuntimeError(f"unexpected status {status}")
+        done += 1
+    await client.close()
+    return done
+
+
+def load_process(port: int, session_ids: list, connections: int, duration: float, queue):
+    async def run():
+        results = await asyncio.gather(*(load_client(port, session_ids, duration) for _ in range(connections)))
+        return sum(results)
+    queue.put(asyncio.run(run()))
+
+
+async def run_for_workers(workers: int, port: int, options) -> dict:
+    workdir = make_workdir()
+    socket_path = os.path.join(workdir, "sessions.sock")
+    env = base_env(workdir, SESSION_STORE_SOCKET=socket_path, MESSAGE_WRITE_BEHIND="true")
+    store = start_process([sys.executable, "-m", "app.session_store", "--socket", socket_path],
+                          env, workdir, "session-store.log")
+    try:
+        await wait_for_socket(socket_path)
+        async with run_app(port, workers, workdir,
+                           SESSION_STORE_SOCKET=socket_path, MESSAGE_WRITE_BEHIND="true"):
+            session_ids = await create_sessions(port, options.sessions)
+            missing = await check_visibility(port, session_ids)
+
+            queue = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(
+                    target=load_process,
+                    args=(port, session_ids, options.connections, options.duration, queue),
+                )
+                for _ in range(options.client_processes)
+            ]
+            for process in processes:
+                process.start()
+            total = sum(queue.get() for _ in processes)
+            for process in processes:
+                process.join()
+    finally:
+        stop_process(store)
+
+    return {"workers": workers, "missing": missing, "rps": total / options.duration}
+
+
+async def main(options):
+    results = []
+    for index, workers in enumerate(options.workers):
+        result = await run_for_workers(workers, options.port + index, options)
+        results.append(result)
+        print(f"workers={workers:<3} rps={result['rps']:>9.0f}  cross-worker 404s={result['missing']}")
+
+    failed = any(result["missing"] for result in results)
+    base = results[0]
+    cpus = os.cpu_count() or 1
+    for result in results[1:]:
+        scaling = result["rps"] / base["rps"]
+        ideal = result["workers"] / base["workers"]
+        efficiency = scaling / ideal
+        print(f"{base['workers']} -> {result['workers']} workers: {scaling:.2f}x (efficiency {efficiency:.0%})")
+        # 워커와 부하 생성 프로세스가 코어를 나눠 쓸 수 있을 때만 스케일링을 판정한다
+        if cpus >= result["workers"] + options.client_processes:
+            if efficiency < options.min_efficiency:
+                print(f"  FAIL: efficiency below {options.min_efficiency:.0%}")
+                failed = True
+        else:
+            print(f"  scaling check skipped: {cpus} CPU(s) available")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=400)
+    parser.add_argument("--connections", type=int, default=32, help="부하 프로세스당 keep-alive 연결 수")
+    parser.add_argument("--client-processes", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--min-efficiency", type=float, default=0.6)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -3,15 +3,32 @@ from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from app.database import init_db
+from app.logging_config import logging_pipeline
 from app.background_tasks import background_task_manager
-from app.routers import session, sessions, system, users, pages, stream
+from app.write_behind import message_write_buffer, activity_flusher
+from app.session_manager import session_manager
+from app.session_events import session_event_hub
+from app.metrics import metrics, MetricsMiddleware
+from app.routers import session, sessions, system, users, pages, stream, ws
+from app.routers import metrics as metrics_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 로그 출력은 별도 스레드에서 (이벤트 루프에서는 큐에 넣기만 한다)
+    logging_pipeline.start()
     await init_db()
+    await session_event_hub.start()
+    await message_write_buffer.start()
+    await activity_flusher.start()
     await background_task_manager.start_ping_checker()
     yield
     await background_task_manager.stop_ping_checker()
+    # 버퍼에 남은 메시지와 활동 시간을 저장한 뒤 종료
+    await message_write_buffer.stop()
+    await activity_flusher.stop()
+    await session_manager.store.close()
+    await session_event_hub.stop()
+    logging_pipeline.stop()
 
 app = FastAPI(
     title="SSE Server with Session Management",
@@ -35,11 +52,13 @@ app = FastAPI(
     * Server-Sent Events 스트림
     * 실시간 메시지 전송
     * 세션별 개별 메시지
+    * WebSocket 전송 (/ws/{session_id}): 메시지와 ping/pong을 소켓 하나로
 
     ### 🔧 시스템 모니터링
     * 헬스 체크
     * 활성 세션 현황
     * 시스템 상태 조회
+    * Prometheus 지표 (/metrics)
     """,
     lifespan=lifespan,
     contact={
@@ -84,10 +103,16 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Include routers
 app.include_router(pages.router)
 app.include_router(stream.router)
+app.include_router(ws.router)
 app.include_router(session.router)
 app.include_router(sessions.router)
 app.include_router(system.router)
 app.include_router(users.router)
+app.include_router(metrics_router.router)
+
+# 라우트별 요청 지연/요청 수 (/metrics)
+if metrics.enabled:
+    app.add_middleware(MetricsMiddleware)
 
 if __name__ == "__main__":
     import uvicorn
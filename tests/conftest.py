@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# app.database는 import 시점에 엔진을 만든다. 테스트는 임시 SQLite 파일을 쓴다
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="app-tests-"), "test.db")
+)
@@ -0,0 +1,39 @@
+import asyncio
+
+from app.broadcast import BroadcastHub, Subscription
+
+
+def test_subscription_get_many_and_close():
+    async def scenario():
+        subscription = Subscription()
+        subscription.push(1)
+        subscription.push(2)
+        assert await subscription.get_many() == [1, 2]
+        assert subscription.get_nowait() == []
+        waiter = asyncio.ensure_future(subscription.get_many())
+        await asyncio.sleep(0)
+        subscription.close()
+        assert await waiter is None
+        subscription.push(3)  # 닫힌 구독에는 넣지 않는다
+        assert subscription.get_nowait() == []
+
+    asyncio.run(scenario())
+
+
+def test_hub_shares_one_frame_between_subscribers():
+    async def scenario():
+        hub = BroadcastHub(interval=3600)
+        first = hub.subscribe()
+        await asyncio.sleep(0)  # producer가 첫 tick을 발행한다
+        second = hub.subscribe()  # 늦게 온 구독자는 최신 프레임부터 받는다
+        (frame_a,), (frame_b,) = await first.get_many(), await second.get_many()
+        assert frame_a is frame_b and frame_a.startswith(b"data: ")
+        assert hub.frames_published == 1 and hub.get_subscriber_count() == 2
+
+        hub.unsubscribe(first)
+        hub.unsubscribe(second)
+        assert await first.get_many() is None
+        assert hub.get_subscriber_count() == 0
+        hub._task.cancel()
+
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+import asyncio
+
+from app.deadline_scheduler import DeadlineScheduler
+from app.session_store import InMemorySessionStore
+
+
+def test_pop_due_in_deadline_order():
+    scheduler = DeadlineScheduler()
+    scheduler.schedule("b", 2.0)
+    scheduler.schedule("a", 1.0)
+    scheduler.schedule("c", 5.0)
+    assert scheduler.pop_due(3.0) == [("a", 1.0), ("b", 2.0)]
+    assert "a" not in scheduler and "c" in scheduler
+    assert scheduler.next_deadline() == 5.0
+
+
+def test_reschedule_and_cancel_are_lazy_deleted():
+    scheduler = DeadlineScheduler()
+    scheduler.schedule("a", 1.0)
+    scheduler.schedule("a", 10.0)  # 재예약: 이전 항목은 heap에 남지만 무효
+    scheduler.schedule("b", 2.0)
+    scheduler.cancel("b")
+    assert len(scheduler) == 1
+    assert scheduler.peek_due(5.0) == []
+    assert scheduler.pop_due(5.0) == []
+    assert scheduler.next_deadline() == 10.0
+    assert scheduler.pop_due(10.0) == [("a", 10.0)]
+    assert scheduler.next_deadline() is None
+
+
+def test_pop_due_limit_leaves_the_rest():
+    scheduler = DeadlineScheduler()
+    for i in range(5):
+        scheduler.schedule(i, float(i))
+    assert [key for key, _ in scheduler.pop_due(10.0, limit=2)] == [0, 1]
+    assert sorted(scheduler.peek_due(10.0)) == [2, 3, 4]
+    assert len(scheduler) == 3
+
+
+def test_compaction_keeps_valid_entries():
+    scheduler = DeadlineScheduler()
+    for i in range(5000):
+        scheduler.schedule("hot", float(i))
+    scheduler.schedule("cold", 1.0)
+    assert len(scheduler._heap) < 5000
+    assert scheduler.pop_due(1.0) == [("cold", 1.0)]
+    assert scheduler.next_deadline() == 4999.0
+
+
+def test_due_pings_are_claimed_once():
+    async def scenario():
+        store = InMemorySessionStore(ping_interval=20, ping_timeout=45)
+        for session_id in ("s1", "s2"):
+            await store.add(session_id, None, session_id)
+            store._ping_schedule.schedule(session_id, 0.0)  # 데드라인을 과거로
+        assert await store.due_ping_count() == 2
+        assert sorted(item["session_id"] for item in await store.due_pings()) == ["s1", "s2"]
+        # 꺼낸 세션은 interval 뒤로 재예약되므로 바로 다시 반환하지 않는다 (워커 간 중복 ping 방지)
+        assert await store.due_pings() == []
+        assert await store.due_ping_count() == 0
+
+        await store.mark_ping("s1")
+        assert await store.pending_pings() == 1
+        await store.pong("s1")
+        assert await store.pending_pings() == 0
+        await store.remove("s2")
+        assert "s2" not in store._ping_schedule
+
+    asyncio.run(scenario())
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from app.loop_monitor import LoopMonitor, task_snapshot
+
+
+def block_the_loop():
+    time.sleep(0.3)
+
+
+def test_stall_is_recorded_with_the_blocking_stack():
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, threshold_ms=50, enabled=True)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+
+            async def blocking_handler():
+                block_the_loop()
+
+            await asyncio.create_task(blocking_handler(), name="blocking-handler")
+            await asyncio.sleep(0.1)  # 풀린 뒤 heartbeat가 기록을 마무리한다
+        finally:
+            monitor.stop()
+
+        status = monitor.get_status()
+        assert status["samples"] > 0 and not status["running"]
+        assert status["slow_callbacks"] >= 1
+        stall = status["recent_slow"][-1]
+        assert stall["task"] == "blocking-handler"
+        assert stall["duration_ms"] >= 50
+        assert any("block_the_loop" in entry for entry in stall["stack"])
+
+    asyncio.run(scenario())
+
+
+def test_disabled_monitor_does_not_start():
+    async def scenario():
+        monitor = LoopMonitor(enabled=False)
+        monitor.start()
+        assert not monitor.running
+
+    asyncio.run(scenario())
+
+
+def test_task_snapshot_groups_by_coroutine():
+    async def scenario():
+        async def idle():
+            await asyncio.sleep(3600)
+
+        tasks = [asyncio.create_task(idle()) for _ in range(3)]
+        await asyncio.sleep(0)
+        snapshot = task_snapshot(detail=True)
+        group = next(group for group in snapshot["by_coroutine"] if group["coroutine"].endswith("idle"))
+        assert group["count"] == 3 and snapshot["total"] >= 3
+        for task in tasks:
+            task.cancel()
+
+    asyncio.run(scenario())
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+from app.database import AsyncSessionLocal, init_db
+from app.message_log import MessageLog, message_log
+from app.routers.stream import stream_session_events
+from app.session_frames import create_message
+from app.session_manager import session_manager
+
+
+def counters(chunk: bytes) -> list:
+    """SSE 청크에서 message 이벤트의 (id, counter, replayed) 목록을 꺼냅니다."""
+    found = []
+    for frame in chunk.split(b"\n\n"):
+        lines = dict(line.split(b": ", 1) for line in frame.split(b"\n") if b": " in line)
+        if b"data" not in lines:
+            continue
+        data = json.loads(lines[b"data"])
+        if data["type"] == "message":
+            found.append((int(lines[b"id"]), data["counter"], data.get("replayed", False)))
+    return found
+
+
+async def new_session(username: str, messages: int) -> str:
+    async with AsyncSessionLocal() as db:
+        [session_id] = await session_manager.create_sessions(db, [username])
+        session = await session_manager.get_session(session_id)
+        for _ in range(messages):
+            await create_message(db, session_id, session)
+    return session_id
+
+
+async def resume(session_id: str, last_event_id: str, count: int) -> list:
+    """Last-Event-ID로 세션 스트림에 재연결해 message 이벤트 count개를 받습니다."""
+    response = await stream_session_events(session_id, last_event_id=last_event_id)
+    frames = response.body_iterator
+    received = []
+    try:
+        while len(received) < count:
+            received.extend(counters(await asyncio.wait_for(frames.__anext__(), 5)))
+    finally:
+        await frames.aclose()
+    return received
+
+
+def test_resume_replays_from_ring_then_continues_live():
+    async def scenario():
+        await init_db()
+        session_id = await new_session("replay_ring", 5)
+        queries = message_log.db_queries
+
+        received = await resume(session_id, "2", 4)
+        # 3~5는 링 버퍼에서 그대로, 6은 재연결 뒤 새로 만든 메시지
+        assert [counter for _, counter, _ in received] == [3, 4, 5, 6]
+        assert all(event_id == counter for event_id, counter, _ in received)
+        assert not any(replayed for _, _, replayed in received)
+        assert message_log.db_queries == queries
+
+    asyncio.run(scenario())
+
+
+def test_resume_falls_back_to_db_after_eviction(monkeypatch):
+    small = MessageLog(size=2)
+    monkeypatch.setattr("app.session_frames.message_log", small)
+    monkeypatch.setattr("app.routers.stream.message_log", small)
+
+    async def scenario():
+        await init_db()
+        session_id = await new_session("replay_db", 6)
+
+        received = await resume(session_id, "1", 6)
+        # 2~4는 링에서 밀려나 DB에서, 5~6은 링에서, 7은 라이브: 중복도 빠짐도 없다
+        assert [counter for _, counter, _ in received] == [2, 3, 4, 5, 6, 7]
+        assert [replayed for _, _, replayed in received] == [True] * 3 + [False] * 3
+        assert small.db_queries == 1
+        assert small.replayed_from_db == 3 and small.replayed_from_memory == 2
+
+    asyncio.run(scenario())
+
+
+def test_resume_with_latest_id_sends_only_live_messages():
+    async def scenario():
+        await init_db()
+        session_id = await new_session("replay_none", 3)
+
+        received = await resume(session_id, "3", 1)
+        assert [counter for _, counter, _ in received] == [4]
+
+    asyncio.run(scenario())
+
+
+def test_replay_truncated_to_replay_max():
+    async def scenario():
+        log = MessageLog(size=10, replay_max=3)
+        for counter in range(1, 11):
+            log.append("s", counter, b"%d" % counter)
+        # 메모리에 있는 구간만이라 DB는 조회하지 않는다
+        assert await log.replay(None, "s", 0, 10, None) == [b"8", b"9", b"10"]
+        assert log.truncated == 1 and log.db_queries == 0
+        assert await log.replay(None, "s", 10, 10, None) == []
+
+    asyncio.run(scenario())
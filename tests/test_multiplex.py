@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, init_db
+from app.models import UserMessage
+from app.multiplex import MultiplexStream, multiplex_registry, request_update
+from app.session_manager import session_manager
+
+
+def events(chunk: bytes) -> list:
+    return [json.loads(line[6:]) for line in chunk.split(b"\n") if line.startswith(b"data: ")]
+
+
+async def next_events(frames, count: int) -> list:
+    """count개 이상의 이벤트가 모일 때까지 청크를 읽습니다."""
+    received = []
+    while len(received) < count:
+        received.extend(events(await asyncio.wait_for(frames.__anext__(), 5)))
+    return received
+
+
+def test_subscribe_unsubscribe_and_disconnect():
+    async def scenario():
+        await init_db()
+        async with AsyncSessionLocal() as db:
+            first, second = await session_manager.create_sessions(db, ["mux_a", "mux_b"])
+
+        # tick 간격을 길게 잡아 세션마다 구독 직후 메시지 하나만 만든다
+        stream = MultiplexStream([first, "missing"], interval=3600)
+        frames = stream.frames()
+        try:
+            opened = (await next_events(frames, 1))[0]
+            assert opened["type"] == "multiplex_open" and opened["session_id"] is None
+            assert opened["added"] == [first] and opened["rejected"] == ["missing"]
+            assert multiplex_registry.session_count() == 1
+
+            message = (await next_events(frames, 1))[0]
+            assert message["type"] == "message" and message["session_id"] == first
+
+            assert request_update(stream.id, add=[second], remove=[first]) == 1
+            updated, message = await next_events(frames, 2)
+            assert updated["type"] == "multiplex_updated"
+            assert updated["added"] == [second] and updated["removed"] == [first]
+            assert message["type"] == "message" and message["session_id"] == second
+            assert list(stream.sessions) == [second]
+
+            async with AsyncSessionLocal() as db:
+                await session_manager.disconnect_session(db, second)
+            disconnected = (await next_events(frames, 1))[0]
+            assert disconnected["type"] == "session_disconnected" and disconnected["session_id"] == second
+            assert not stream.sessions and stream.messages == 2
+
+            async with AsyncSessionLocal() as db:
+                saved = await db.scalar(select(func.count()).select_from(UserMessage)
+                                        .where(UserMessage.session_id.in_([first, second])))
+            assert saved == 2
+        finally:
+            await frames.aclose()
+        assert multiplex_registry.session_count() == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.outbound import BufferBudget, COALESCE, ControlFrame, DISCONNECT, DROP_OLDEST, OutboundQueue
+
+
+def make_queue(policy, max_frames=4, max_bytes=1024, budget=None):
+    return OutboundQueue(policy, max_frames=max_frames, max_bytes=max_bytes,
+                         budget=budget if budget is not None else BufferBudget(1 << 20))
+
+
+def drain(queue):
+    return asyncio.run(queue.get_many())
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        OutboundQueue("block", budget=BufferBudget())
+
+
+def test_drop_oldest_keeps_newest_frames():
+    queue = make_queue(DROP_OLDEST, max_frames=3)
+    for i in range(5):
+        assert queue.put(b"%d" % i)
+    assert drain(queue) == [b"2", b"3", b"4"]
+    assert queue.dropped == 2
+
+
+def test_coalesce_keeps_only_latest_frame():
+    queue = make_queue(COALESCE, max_frames=3)
+    for i in range(4):
+        queue.put(b"%d" % i)
+    assert drain(queue) == [b"3"]
+    assert queue.coalesced == 3
+
+
+def test_disconnect_reports_overflow_and_clears():
+    budget = BufferBudget(1 << 20)
+    queue = make_queue(DISCONNECT, max_frames=2, budget=budget)
+    assert queue.put(b"a") and queue.put(b"b")
+    assert not queue.put(b"c")
+    assert queue.overflowed and len(queue) == 0
+    assert budget.used == 0
+    assert not queue.put(b"d")
+
+
+@pytest.mark.parametrize("policy", [DROP_OLDEST, COALESCE])
+def test_control_frames_are_never_shed(policy):
+    queue = make_queue(policy, max_frames=3)
+    queue.put(ControlFrame(b"ping"))
+    for i in range(5):
+        queue.put(b"%d" % i)
+    queue.put(ControlFrame(b"bye"))
+    chunks = drain(queue)
+    assert chunks[0] == b"ping" and chunks[-1] == b"bye"
+
+
+def test_control_frame_admitted_past_limits():
+    budget = BufferBudget(1 << 20)
+    queue = make_queue(DROP_OLDEST, max_frames=2, budget=budget)
+    queue.put(ControlFrame(b"p1"))
+    queue.put(ControlFrame(b"p2"))
+    assert queue.put(b"data")  # 제어 프레임만 있으면 일반 청크는 버린다
+    assert queue.dropped == 1
+    queue.put(ControlFrame(b"p3"))
+    assert drain(queue) == [b"p1", b"p2", b"p3"]
+    assert budget.used == 0
+
+
+def test_budget_sheds_only_queues_over_fair_share():
+    budget = BufferBudget(100)
+    slow = make_queue(DROP_OLDEST, max_frames=100, budget=budget)
+    fast = make_queue(DROP_OLDEST, max_frames=100, budget=budget)
+    for _ in range(9):
+        slow.put(b"x" * 10)
+    fast.put(b"y" * 10)
+    assert budget.used == 100
+
+    # 한도가 찼을 때 공정 몫(50) 안의 큐가 넣으면 넘친 큐만 줄어든다
+    assert fast.put(b"y" * 10)
+    assert slow.queued_bytes <= 50 and slow.dropped > 0
+    assert fast.dropped == 0 and fast.queued_bytes == 20
+    assert budget.sheds == 1
+    assert budget.used == slow.queued_bytes + fast.queued_bytes
+
+
+def test_budget_shed_disconnects_disconnect_policy_queue():
+    budget = BufferBudget(100)
+    slow = make_queue(DISCONNECT, max_frames=100, budget=budget)
+    fast = make_queue(DISCONNECT, max_frames=100, budget=budget)
+    for _ in range(10):
+        slow.put(b"x" * 10)
+    assert fast.put(b"y" * 10)
+    assert slow.overflowed and not fast.overflowed
+
+
+def test_discard_releases_budget():
+    budget = BufferBudget(1 << 20)
+    queue = make_queue(DROP_OLDEST, budget=budget)
+    queue.put(b"abc")
+    queue.discard()
+    assert budget.used == 0 and budget.fair_share() == budget.max_bytes
+
+
+def test_closed_queue_drains_then_returns_none():
+    queue = make_queue(DROP_OLDEST)
+    queue.put(b"last")
+    queue.close()
+
+    async def read_all():
+        return await queue.get_many(), await queue.get_many()
+
+    assert asyncio.run(read_all()) == ([b"last"], None)
@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.response_cache import ResponseCache, make_etag
+
+
+def request(query: str = "", if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/api/users", "query_string": query.encode(),
+                    "headers": headers, "scheme": "http", "server": ("test", 80)})
+
+
+class Loader:
+    """호출 수를 세고, release가 set될 때까지 조회를 붙잡아 두는 로더"""
+
+    def __init__(self, body: bytes = b'{"users":[]}'):
+        self.body = body
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.body, {"X-Total": "0"}
+
+
+def test_miss_then_hit_and_etag_not_modified():
+    async def scenario():
+        cache = ResponseCache(ttl=60)
+        loader = Loader()
+        loader.release.set()
+        first = await cache.respond(request(), "/api/users", "users", loader)
+        assert first.status_code == 200 and first.headers["x-cache"] == "MISS"
+        assert first.headers["etag"] == make_etag(loader.body) and first.headers["x-total"] == "0"
+
+        second = await cache.respond(request(), "/api/users", "users", loader)
+        assert second.headers["x-cache"] == "HIT" and second.body == loader.body
+
+        # ETag가 같으면 본문 없이 304
+        cached = await cache.respond(request(if_none_match=f'"other", {first.headers["etag"]}'),
+                                     "/api/users", "users", loader)
+        assert cached.status_code == 304 and cached.body == b""
+        stale = await cache.respond(request(if_none_match='"other"'), "/api/users", "users", loader)
+        assert stale.status_code == 200
+        assert loader.calls == 1
+        assert cache.routes["/api/users"].as_dict() == {
+            "hits": 3, "misses": 1, "coalesced": 0, "not_modified": 1, "invalidated": 0}
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_are_coalesced():
+    async def scenario():
+        cache = ResponseCache(ttl=60)
+        loader = Loader()
+        requests = [asyncio.ensure_future(cache.respond(request(), "/api/users", "users", loader))
+                    for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        responses = await asyncio.gather(*requests)
+        assert loader.calls == 1
+        assert sorted(response.headers["x-cache"] for response in responses) == ["COALESCED"] * 4 + ["MISS"]
+
+    asyncio.run(scenario())
+
+
+def test_leader_cancellation_does_not_fail_followers():
+    async def scenario():
+        cache = ResponseCache(ttl=60)
+        loader = Loader()
+        leader = asyncio.ensure_future(cache.respond(request(), "/api/users", "users", loader))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(cache.respond(request(), "/api/users", "users", loader))
+                     for _ in range(3)]
+        await asyncio.sleep(0)
+
+        leader.cancel()  # 조회하던 클라이언트가 연결을 끊음
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        await asyncio.sleep(0)
+        loader.release.set()
+        responses = await asyncio.gather(*followers)
+        assert all(response.status_code == 200 for response in responses)
+        assert loader.calls == 2  # 남은 요청 중 하나만 다시 조회한다
+
+    asyncio.run(scenario())
+
+
+def test_follower_cancellation_propagates():
+    async def scenario():
+        cache = ResponseCache(ttl=60)
+        loader = Loader()
+        leader = asyncio.ensure_future(cache.respond(request(), "/api/users", "users", loader))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.respond(request(), "/api/users", "users", loader))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        loader.release.set()
+        assert (await leader).status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_loader_error_reaches_followers():
+    async def scenario():
+        cache = ResponseCache(ttl=60)
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("db down")
+
+        calls = [asyncio.ensure_future(cache.respond(request(), "/api/users", "users", failing)) for _ in range(2)]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_drops_entries_and_skips_racing_loads():
+    async def scenario():
+        cache = ResponseCache(ttl=60)
+        loader = Loader()
+        loader.release.set()
+        await cache.respond(request(), "/api/users", "users", loader)
+        await cache.respond(request(), "/api/events", "events", loader)
+        cache.invalidate("users")
+        assert cache.get_status()["entries"] == 1
+        assert cache.routes["/api/users"].invalidated == 1
+
+        # 조회 중에 쓰기가 있으면 그 결과는 캐시하지 않는다
+        racing = Loader()
+        pending = asyncio.ensure_future(cache.respond(request(), "/api/users", "users", racing))
+        await asyncio.sleep(0)
+        cache.invalidate("users")
+        racing.release.set()
+        assert (await pending).headers["x-cache"] == "MISS"
+        again = await cache.respond(request(), "/api/users", "users", racing)
+        assert again.headers["x-cache"] == "MISS" and racing.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_disabled_cache_bypasses():
+    async def scenario():
+        cache = ResponseCache(ttl=0)
+        loader = Loader()
+        loader.release.set()
+        for _ in range(2):
+            response = await cache.respond(request(), "/api/users", "users", loader)
+            assert response.headers["x-cache"] == "BYPASS"
+        assert loader.calls == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+import json
+
+from app.outbound import ControlFrame
+from app.session_frames import SessionFrames, message_payload
+from app.session_record import SessionRecord
+from app.sse import event_payloads
+
+
+def test_sse_and_websocket_frames_carry_the_same_payload():
+    sse, ws = SessionFrames("s1"), SessionFrames("s1", sse=False)
+    for event_type, data in (("ping_required", None), ("session_disconnected", None),
+                             ("session_moved", {"node": "b"}), ("pong_received", {"ok": True})):
+        sse_payload = json.loads(event_payloads(sse.event(event_type, data))[0])
+        ws_payload = json.loads(ws.event(event_type, data))
+        sse_payload.pop("timestamp"), ws_payload.pop("timestamp")
+        assert sse_payload == ws_payload
+        assert sse_payload["type"] == event_type and sse_payload["session_id"] == "s1"
+
+
+def test_control_events_are_control_frames():
+    for frames in (SessionFrames("s1"), SessionFrames("s1", sse=False)):
+        for event_type in ("ping_required", "session_disconnected", "session_moved"):
+            assert isinstance(frames.event(event_type), ControlFrame)
+        assert not isinstance(frames.event("pong_received"), ControlFrame)
+        assert isinstance(frames.error(RuntimeError("boom")), ControlFrame)
+
+
+def test_message_ids_only_on_session_sse_streams():
+    session = SessionRecord(user_id=1, username="john")
+    payload = message_payload("s1", session, 7, "Stream message #7 for john")
+    assert SessionFrames("s1").message(7, payload).startswith(b"id: 7\n")
+    assert SessionFrames("s1", message_ids=False).message(7, payload).startswith(b"data: ")
+    assert SessionFrames("s1", sse=False).message(7, payload) == payload
+    assert json.loads(payload)["username"] == "john"
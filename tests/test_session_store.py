@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+
+
+def test_fractional_ping_settings_from_env():
+    env = dict(os.environ, PING_INTERVAL="0.5", PING_TIMEOUT="1.5")
+    output = subprocess.run(
+        [sys.executable, "-c", "from app.session_store import InMemorySessionStore as S; "
+                               "s = S(); print(s.ping_interval, s.ping_timeout)"],
+        env=env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    assert output.split() == ["0.5", "1.5"]
@@ -0,0 +1,101 @@
+import pytest
+from fastapi import HTTPException
+
+from app.routers.stream import _require_unsharded
+from app.session_manager import session_manager
+from app.shard_proxy import ShardProxy, _is_shard_api, session_id_from_path
+from app.sharding import HashRing, ShardMap, check_admin_token, parse_nodes
+
+KEYS = [f"session-{i}" for i in range(2000)]
+
+
+def owners(ring: HashRing) -> dict:
+    return {key: ring.owner(key) for key in KEYS}
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing().owner("anything") is None
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(["a", "b", "c"])
+    before = owners(ring)
+    ring.add_node("d")
+    after = owners(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == "d" for key in moved)
+    # 약 1/4이 새 노드로 간다
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(["a", "b", "c", "d"])
+    before = owners(ring)
+    ring.remove_node("d")
+    after = owners(ring)
+    for key in KEYS:
+        if before[key] != "d":
+            assert after[key] == before[key]
+        else:
+            assert after[key] in ("a", "b", "c")
+
+
+def test_ring_is_independent_of_insertion_order():
+    assert owners(HashRing(["a", "b", "c"])) == owners(HashRing(["c", "a", "b"]))
+
+
+def test_shard_map_update_and_new_session_ids():
+    nodes = parse_nodes("shard-0=127.0.0.1:9001, shard-1=127.0.0.1:9002")
+    assert nodes == {"shard-0": "127.0.0.1:9001", "shard-1": "127.0.0.1:9002"}
+    shards = ShardMap("shard-0", nodes)
+    for _ in range(20):
+        assert shards.owns(shards.new_session_id())
+
+    shards.update({**nodes, "shard-2": "127.0.0.1:9003"})
+    assert shards.ring.nodes == ["shard-0", "shard-1", "shard-2"]
+    assert owners(shards.ring) == owners(HashRing(["shard-0", "shard-1", "shard-2"]))
+    shards.update({"shard-0": "127.0.0.1:9001"})
+    assert all(shards.owns(key) for key in KEYS[:100])
+    assert ShardMap().owns("anything")  # 샤딩을 쓰지 않으면 모두 소유
+
+
+def test_admin_token_check():
+    assert check_admin_token("secret", "secret")
+    assert check_admin_token(b"secret", "secret")
+    assert not check_admin_token("wrong", "secret")
+    assert not check_admin_token(None, "secret")
+    assert not check_admin_token("", "")  # 토큰이 설정되지 않으면 관리 API는 꺼져 있다
+
+
+def test_proxy_blocks_shard_admin_paths_even_when_encoded():
+    assert _is_shard_api(b"/api/system/shard/handover")
+    assert _is_shard_api(b"/api/system/shard%2Fadopt?x=1")
+    assert _is_shard_api(b"/api/system/%73hard/handover")
+    assert not _is_shard_api(b"/api/system/shard")  # 읽기 전용 상태 조회는 전달
+    assert not _is_shard_api(b"/api/session/create")
+
+
+def test_session_id_from_path():
+    assert session_id_from_path(b"/stream/abc?x=1") == "abc"
+    assert session_id_from_path(b"/api/session/abc/pong") == "abc"
+    assert session_id_from_path(b"/ws/abc") == "abc"
+    for path in (b"/stream/multiplex", b"/stream/multiplex/stream-1", b"/stream/multiplex?sessions=a,b",
+                 b"/api/session/create", b"/api/session/batch", b"/stream", b"/api/users"):
+        assert session_id_from_path(path) is None
+
+
+def test_multiplex_requests_are_not_routed_by_hash():
+    proxy = ShardProxy({"a": "127.0.0.1:9001", "b": "127.0.0.1:9002"})
+    assert {proxy.route(b"/stream/multiplex") for _ in range(4)} == {"a", "b"}
+
+
+def test_multiplex_rejected_when_sharded():
+    previous = session_manager.shards
+    session_manager.shards = ShardMap("a", {"a": "127.0.0.1:9001", "b": "127.0.0.1:9002"})
+    try:
+        with pytest.raises(HTTPException) as error:
+            _require_unsharded()
+        assert error.value.status_code == 409
+    finally:
+        session_manager.shards = previous
+    _require_unsharded()
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app.logging_config import SlowQueryLog
+
+
+def make_engine():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def add_sleep(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or ms)
+
+    return engine
+
+
+def test_slow_statements_recorded():
+    log = SlowQueryLog(threshold_ms=20)
+    engine = make_engine()
+    log.install(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT sleep_ms(30)"))
+    status = log.get_status()
+    assert status["statements"] == 2 and status["slow_statements"] == 1
+    assert status["recent"][0]["statement"] == "SELECT sleep_ms(30)"
+    assert 20 <= status["max_ms"] < 1000
+
+
+def test_failing_statement_does_not_leak_start_time():
+    log = SlowQueryLog(threshold_ms=20)
+    engine = make_engine()
+    log.install(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        assert "query_start" not in conn.info
+
+        # 실패한 문장 뒤에도 다음 문장은 자기 시작 시각으로 측정된다
+        time.sleep(0.05)
+        conn.execute(text("SELECT 1"))
+    status = log.get_status()
+    assert status["statements"] == 1 and status["slow_statements"] == 0
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from sqlalchemy import func, select
+from starlette.requests import Request
+
+from app.database import AsyncSessionLocal, init_db
+from app.models import User
+from app.routers.users import DEFAULT_PAGE_SIZE, get_users
+
+
+def request(query: str = "") -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/api/users", "query_string": query.encode(),
+                    "headers": [], "scheme": "http", "server": ("test", 80)})
+
+
+async def add_users(prefix: str, count: int) -> list:
+    """사용자를 count명 추가하고 새 id 목록을 반환합니다."""
+    async with AsyncSessionLocal() as db:
+        users = [User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com") for i in range(count)]
+        db.add_all(users)
+        await db.commit()
+        return [user.id for user in users]
+
+
+async def page(limit=None, after=None, format="json"):
+    query = "&".join(f"{key}={value}" for key, value in (("limit", limit), ("after", after), ("format", format))
+                     if value is not None)
+    async with AsyncSessionLocal() as db:
+        return await get_users(db, request(query), limit=limit, after=after, format=format)
+
+
+def test_no_parameters_returns_every_row():
+    async def scenario():
+        await init_db()
+        await add_users("all_", DEFAULT_PAGE_SIZE + 5)
+        async with AsyncSessionLocal() as db:
+            total = await db.scalar(select(func.count()).select_from(User))
+
+        response = await page()
+        rows = json.loads(response.body)
+        # 파라미터 없는 기존 호출은 잘리지 않고 다음 커서 헤더도 없다
+        assert len(rows) == total > DEFAULT_PAGE_SIZE
+        assert "x-next-cursor" not in response.headers and "link" not in response.headers
+
+    asyncio.run(scenario())
+
+
+def test_keyset_cursor_boundaries():
+    async def scenario():
+        await init_db()
+        ids = await add_users("page_", 5)
+        start = ids[0] - 1
+
+        first = await page(limit=2, after=start)
+        assert [row["id"] for row in json.loads(first.body)] == ids[:2]
+        assert first.headers["x-next-cursor"] == str(ids[1])
+        assert first.headers["link"] == f'</api/users?after={ids[1]}&limit=2>; rel="next"'
+
+        second = await page(limit=2, after=int(first.headers["x-next-cursor"]))
+        assert [row["id"] for row in json.loads(second.body)] == ids[2:4]
+
+        # 마지막 페이지는 덜 차므로 다음 커서가 없다
+        last = await page(limit=2, after=int(second.headers["x-next-cursor"]))
+        assert [row["id"] for row in json.loads(last.body)] == ids[4:]
+        assert "x-next-cursor" not in last.headers
+
+        # 꽉 찬 마지막 페이지는 커서를 주고, 그 커서로 조회하면 빈 페이지
+        exact = await page(limit=5, after=start)
+        assert exact.headers["x-next-cursor"] == str(ids[-1])
+        empty = await page(limit=5, after=ids[-1])
+        assert json.loads(empty.body) == [] and "x-next-cursor" not in empty.headers
+
+        # after만 주면 기본 페이지 크기로 잘리고 잘렸다는 헤더가 붙는다
+        more = await add_users("default_", DEFAULT_PAGE_SIZE)
+        default = await page(after=start)
+        assert len(json.loads(default.body)) == DEFAULT_PAGE_SIZE
+        assert int(default.headers["x-next-cursor"]) < more[-1]
+
+    asyncio.run(scenario())
+
+
+def test_ndjson_streams_rows_after_cursor():
+    async def scenario():
+        await init_db()
+        ids = await add_users("ndjson_", 4)
+
+        async def lines(response):
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            return [json.loads(line) for line in body.splitlines()]
+
+        response = await page(after=ids[0], format="ndjson")
+        assert response.media_type == "application/x-ndjson"
+        rows = await lines(response)
+        assert [row["id"] for row in rows] == ids[1:]
+        assert rows[0] == {"id": ids[1], "username": "ndjson_1", "email": "ndjson_1@example.com"}
+
+        limited = await lines(await page(limit=2, after=ids[0] - 1, format="ndjson"))
+        assert [row["id"] for row in limited] == ids[:2]
+
+    asyncio.run(scenario())
@@ -0,0 +1,63 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, init_db
+from app.models import UserMessage
+from app.write_behind import MessageWriteBuffer
+
+
+async def saved(session_id: str) -> list:
+    async with AsyncSessionLocal() as db:
+        rows = await db.scalars(select(UserMessage.message_counter)
+                                .where(UserMessage.session_id == session_id)
+                                .order_by(UserMessage.message_counter))
+        return list(rows)
+
+
+def test_flush_writes_batches_in_order():
+    async def scenario():
+        await init_db()
+        buffer = MessageWriteBuffer(enabled=True, flush_size=2, flush_interval=3600, max_pending=100)
+        for counter in range(1, 6):
+            await buffer.enqueue("wb-order", counter, f"message {counter}")
+        assert await buffer.flush()
+        assert await saved("wb-order") == [1, 2, 3, 4, 5]
+        assert buffer.commits == 3 and buffer.flushed_rows == 5
+        assert buffer.get_status()["pending"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_enqueue_waits_when_buffer_is_full():
+    async def scenario():
+        await init_db()
+        buffer = MessageWriteBuffer(enabled=True, flush_size=10, flush_interval=3600, max_pending=3)
+        for counter in range(1, 4):
+            await buffer.enqueue("wb-full", counter, "x")
+        blocked = asyncio.ensure_future(buffer.enqueue("wb-full", 4, "x"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done() and buffer.backpressure_waits == 1
+
+        # flush가 공간을 만들면 대기 중인 enqueue가 풀린다
+        assert await buffer.flush()
+        await asyncio.wait_for(blocked, 1)
+        assert buffer.get_status()["pending"] == 1
+        await buffer.stop()
+        assert await saved("wb-full") == [1, 2, 3, 4]
+
+    asyncio.run(scenario())
+
+
+def test_stop_flushes_remaining_rows():
+    async def scenario():
+        await init_db()
+        buffer = MessageWriteBuffer(enabled=True, flush_size=500, flush_interval=3600, max_pending=100)
+        await buffer.start()
+        await buffer.enqueue("wb-stop", 1, "x")
+        await buffer.stop()
+        async with AsyncSessionLocal() as db:
+            assert await db.scalar(select(func.count()).select_from(UserMessage)
+                                   .where(UserMessage.session_id == "wb-stop")) == 1
+
+    asyncio.run(scenario())